@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga y latencia de punta a punta
+Levanta el servidor sin pantalla, reproduce trazas de eventos como las del
+cliente web contra /mouse, /type, /special y /shortcut, y reporta throughput
+y latencias p50/p95/p99 por acción. Los resultados se guardan en JSON para
+comparar versiones (ej. server.py contra server_realtime_drag.py).
+
+Uso:
+    python3 benchmarks/run_benchmark.py --trace mixed --duration 10 --concurrency 4
+    python3 benchmarks/run_benchmark.py --server server/server_realtime_drag.py
+    python3 benchmarks/run_benchmark.py --server-args "--mode async --latency-profile instant"
+    python3 benchmarks/run_benchmark.py --baseline resultados_anteriores.json
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from traces import TRACES, build_trace, event_action, load_trace
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+DEFAULT_SERVER = os.path.join(REPO_DIR, 'server', 'server.py')
+
+# pyautogui/pynput de reemplazo para las variantes antiguas, que no tienen --backend
+STUB_INJECTION_DIR = os.path.join(BENCHMARK_DIR, 'stub_injection')
+
+# Las variantes antiguas siempre escuchan en este puerto
+LEGACY_PORT = 5000
+
+STARTUP_TIMEOUT = 15.0
+REQUEST_TIMEOUT = 10.0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de latencia del servidor MultiComputer')
+    parser.add_argument('--server', default=DEFAULT_SERVER,
+                        help='Script del servidor a medir (default: server/server.py)')
+    parser.add_argument('--server-args', default='',
+                        help='Argumentos extra para server.py (ej. "--mode async")')
+    parser.add_argument('--url', default=None,
+                        help='Medir un servidor ya iniciado en esta URL en lugar de levantar uno')
+    parser.add_argument('--port', type=int, default=5099, help='Puerto para el servidor levantado (default: 5099)')
+    parser.add_argument('--trace', choices=sorted(TRACES), default='mixed', help='Traza sintética (default: mixed)')
+    parser.add_argument('--trace-file', default=None, help='Traza grabada en JSON Lines (reemplaza --trace)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Duración de la traza sintética en segundos')
+    parser.add_argument('--concurrency', type=int, default=1, help='Clientes simultáneos (default: 1)')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Velocidad de reproducción: 2 = el doble de rápido, 0 = lo más rápido posible')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Ignora los tiempos de la traza y envía N eventos/s por cliente')
+    parser.add_argument('--hub-targets', default=None, metavar='ID,ID,...',
+                        help='Medir hub.py (con --url): cada cliente envía a uno de estos destinos (header X-Target)')
+    parser.add_argument('--output', default='benchmark_results.json', help='Archivo JSON de resultados')
+    parser.add_argument('--baseline', default=None, help='Resultados anteriores para detectar regresiones')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Aumento de p95 tolerado frente al baseline (default: 0.25 = 25%%)')
+    return parser.parse_args(argv)
+
+
+# ============================================================================
+# SERVIDOR
+# ============================================================================
+
+def script_options(script):
+    """Opciones de línea de comandos que acepta el script (las variantes antiguas no tienen)"""
+    with open(script, encoding='utf-8') as source:
+        code = source.read()
+    return {option for option in ('--backend', '--rate-limit') if f"'{option}'" in code}
+
+
+def start_server(script, port, extra_args):
+    """Levanta el servidor sin pantalla. Retorna (proceso, URL base)"""
+    env = dict(os.environ)
+    options = script_options(script)
+    if '--backend' in options:
+        command = [sys.executable, script, '--backend', 'null', '--port', str(port)]
+        if '--rate-limit' in options and '--rate-limit' not in extra_args:
+            # La cuota por cliente falsearía las mediciones a máxima velocidad
+            command += ['--rate-limit', '0']
+        command += extra_args
+    else:
+        # Sin backend nulo: se reemplazan pyautogui y pynput por los del benchmark
+        command = [sys.executable, script]
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, (STUB_INJECTION_DIR, env.get('PYTHONPATH'))))
+        port = LEGACY_PORT
+
+    # Los errores van a un archivo temporal: un pipe sin leer podría bloquear al servidor
+    errors = tempfile.TemporaryFile()
+    process = subprocess.Popen(command, cwd=os.path.dirname(script), env=env,
+                               stdout=subprocess.DEVNULL, stderr=errors)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            errors.seek(0)
+            raise RuntimeError(f'El servidor terminó al arrancar:\n{errors.read().decode(errors="replace")}')
+        try:
+            status, _ = request_json(url, 'GET', '/ping')
+            if status == 200:
+                return process, url
+        except OSError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f'El servidor no respondió en {STARTUP_TIMEOUT:.0f} s')
+
+
+def request_json(url, method, path):
+    """Request simple (fuera de la medición) que retorna (código, JSON o None)"""
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=REQUEST_TIMEOUT)
+    try:
+        connection.request(method, path)
+        response = connection.getresponse()
+        body = response.read()
+        try:
+            return response.status, json.loads(body)
+        except ValueError:
+            return response.status, None
+    finally:
+        connection.close()
+
+
+# ============================================================================
+# REPRODUCCIÓN
+# ============================================================================
+
+def schedule(events, speed, rate, offset):
+    """Instante de envío de cada evento, relativo al inicio del cliente"""
+    if rate:
+        return [offset + index / rate for index in range(len(events))]
+    if speed <= 0:
+        return [None] * len(events)  # Lo más rápido posible: sin esperas
+    return [offset + t / speed for t, _, _ in events]
+
+
+def replay(url, events, send_times, start, samples, target_id=None):
+    """Reproduce la traza en una conexión persistente y registra cada muestra.
+
+    Cada muestra es (acción, latencia, latencia corregida, código HTTP o None). La latencia
+    corregida se mide desde el instante programado y no desde el envío: si el
+    servidor se atrasa, la espera acumulada también cuenta (evita la omisión
+    coordinada de un cliente que solo envía cuando recibe la respuesta).
+    """
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=REQUEST_TIMEOUT)
+    headers = {'Content-Type': 'application/json'}
+    if target_id:
+        headers['X-Target'] = target_id
+    for (_, endpoint, body), send_at in zip(events, send_times):
+        scheduled = start + send_at if send_at is not None else None
+        if scheduled is not None:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        sent = time.perf_counter()
+        try:
+            connection.request('POST', endpoint, body=json.dumps(body), headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            status = None
+        done = time.perf_counter()
+        samples.append((event_action(endpoint, body), done - sent,
+                        done - (scheduled if scheduled is not None else sent), status))
+    connection.close()
+
+
+def run_clients(url, events, concurrency, speed, rate, target_ids=()):
+    """Reproduce la traza en ``concurrency`` clientes a la vez. Retorna (muestras, segundos)"""
+    samples = []
+    threads = []
+    start = time.perf_counter() + 0.2
+    interval = (1 / rate) if rate else 0.016
+    for index in range(concurrency):
+        # Desfasar los clientes para que no envíen todos en el mismo instante
+        send_times = schedule(events, speed, rate, offset=index * interval / concurrency)
+        # Con el hub, los clientes se reparten entre los destinos
+        target_id = target_ids[index % len(target_ids)] if target_ids else None
+        thread = threading.Thread(target=replay, args=(url, events, send_times, start, samples, target_id),
+                                  daemon=True)
+        threads.append(thread)
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+# ============================================================================
+# RESULTADOS
+# ============================================================================
+
+def percentile(sorted_values, fraction):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies):
+    """p50/p95/p99, media y máximo en milisegundos"""
+    values = sorted(latencies)
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'mean': 0.0, 'max': 0.0}
+    return {
+        'p50': round(percentile(values, 0.50) * 1000, 3),
+        'p95': round(percentile(values, 0.95) * 1000, 3),
+        'p99': round(percentile(values, 0.99) * 1000, 3),
+        'mean': round(sum(values) / len(values) * 1000, 3),
+        'max': round(values[-1] * 1000, 3)
+    }
+
+
+def build_results(samples, elapsed):
+    by_action = {}
+    for action, latency, corrected, status in samples:
+        entry = by_action.setdefault(action, {'latency': [], 'corrected': [], 'errors': 0, 'throttled': 0})
+        if status == 429:
+            # Rechazado por el control de admisión: no es un error ni una latencia del servidor
+            entry['throttled'] += 1
+            continue
+        entry['latency'].append(latency)
+        entry['corrected'].append(corrected)
+        if status is None or status >= 400:
+            entry['errors'] += 1
+
+    actions = {}
+    for action, entry in sorted(by_action.items()):
+        count = len(entry['latency'])
+        actions[action] = {
+            'count': count,
+            'errors': entry['errors'],
+            'throttled': entry['throttled'],
+            'throughput_rps': round(count / elapsed, 1),
+            'latency_ms': summarize(entry['latency']),
+            'corrected_ms': summarize(entry['corrected'])
+        }
+    measured = [sample[1] for sample in samples if sample[3] != 429]
+    return {
+        'events': len(samples),
+        'errors': sum(entry['errors'] for entry in by_action.values()),
+        'throttled': len(samples) - len(measured),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(measured) / elapsed, 1),
+        'overall_ms': summarize(measured),
+        'actions': actions
+    }
+
+
+def print_report(results):
+    print(f"\n📊 {results['server']} - traza {results['trace']} - "
+          f"{results['concurrency']} cliente(s) - {results['events']} eventos en {results['elapsed_s']} s "
+          f"({results['throughput_rps']} req/s, {results['errors']} errores, {results['throttled']} con 429)")
+    print(f"{'acción':<12}{'n':>8}{'err':>6}{'429':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'p99 corr':>10}")
+    for action, entry in results['actions'].items():
+        latency = entry['latency_ms']
+        print(f"{action:<12}{entry['count']:>8}{entry['errors']:>6}{entry['throttled']:>6}{entry['throughput_rps']:>9}"
+              f"{latency['p50']:>9}{latency['p95']:>9}{latency['p99']:>9}{entry['corrected_ms']['p99']:>10}")
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Retorna la lista de regresiones de p95 por acción frente al baseline"""
+    regressions = []
+    for action, entry in results['actions'].items():
+        previous = baseline.get('actions', {}).get(action)
+        if previous is None:
+            continue
+        old_p95 = previous['latency_ms']['p95']
+        new_p95 = entry['latency_ms']['p95']
+        # Ignorar variaciones por debajo de medio milisegundo (ruido del sistema)
+        if new_p95 > old_p95 * (1 + tolerance) and new_p95 - old_p95 > 0.5:
+            regressions.append(f'{action}: p95 {old_p95} ms -> {new_p95} ms')
+    return regressions
+
+
+def main():
+    args = parse_args()
+    events = load_trace(args.trace_file) if args.trace_file else build_trace(args.trace, args.duration)
+    if not events:
+        print('❌ La traza está vacía')
+        return 2
+
+    process = None
+    script = os.path.abspath(args.server)
+    extra_args = shlex.split(args.server_args)
+    if args.url:
+        url = args.url.rstrip('/')
+    else:
+        print(f'🚀 Iniciando {os.path.basename(script)} sin pantalla...')
+        process, url = start_server(script, args.port, extra_args)
+
+    try:
+        print(f'▶️  Reproduciendo {len(events)} eventos por cliente contra {url}')
+        target_ids = [target_id.strip() for target_id in (args.hub_targets or '').split(',') if target_id.strip()]
+        samples, elapsed = run_clients(url, events, args.concurrency, args.speed, args.rate, target_ids)
+        results = {
+            'server': args.url or os.path.relpath(script, REPO_DIR),
+            'server_args': extra_args,
+            'trace': os.path.basename(args.trace_file) if args.trace_file else args.trace,
+            'concurrency': args.concurrency,
+            'speed': args.speed,
+            'rate': args.rate,
+            'timestamp': time.time()
+        }
+        results.update(build_results(samples, elapsed))
+        try:
+            results['server_status'] = request_json(url, 'GET', '/status')[1]
+        except OSError:
+            results['server_status'] = None
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=5)
+
+    print_report(results)
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump(results, output, indent=2, ensure_ascii=False)
+    print(f'💾 Resultados guardados en {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            regressions = compare_with_baseline(results, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print('❌ Regresiones frente al baseline:')
+            for regression in regressions:
+                print(f'   • {regression}')
+            return 1
+        print('✅ Sin regresiones frente al baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
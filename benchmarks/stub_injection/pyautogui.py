@@ -0,0 +1,62 @@
+"""
+pyautogui de reemplazo para benchmarks sin pantalla
+No mueve nada, pero respeta los tiempos del original: ``duration`` de la
+interpolación y ``PAUSE`` después de cada llamada (salvo ``_pause=False``).
+Así las variantes antiguas del servidor, que llaman a pyautogui directamente,
+se pueden medir con la misma latencia que tendrían en un equipo real.
+"""
+
+import time
+
+PAUSE = 0.1
+FAILSAFE = True
+
+_SCREEN_SIZE = (1920, 1080)
+_position = [0, 0]
+
+
+class FailSafeException(Exception):
+    pass
+
+
+def _finish(duration=0.0, _pause=True):
+    if duration:
+        time.sleep(duration)
+    if _pause and PAUSE:
+        time.sleep(PAUSE)
+
+
+def size():
+    return _SCREEN_SIZE
+
+
+def position():
+    return tuple(_position)
+
+
+def moveTo(x=None, y=None, duration=0.0, _pause=True, **kwargs):
+    if x is not None and y is not None:
+        _position[:] = [x, y]
+    _finish(duration, _pause)
+
+
+def dragTo(x=None, y=None, duration=0.0, button='left', _pause=True, **kwargs):
+    moveTo(x, y, duration, _pause)
+
+
+def click(x=None, y=None, button='left', _pause=True, **kwargs):
+    if x is not None and y is not None:
+        _position[:] = [x, y]
+    _finish(0.0, _pause)
+
+
+def mouseDown(x=None, y=None, button='left', _pause=True, **kwargs):
+    _finish(0.0, _pause)
+
+
+def mouseUp(x=None, y=None, button='left', _pause=True, **kwargs):
+    _finish(0.0, _pause)
+
+
+def scroll(clicks, x=None, y=None, _pause=True, **kwargs):
+    _finish(0.0, _pause)
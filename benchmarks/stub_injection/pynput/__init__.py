@@ -0,0 +1 @@
+"""pynput de reemplazo para benchmarks sin pantalla (ver ../pyautogui.py)"""
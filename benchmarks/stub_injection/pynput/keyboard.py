@@ -0,0 +1,30 @@
+"""Teclado de reemplazo: acepta las llamadas de pynput.keyboard sin inyectar nada"""
+
+from contextlib import contextmanager
+
+
+class _KeyNames:
+    """Imita pynput.keyboard.Key: cualquier atributo es una tecla con ese nombre"""
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return f'<{name}>'
+
+
+Key = _KeyNames()
+
+
+class Controller:
+    def press(self, key):
+        pass
+
+    def release(self, key):
+        pass
+
+    def type(self, text):
+        pass
+
+    @contextmanager
+    def pressed(self, *keys):
+        yield
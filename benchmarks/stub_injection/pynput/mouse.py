@@ -0,0 +1,23 @@
+"""Mouse de reemplazo: acepta las llamadas de pynput.mouse sin inyectar nada"""
+
+
+class Button:
+    left = 'left'
+    right = 'right'
+    middle = 'middle'
+
+
+class Controller:
+    position = (0, 0)
+
+    def press(self, button):
+        pass
+
+    def release(self, button):
+        pass
+
+    def click(self, button, count=1):
+        pass
+
+    def scroll(self, dx, dy):
+        pass
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Trazas de eventos para el benchmark
+Cada traza es una lista de (instante en segundos, endpoint, cuerpo JSON) con
+el mismo ritmo que produce el cliente web:
+
+    moves   movimiento a ~60 Hz (MouseManager.js, throttle de 16 ms)
+    scroll  ráfagas de scroll a ~120 Hz (MouseManager.js, throttle de 8 ms)
+    drag    drag en tiempo real: drag_start, drag_move a ~60 Hz, drag_end
+    typing  ráfagas de escritura carácter a carácter (TextCapture.js), con
+            backspace, enter y algún shortcut
+    mixed   todo lo anterior intercalado, como una sesión real
+
+También se puede cargar una traza grabada en JSON Lines, una línea por evento:
+    {"t": 0.016, "endpoint": "/mouse", "body": {"action": "move", "x": 10, "y": 20}}
+"""
+
+import json
+import math
+import random
+
+MOVE_INTERVAL = 0.016
+SCROLL_INTERVAL = 0.008
+
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
+
+SAMPLE_TEXT = (
+    'Hola mundo, esto es una prueba de escritura remota. '
+    'El veloz murciélago hindú comía feliz cardillo y kiwi. '
+)
+
+
+def _path_point(t):
+    # Trayectoria suave tipo Lissajous dentro de la pantalla
+    x = SCREEN_WIDTH / 2 + SCREEN_WIDTH * 0.4 * math.sin(t * 1.3)
+    y = SCREEN_HEIGHT / 2 + SCREEN_HEIGHT * 0.4 * math.sin(t * 1.7 + 0.5)
+    return int(x), int(y)
+
+
+def moves_trace(duration, start=0.0):
+    """Movimiento continuo del mouse a ~60 Hz"""
+    events = []
+    t = 0.0
+    while t < duration:
+        x, y = _path_point(start + t)
+        events.append((start + t, '/mouse', {'action': 'move', 'x': x, 'y': y}))
+        t += MOVE_INTERVAL
+    return events
+
+
+def scroll_trace(duration, start=0.0, burst=0.3, gap=0.4):
+    """Ráfagas de scroll a ~120 Hz separadas por pausas (como una rueda o un touchpad)"""
+    events = []
+    t = 0.0
+    direction = -1
+    while t < duration:
+        burst_end = min(t + burst, duration)
+        x, y = _path_point(start + t)
+        while t < burst_end:
+            events.append((start + t, '/mouse', {'action': 'scroll', 'x': x, 'y': y, 'amount': direction * 3}))
+            t += SCROLL_INTERVAL
+        t += gap
+        direction = -direction
+    return events
+
+
+def drag_trace(duration, start=0.0, drag_length=0.8, gap=0.3):
+    """Drags en tiempo real: presionar, mover a ~60 Hz y soltar"""
+    events = []
+    t = 0.0
+    while t + drag_length < duration:
+        x, y = _path_point(start + t)
+        events.append((start + t, '/mouse', {'action': 'drag_start', 'x': x, 'y': y, 'button': 'left'}))
+        end = t + drag_length
+        t += MOVE_INTERVAL
+        while t < end:
+            x, y = _path_point(start + t)
+            events.append((start + t, '/mouse', {'action': 'drag_move', 'x': x, 'y': y, 'button': 'left'}))
+            t += MOVE_INTERVAL
+        events.append((start + t, '/mouse', {'action': 'drag_end', 'x': x, 'y': y, 'button': 'left'}))
+        t += gap
+    return events
+
+
+def typing_trace(duration, start=0.0, chars_per_second=10, seed=7):
+    """Escritura carácter a carácter con correcciones, enters y shortcuts ocasionales"""
+    rng = random.Random(seed)
+    events = []
+    t = 0.0
+    index = 0
+    while t < duration:
+        roll = rng.random()
+        if roll < 0.05:
+            events.append((start + t, '/special', {'key': 'backspace'}))
+        elif roll < 0.07:
+            events.append((start + t, '/special', {'key': 'enter'}))
+        elif roll < 0.08:
+            events.append((start + t, '/shortcut', {'shortcut': rng.choice(('copy', 'paste', 'undo', 'select_all'))}))
+        else:
+            events.append((start + t, '/type', {'text': SAMPLE_TEXT[index % len(SAMPLE_TEXT)]}))
+            index += 1
+        # Ritmo humano: variación alrededor de la velocidad media y pausas entre palabras
+        t += rng.uniform(0.5, 1.5) / chars_per_second
+        if rng.random() < 0.03:
+            t += rng.uniform(0.3, 1.0)
+    return events
+
+
+def mixed_trace(duration):
+    """Sesión mixta: movimiento, scroll, drags, clicks y escritura en segmentos"""
+    segment = 2.0
+    builders = (moves_trace, scroll_trace, drag_trace, typing_trace)
+    events = []
+    t = 0.0
+    index = 0
+    while t < duration:
+        length = min(segment, duration - t)
+        events.extend(builders[index % len(builders)](length, start=t))
+        if builders[index % len(builders)] is moves_trace:
+            x, y = _path_point(t + length)
+            events.append((t + length, '/mouse', {'action': 'click', 'x': x, 'y': y, 'button': 'left'}))
+        t += segment
+        index += 1
+    return events
+
+
+TRACES = {
+    'moves': moves_trace,
+    'scroll': scroll_trace,
+    'drag': drag_trace,
+    'typing': typing_trace,
+    'mixed': mixed_trace
+}
+
+
+def build_trace(name, duration):
+    """Genera una traza sintética por nombre, ordenada por instante"""
+    if name not in TRACES:
+        raise ValueError(f"Traza desconocida: {name} (opciones: {', '.join(TRACES)})")
+    return sorted(TRACES[name](duration), key=lambda event: event[0])
+
+
+def load_trace(path):
+    """Carga una traza grabada (JSON Lines con t, endpoint y body)"""
+    events = []
+    with open(path, encoding='utf-8') as trace_file:
+        for line in trace_file:
+            if line.strip():
+                event = json.loads(line)
+                events.append((float(event['t']), event['endpoint'], event['body']))
+    events.sort(key=lambda event: event[0])
+    return events
+
+
+def event_action(endpoint, body):
+    """Nombre con el que se agrupan las latencias (acción de /mouse o el endpoint)"""
+    if endpoint == '/mouse':
+        return body.get('action', 'mouse')
+    return endpoint.strip('/')
@@ -10,7 +10,27 @@ export const CONFIG = {
         SCREEN_ENDPOINT: '/screen',
         TYPE_ENDPOINT: '/type',
         SPECIAL_ENDPOINT: '/special',
-        MOUSE_ENDPOINT: '/mouse'
+        MOUSE_ENDPOINT: '/mouse',
+        EVENTS_ENDPOINT: '/events',
+        BULK_TYPE_ENDPOINT: '/type/bulk',
+        KEYS_ENDPOINT: '/keys',
+        WS_ENDPOINT: '/ws',
+        SCREEN_STREAM_ENDPOINT: '/screen/stream',
+        CLIPBOARD_ENDPOINT: '/clipboard',
+        FILES_ENDPOINT: '/files',
+        // Perfil de latencia de la sesión: 'instant', 'smooth' o 'compat' (null = el del servidor)
+        LATENCY_PROFILE: null,
+        // Canal de retorno: el servidor informa la posición real del cursor y lo ya aplicado
+        FEEDBACK: true,
+        // Envíos recordados para medir el RTT cuando llega su confirmación
+        FEEDBACK_MAX_PENDING: 512
+    },
+
+    // Envío de archivos (/files): tramos reanudables
+    FILES: {
+        SEGMENT_BYTES: 8 * 1024 * 1024,
+        MAX_RETRIES: 5,
+        RETRY_DELAY: 1000 // ms, crece con cada reintento
     },
 
     // Configuración del canvas
@@ -30,7 +50,13 @@ export const CONFIG = {
         EDGE_TOLERANCE: 10, // píxeles de tolerancia cerca del borde
         SCROLL_MULTIPLIER_TRACKPAD: 3,
         SCROLL_MULTIPLIER_WHEEL: 3,
-        SCROLL_MAX_AMOUNT: 50
+        SCROLL_MAX_AMOUNT: 50,
+        // Modo touchpad: el dedo envía desplazamientos (move_rel) y el servidor acelera
+        TOUCHPAD_SCALE: 1.0, // píxeles remotos por píxel de pantalla táctil (antes de la curva)
+        TAP_MAX_DURATION: 200, // ms máximos de un toque para contar como click
+        TAP_MAX_DISTANCE: 6, // píxeles máximos de movimiento de un toque
+        // Marca de tiempo en move/drag_move para el buffer de jitter del servidor (cabe en el evento binario)
+        TIMESTAMP_SAMPLES: true
     },
 
     // Configuración de UI
@@ -72,6 +98,7 @@ export const CONFIG = {
             ACTIVE: '#e74c3c',
             MARGIN: '#f39c12',
             DRAG_START: '#2c3e50',
+            REMOTE: '#27ae60',
             WHITE: '#ffffff'
         }
     },
@@ -115,6 +142,7 @@ export const CONFIG = {
         '.switch-container',
         '.dark-mode-toggle',
         '#mouseTrackingToggle',
+        '#touchpadModeToggle',
         '#darkModeToggle',
         '#connectBtn',
         '#serverIP'
@@ -8,6 +8,10 @@ import { ConnectionManager } from './modules/ConnectionManager.js';
 import { CanvasManager } from './modules/CanvasManager.js';
 import { MouseManager } from './modules/MouseManager.js';
 import { ApiClient } from './modules/ApiClient.js';
+import { InputChannel } from './modules/InputChannel.js';
+import { ScreenView } from './modules/ScreenView.js';
+import { ClipboardSync } from './modules/ClipboardSync.js';
+import { FileTransfer } from './modules/FileTransfer.js';
 import { UIManager } from './modules/UIManager.js';
 import { TextCapture } from './modules/TextCapture.js';
 import { DarkMode } from './modules/DarkMode.js';
@@ -26,6 +30,10 @@ class RemoteTypingClient {
         this.canvas = new CanvasManager(this);
         this.mouse = new MouseManager(this);
         this.api = new ApiClient(this);
+        this.channel = new InputChannel(this);
+        this.screenView = new ScreenView(this);
+        this.clipboard = new ClipboardSync(this);
+        this.files = new FileTransfer(this);
         this.ui = new UIManager(this);
         this.textCapture = new TextCapture(this);
         this.darkMode = new DarkMode(this);
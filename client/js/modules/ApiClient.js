@@ -1,12 +1,60 @@
+import { CONFIG } from '../config/constants.js';
+
 /**
  * ApiClient - Maneja todas las comunicaciones con el servidor
+ * Usa el canal WebSocket cuando está abierto y HTTP como respaldo
  */
 export class ApiClient {
     constructor(client) {
         this.client = client;
+
+        // Eventos de alta frecuencia pendientes de enviar en el próximo frame
+        this.pendingEvents = [];
+        this.flushScheduled = false;
+    }
+
+    queueEvent(event) {
+        this.pendingEvents.push(event);
+
+        if (!this.flushScheduled) {
+            this.flushScheduled = true;
+            requestAnimationFrame(() => this.flushEvents());
+        }
+    }
+
+    flushEvents() {
+        const events = this.pendingEvents;
+        this.pendingEvents = [];
+        this.flushScheduled = false;
+
+        if (events.length === 0) {
+            return;
+        }
+
+        // Un solo request por frame con todos los eventos en orden
+        fetch(`${this.client.connection.getServerURL()}${CONFIG.SERVER.EVENTS_ENDPOINT}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ events: events })
+        }).then(response => {
+            if (!response.ok) {
+                this.client.logger.log(`❌ Error lote de eventos: HTTP ${response.status}`, 'error');
+            }
+        }).catch(error => {
+            if (error.name === 'TypeError' || error.message.includes('fetch')) {
+                this.client.connection.disconnect();
+            }
+        });
     }
 
     async sendCharacter(char) {
+        if (this.client.channel.send({ action: 'type', text: char })) {
+            this.client.logger.log(`📤 "${char}"`, 'success');
+            return;
+        }
+
         try {
             const response = await fetch(`${this.client.connection.getServerURL()}/type`, {
                 method: 'POST',
@@ -29,6 +77,31 @@ export class ApiClient {
         }
     }
 
+    async sendBulkText(text) {
+        // Textos grandes: el servidor los escribe en segundo plano y responde de inmediato
+        try {
+            const response = await fetch(`${this.client.connection.getServerURL()}${CONFIG.SERVER.BULK_TYPE_ENDPOINT}`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ text: text })
+            });
+
+            if (response.ok) {
+                const result = await response.json();
+                this.client.logger.log(`📋 Pegando ${text.length} caracteres (${result.job.mode})`, 'success');
+            } else {
+                throw new Error(`HTTP ${response.status}`);
+            }
+        } catch (error) {
+            this.client.logger.log(`❌ Error pegando texto: ${error.message}`, 'error');
+            if (error.name === 'TypeError' || error.message.includes('fetch')) {
+                this.client.connection.disconnect();
+            }
+        }
+    }
+
     async sendSpecialKey(key) {
         // Validar tecla
         const validKeys = ['backspace', 'enter', 'tab', 'escape', 'delete', 'space', 'arrow_up', 'arrow_down', 'arrow_left', 'arrow_right'];
@@ -36,6 +109,11 @@ export class ApiClient {
             return;
         }
 
+        if (this.client.channel.send({ action: 'special', key: key })) {
+            this.client.logger.log(`🔑 ${key}`, 'success');
+            return;
+        }
+
         try {
             const response = await fetch(`${this.client.connection.getServerURL()}/special`, {
                 method: 'POST',
@@ -59,6 +137,11 @@ export class ApiClient {
     }
 
     async sendShortcut(shortcut) {
+        if (this.client.channel.send({ action: 'shortcut', shortcut: shortcut })) {
+            this.client.logger.log(`⚡ ${shortcut}`, 'success');
+            return;
+        }
+
         try {
             const response = await fetch(`${this.client.connection.getServerURL()}/shortcut`, {
                 method: 'POST',
@@ -81,7 +164,71 @@ export class ApiClient {
         }
     }
 
+    async sendKeys(keys) {
+        if (this.client.channel.send({ action: 'keys', keys: keys })) {
+            this.client.logger.log(`⌨️ ${keys}`, 'success');
+            return;
+        }
+
+        try {
+            const response = await fetch(`${this.client.connection.getServerURL()}${CONFIG.SERVER.KEYS_ENDPOINT}`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ keys: keys })
+            });
+
+            if (response.ok) {
+                this.client.logger.log(`⌨️ ${keys}`, 'success');
+            } else {
+                throw new Error(`HTTP ${response.status}`);
+            }
+        } catch (error) {
+            this.client.logger.log(`❌ Error combinación: ${error.message}`, 'error');
+            if (error.name === 'TypeError' || error.message.includes('fetch')) {
+                this.client.connection.disconnect();
+            }
+        }
+    }
+
+    sendMotionSample(action, x, y) {
+        // Con el instante de la muestra el servidor reproduce el ritmo original aunque la red las amontone
+        const t = CONFIG.MOUSE.TIMESTAMP_SAMPLES ? performance.now() : null;
+        if (this.client.channel.sendPointer(action, x, y, 'left', 0, t)) {
+            return;
+        }
+
+        // Sin canal: se agrupa con el resto de eventos del frame
+        const event = { action: action, x: x, y: y };
+        if (t !== null) {
+            event.t = t;
+        }
+        this.queueEvent(event);
+    }
+
     async sendMouseMove(x, y) {
+        this.sendMotionSample('move', x, y);
+    }
+
+    async sendMouseMoveRelative(dx, dy) {
+        if (this.client.channel.sendPointer('move_rel', dx, dy)) {
+            return;
+        }
+
+        // Sin canal: se agrupa con el resto de eventos del frame (el servidor suma los deltas)
+        this.queueEvent({ action: 'move_rel', dx: dx, dy: dy });
+    }
+
+    async sendMouseClickHere(button = 'left') {
+        // Click en la posición actual del cursor remoto (modo touchpad)
+        this.flushEvents();
+
+        if (this.client.channel.send({ action: 'click', button: button })) {
+            this.client.logger.log(`👆 ${button} tap`, 'success');
+            return;
+        }
+
         try {
             const response = await fetch(`${this.client.connection.getServerURL()}/mouse`, {
                 method: 'POST',
@@ -89,16 +236,18 @@ export class ApiClient {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
-                    action: 'move',
-                    x: x,
-                    y: y
+                    action: 'click',
+                    button: button
                 })
             });
 
-            if (!response.ok) {
+            if (response.ok) {
+                this.client.logger.log(`👆 ${button} tap`, 'success');
+            } else {
                 throw new Error(`HTTP ${response.status}`);
             }
         } catch (error) {
+            this.client.logger.log(`❌ Error mouse: ${error.message}`, 'error');
             if (error.name === 'TypeError' || error.message.includes('fetch')) {
                 this.client.connection.disconnect();
             }
@@ -106,6 +255,14 @@ export class ApiClient {
     }
 
     async sendMouseClick(x, y, button = 'left') {
+        // Enviar primero los movimientos pendientes para conservar el orden
+        this.flushEvents();
+
+        if (this.client.channel.send({ action: 'click', x: x, y: y, button: button })) {
+            this.client.logger.log(`🖱️ ${button} click (${x}, ${y})`, 'success');
+            return;
+        }
+
         try {
             const response = await fetch(`${this.client.connection.getServerURL()}/mouse`, {
                 method: 'POST',
@@ -172,6 +329,14 @@ export class ApiClient {
     }
 
     async sendMouseDragStart(x, y, button = 'left') {
+        // Enviar primero los movimientos pendientes para conservar el orden
+        this.flushEvents();
+
+        if (this.client.channel.send({ action: 'drag_start', x: x, y: y, button: button })) {
+            this.client.logger.log(`🤏 Drag start (${x}, ${y})`, 'success');
+            return;
+        }
+
         try {
             const response = await fetch(`${this.client.connection.getServerURL()}/mouse`, {
                 method: 'POST',
@@ -200,26 +365,18 @@ export class ApiClient {
     }
 
     async sendMouseDragRealtime(x, y) {
-        try {
-            // Fire-and-forget para máxima velocidad
-            fetch(`${this.client.connection.getServerURL()}/mouse`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    action: 'drag_move',
-                    x: x,
-                    y: y
-                })
-            }).catch(() => {}); // Ignorar errores para no bloquear
-
-        } catch (error) {
-            // Silencioso para no spam de logs
-        }
+        this.sendMotionSample('drag_move', x, y);
     }
 
     async sendMouseDragEnd(x, y, button = 'left') {
+        // Enviar primero los movimientos pendientes para conservar el orden
+        this.flushEvents();
+
+        if (this.client.channel.send({ action: 'drag_end', x: x, y: y, button: button })) {
+            this.client.logger.log(`🤏 Drag end (${x}, ${y})`, 'success');
+            return;
+        }
+
         try {
             const response = await fetch(`${this.client.connection.getServerURL()}/mouse`, {
                 method: 'POST',
@@ -248,6 +405,11 @@ export class ApiClient {
     }
 
     async sendMouseScroll(x, y, amount) {
+        if (this.client.channel.sendPointer('scroll', x, y, 'left', amount)) {
+            this.client.logger.log(`🖱️ scroll ${amount > 0 ? '↑' : '↓'} (${x}, ${y})`, 'success');
+            return;
+        }
+
         try {
             // Fire-and-forget para mínima latencia - no esperamos respuesta
             fetch(`${this.client.connection.getServerURL()}/mouse`, {
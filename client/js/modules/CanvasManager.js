@@ -9,10 +9,13 @@ export class CanvasManager {
         this.canvas = document.getElementById('screenCanvas');
         this.ctx = this.canvas.getContext('2d');
         
-        // Screen configuration
+        // Screen configuration: rectángulo del escritorio virtual (origen puede ser negativo)
         this.serverScreen = {
+            x: 0,
+            y: 0,
             width: CONFIG.CANVAS.DEFAULT_SCREEN_WIDTH,
-            height: CONFIG.CANVAS.DEFAULT_SCREEN_HEIGHT
+            height: CONFIG.CANVAS.DEFAULT_SCREEN_HEIGHT,
+            monitors: []
         };
         this.canvasScale = 1; // Direct 1:1 mapping initially
         this.edgeMargin = CONFIG.CANVAS.EDGE_MARGIN;
@@ -25,6 +28,39 @@ export class CanvasManager {
         this.lastCanvasX = 0;
         this.lastCanvasY = 0;
         this.inUsableArea = false;
+        this.cursorVisible = false;
+        this.remoteCursor = null; // Posición real informada por el servidor (canal de retorno)
+    }
+
+    setServerLayout(screen) {
+        // Servidores anteriores solo informan width/height del monitor principal
+        const virtual = screen.virtual || { x: 0, y: 0, width: screen.width, height: screen.height };
+        this.serverScreen = {
+            x: virtual.x,
+            y: virtual.y,
+            width: virtual.width,
+            height: virtual.height,
+            monitors: screen.monitors || []
+        };
+    }
+
+    setRemoteCursor(x, y = null) {
+        const cursor = x === null ? null : { x, y };
+        const previous = this.remoteCursor;
+        if (cursor === previous || (cursor && previous && cursor.x === previous.x && cursor.y === previous.y)) {
+            return;
+        }
+        this.remoteCursor = cursor;
+        this.redraw();
+    }
+
+    serverToCanvas(x, y) {
+        // Coordenadas del escritorio virtual -> píxeles del canvas
+        const margin = this.edgeMargin || 20;
+        return {
+            x: margin + (x - this.serverScreen.x) * this.canvasScale,
+            y: margin + (y - this.serverScreen.y) * this.canvasScale
+        };
     }
 
     updateCanvasSize() {
@@ -85,7 +121,17 @@ export class CanvasManager {
         this.client.ui.precisionInfo.textContent = `Precisión: 1:${pixelRatio} píxeles`;
     }
 
+    redraw() {
+        // Redibujar conservando el cursor si estaba visible (ej. al llegar un frame de la vista en vivo)
+        if (this.cursorVisible) {
+            this.drawScreenWithCursor();
+        } else {
+            this.drawScreen();
+        }
+    }
+
     drawScreen() {
+        this.cursorVisible = false;
         this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
 
         // Colores según el modo
@@ -105,8 +151,19 @@ export class CanvasManager {
 
         // Draw main screen area (área útil)
         const margin = this.edgeMargin || 20;
-        this.ctx.fillStyle = screenColor;
-        this.ctx.fillRect(margin, margin, this.usableWidth || (this.canvas.width - margin * 2), this.usableHeight || (this.canvas.height - margin * 2));
+        const monitors = this.serverScreen.monitors;
+        const multiMonitor = monitors.length > 1;
+        if (multiMonitor) {
+            // Cada monitor en su posición real; los huecos quedan con el color del margen
+            this.ctx.fillStyle = screenColor;
+            for (const monitor of monitors) {
+                const origin = this.serverToCanvas(monitor.x, monitor.y);
+                this.ctx.fillRect(origin.x, origin.y, monitor.width * this.canvasScale, monitor.height * this.canvasScale);
+            }
+        } else {
+            this.ctx.fillStyle = screenColor;
+            this.ctx.fillRect(margin, margin, this.usableWidth || (this.canvas.width - margin * 2), this.usableHeight || (this.canvas.height - margin * 2));
+        }
 
         // Add subtle grid pattern only in the usable area
         this.ctx.strokeStyle = gridColor;
@@ -132,20 +189,60 @@ export class CanvasManager {
             this.ctx.stroke();
         }
 
-        // Draw screen label
-        this.ctx.fillStyle = textColor;
-        this.ctx.font = `${Math.max(12, 16 * this.canvasScale)}px Arial`;
-        this.ctx.textAlign = 'center';
-        this.ctx.fillText(
-            `Pantalla Remota (${this.serverScreen.width}x${this.serverScreen.height})`,
-            this.canvas.width / 2,
-            this.canvas.height / 2
-        );
-
-        // Draw border around usable area (pantalla real)
-        this.ctx.strokeStyle = borderColor;
-        this.ctx.lineWidth = 2;
-        this.ctx.strokeRect(margin, margin, this.usableWidth || (this.canvas.width - margin * 2), this.usableHeight || (this.canvas.height - margin * 2));
+        if (multiMonitor) {
+            // Nombre, resolución y escala de cada monitor, con su propio borde
+            this.ctx.font = `${Math.max(11, 14 * this.canvasScale)}px Arial`;
+            this.ctx.textAlign = 'center';
+            for (const monitor of monitors) {
+                const origin = this.serverToCanvas(monitor.x, monitor.y);
+                const width = monitor.width * this.canvasScale;
+                const height = monitor.height * this.canvasScale;
+                const scale = monitor.scale && monitor.scale !== 1 ? ` @${monitor.scale}x` : '';
+
+                this.ctx.fillStyle = textColor;
+                this.ctx.fillText(`${monitor.primary ? '★ ' : ''}${monitor.name}`, origin.x + width / 2, origin.y + height / 2 - 8);
+                this.ctx.fillText(`${monitor.width}x${monitor.height}${scale}`, origin.x + width / 2, origin.y + height / 2 + 10);
+
+                this.ctx.strokeStyle = borderColor;
+                this.ctx.lineWidth = 2;
+                this.ctx.strokeRect(origin.x, origin.y, width, height);
+            }
+        } else {
+            // Draw screen label
+            this.ctx.fillStyle = textColor;
+            this.ctx.font = `${Math.max(12, 16 * this.canvasScale)}px Arial`;
+            this.ctx.textAlign = 'center';
+            this.ctx.fillText(
+                `Pantalla Remota (${this.serverScreen.width}x${this.serverScreen.height})`,
+                this.canvas.width / 2,
+                this.canvas.height / 2
+            );
+
+            // Draw border around usable area (pantalla real)
+            this.ctx.strokeStyle = borderColor;
+            this.ctx.lineWidth = 2;
+            this.ctx.strokeRect(margin, margin, this.usableWidth || (this.canvas.width - margin * 2), this.usableHeight || (this.canvas.height - margin * 2));
+        }
+
+        // Vista en vivo: el último frame compuesto, encima de la representación
+        const liveView = this.client.screenView;
+        if (liveView && liveView.hasFrame) {
+            const origin = this.serverToCanvas(liveView.area.x, liveView.area.y);
+            this.ctx.imageSmoothingEnabled = true;
+            this.ctx.drawImage(liveView.frameCanvas, origin.x, origin.y,
+                liveView.area.width * this.canvasScale, liveView.area.height * this.canvasScale);
+            this.ctx.imageSmoothingEnabled = false;
+        }
+
+        // Cursor real del servidor: aro hueco, para comparar con el que dibuja el cliente
+        if (this.remoteCursor) {
+            const remote = this.serverToCanvas(this.remoteCursor.x, this.remoteCursor.y);
+            this.ctx.strokeStyle = CONFIG.COLORS.CURSOR.REMOTE;
+            this.ctx.lineWidth = 2;
+            this.ctx.beginPath();
+            this.ctx.arc(remote.x, remote.y, 6, 0, 2 * Math.PI);
+            this.ctx.stroke();
+        }
 
         // Draw border around entire canvas
         this.ctx.strokeStyle = outerBorderColor;
@@ -162,6 +259,7 @@ export class CanvasManager {
     drawScreenWithCursor() {
         // Dibujar pantalla base
         this.drawScreen();
+        this.cursorVisible = true;
 
         // Dibujar cursor en la posición exacta guardada
         if (this.lastCanvasX !== undefined && this.lastCanvasY !== undefined) {
@@ -0,0 +1,86 @@
+import { CONFIG } from '../config/constants.js';
+
+/**
+ * ClipboardSync - Portapapeles compartido con la máquina remota (/clipboard)
+ * El contenido viaja directo al portapapeles del servidor, sin pasar por el
+ * teclado. Lo que ya se sincronizó no se vuelve a enviar: el texto enviado se
+ * recuerda localmente y al traer se usa el ETag (sha256) del servidor
+ */
+export class ClipboardSync {
+    constructor(client) {
+        this.client = client;
+        this.lastSynced = null; // Último texto enviado o traído
+        this.remoteEtag = null;
+    }
+
+    get url() {
+        return `${this.client.connection.getServerURL()}${CONFIG.SERVER.CLIPBOARD_ENDPOINT}`;
+    }
+
+    async push(paste = false) {
+        let text;
+        try {
+            text = await navigator.clipboard.readText();
+        } catch (error) {
+            this.client.logger.log(`⚠️ El navegador no permite leer el portapapeles: ${error.message}`, 'warning');
+            return;
+        }
+
+        if (text === this.lastSynced && !paste) {
+            this.client.logger.log('📋 El portapapeles remoto ya tiene este contenido', 'info');
+            return;
+        }
+
+        try {
+            const response = await fetch(this.url + (paste ? '?paste=1' : ''), {
+                method: 'PUT',
+                headers: { 'Content-Type': 'text/plain; charset=utf-8' },
+                body: text
+            });
+            const result = await response.json();
+            if (!response.ok) {
+                this.client.logger.log(`❌ Portapapeles: ${result.message}`, 'error');
+                return;
+            }
+            this.lastSynced = text;
+            this.remoteEtag = result.etag;
+            const action = paste ? 'enviado y pegado' : (result.changed ? 'enviado' : 'sin cambios');
+            this.client.logger.log(`📋 Portapapeles ${action} (${text.length} caracteres)`, 'success');
+        } catch (error) {
+            this.client.logger.log(`❌ Error enviando el portapapeles: ${error.message}`, 'error');
+        }
+    }
+
+    async pull() {
+        try {
+            const headers = this.remoteEtag ? { 'If-None-Match': `"${this.remoteEtag}"` } : {};
+            const response = await fetch(this.url, { headers });
+            if (response.status === 304) {
+                this.client.logger.log('📋 El portapapeles remoto no cambió', 'info');
+                return;
+            }
+            if (!response.ok) {
+                const result = await response.json();
+                this.client.logger.log(`❌ Portapapeles: ${result.message}`, 'error');
+                return;
+            }
+
+            const etag = (response.headers.get('ETag') || '').replace(/"/g, '') || null;
+            const type = response.headers.get('Content-Type') || '';
+            if (type.startsWith('image/')) {
+                const blob = await response.blob();
+                await navigator.clipboard.write([new ClipboardItem({ [blob.type]: blob })]);
+                this.lastSynced = null;
+                this.client.logger.log(`📋 Imagen recibida del portapapeles remoto (${Math.round(blob.size / 1024)} KB)`, 'success');
+            } else {
+                const text = await response.text();
+                await navigator.clipboard.writeText(text);
+                this.lastSynced = text;
+                this.client.logger.log(`📋 Portapapeles recibido (${text.length} caracteres)`, 'success');
+            }
+            this.remoteEtag = etag;
+        } catch (error) {
+            this.client.logger.log(`❌ Error trayendo el portapapeles: ${error.message}`, 'error');
+        }
+    }
+}
@@ -32,9 +32,16 @@ export class ConnectionManager {
                 this.updateConnectionStatus(true);
                 this.client.logger.log('✅ Conectado exitosamente', 'success');
 
+                // Abrir canal persistente para los eventos de entrada
+                this.client.channel.open(this.serverURL);
+
                 // Obtener información de pantalla del servidor
                 await this.getServerScreenInfo();
 
+                if (this.client.ui.liveViewToggle.checked) {
+                    this.client.screenView.open(this.serverURL);
+                }
+
                 // Enfocar textarea automáticamente
                 setTimeout(() => {
                     this.client.ui.textInput.focus();
@@ -60,13 +67,16 @@ export class ConnectionManager {
                 const data = await response.json();
                 if (data.status === 'success') {
                     this.serverScreenInfo = data.screen;
-                    this.client.canvas.serverScreen.width = data.screen.width;
-                    this.client.canvas.serverScreen.height = data.screen.height;
+                    this.client.canvas.setServerLayout(data.screen);
 
-                    this.client.logger.log(`📺 Pantalla servidor: ${data.screen.width}x${data.screen.height}`, 'info');
+                    const screen = this.client.canvas.serverScreen;
+                    const monitorCount = screen.monitors.length;
+                    this.client.logger.log(`📺 Pantalla servidor: ${screen.width}x${screen.height} (${monitorCount} monitor${monitorCount > 1 ? 'es' : ''})`, 'info');
 
                     // Update UI
-                    this.client.ui.screenResolution.textContent = `Resolución: ${data.screen.width}x${data.screen.height}`;
+                    this.client.ui.screenResolution.textContent = monitorCount > 1
+                        ? `Resolución: ${screen.width}x${screen.height} (${monitorCount} monitores)`
+                        : `Resolución: ${screen.width}x${screen.height}`;
 
                     // Recalculate canvas size and redraw
                     this.client.canvas.updateCanvasSize();
@@ -85,6 +95,9 @@ export class ConnectionManager {
 
     disconnect() {
         this.isConnected = false;
+        this.client.channel.close();
+        this.client.screenView.close();
+        this.client.canvas.drawScreen();
         this.updateConnectionStatus(false);
         this.client.logger.log('🔌 Desconectado', 'info');
     }
@@ -0,0 +1,91 @@
+import { CONFIG } from '../config/constants.js';
+
+/**
+ * FileTransfer - Envía archivos a la máquina remota (/files)
+ * El archivo se sube en tramos con Content-Range: si la conexión se corta,
+ * se consulta al servidor cuánto llegó (HEAD, X-Upload-Offset) y se continúa
+ * desde ahí en lugar de empezar de nuevo
+ */
+export class FileTransfer {
+    constructor(client) {
+        this.client = client;
+        this.busy = false;
+    }
+
+    fileURL(name) {
+        return `${this.client.connection.getServerURL()}${CONFIG.SERVER.FILES_ENDPOINT}/${encodeURIComponent(name)}`;
+    }
+
+    async upload(file) {
+        if (this.busy) {
+            this.client.logger.log('⏳ Ya hay un archivo enviándose', 'warning');
+            return;
+        }
+        this.busy = true;
+        const url = this.fileURL(file.name);
+        let offset = 0;
+        let retries = 0;
+        this.client.logger.log(`📁 Enviando ${file.name} (${this.formatSize(file.size)})`, 'info');
+
+        try {
+            while (true) {
+                const end = Math.min(offset + CONFIG.FILES.SEGMENT_BYTES, file.size);
+                let response;
+                try {
+                    response = await fetch(url, {
+                        method: 'PUT',
+                        headers: {
+                            'Content-Type': 'application/octet-stream',
+                            // Un archivo vacío se sube sin rango
+                            ...(file.size > 0 ? { 'Content-Range': `bytes ${offset}-${end - 1}/${file.size}` } : {})
+                        },
+                        body: file.slice(offset, end)
+                    });
+                } catch (error) {
+                    // Conexión cortada: continuar desde lo que el servidor ya tiene
+                    if (++retries > CONFIG.FILES.MAX_RETRIES) {
+                        throw error;
+                    }
+                    await new Promise((resolve) => setTimeout(resolve, CONFIG.FILES.RETRY_DELAY * retries));
+                    offset = await this.uploadOffset(url);
+                    this.client.logger.log(`🔁 Reanudando ${file.name} desde ${this.formatSize(offset)}`, 'warning');
+                    continue;
+                }
+
+                const result = await response.json();
+                if (response.status === 416 && result.offset !== undefined) {
+                    offset = result.offset;
+                    continue;
+                }
+                if (!response.ok) {
+                    this.client.logger.log(`❌ Archivo ${file.name}: ${result.message}`, 'error');
+                    return;
+                }
+                if (response.status === 201) {
+                    this.client.logger.log(`✅ ${file.name} recibido (sha256 ${result.sha256.slice(0, 12)}…)`, 'success');
+                    return;
+                }
+                offset = result.offset;
+                retries = 0;
+                this.client.logger.log(`📁 ${file.name}: ${Math.floor(offset * 100 / file.size)}%`, 'info');
+            }
+        } catch (error) {
+            this.client.logger.log(`❌ Error enviando ${file.name}: ${error.message}`, 'error');
+        } finally {
+            this.busy = false;
+        }
+    }
+
+    async uploadOffset(url) {
+        const response = await fetch(url, { method: 'HEAD' });
+        const offset = response.headers.get('X-Upload-Offset');
+        return offset === null ? 0 : parseInt(offset, 10);
+    }
+
+    formatSize(bytes) {
+        if (bytes >= 1024 * 1024) {
+            return `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
+        }
+        return `${Math.round(bytes / 1024)} KB`;
+    }
+}
@@ -0,0 +1,149 @@
+import { CONFIG } from '../config/constants.js';
+import { encodePointerEvent } from './WireFormat.js';
+
+/**
+ * InputChannel - Canal WebSocket persistente hacia el servidor
+ * Transporta las mismas acciones que los endpoints REST como mensajes JSON,
+ * pagando un solo handshake por sesión en lugar de un request por evento.
+ * Cada envío lleva un número de secuencia: con el canal de retorno activo el
+ * servidor confirma el último aplicado junto a la posición real del cursor
+ */
+export class InputChannel {
+    constructor(client) {
+        this.client = client;
+        this.socket = null;
+        this.isOpen = false;
+        this.seq = 0;
+        this.sentAt = new Map(); // seq -> instante de envío, hasta que el servidor lo confirme
+        this.rtt = null;
+    }
+
+    open(serverURL) {
+        this.close();
+
+        const params = [];
+        if (CONFIG.SERVER.LATENCY_PROFILE) {
+            params.push(`profile=${encodeURIComponent(CONFIG.SERVER.LATENCY_PROFILE)}`);
+        }
+        if (CONFIG.SERVER.FEEDBACK) {
+            params.push('feedback=1');
+        }
+        let wsURL = serverURL.replace(/^http/, 'ws') + CONFIG.SERVER.WS_ENDPOINT;
+        if (params.length) {
+            wsURL += `?${params.join('&')}`;
+        }
+
+        try {
+            this.socket = new WebSocket(wsURL);
+            this.socket.binaryType = 'arraybuffer';
+        } catch (error) {
+            this.client.logger.log(`⚠️ Canal WebSocket no disponible: ${error.message}`, 'warning');
+            return;
+        }
+
+        this.socket.onopen = () => {
+            this.isOpen = true;
+            this.client.logger.log('🔌 Canal WebSocket abierto - eventos sin overhead HTTP', 'success');
+        };
+
+        this.socket.onmessage = (event) => {
+            this.handleMessage(event.data);
+        };
+
+        this.socket.onclose = () => {
+            if (this.isOpen) {
+                this.client.logger.log('🔌 Canal WebSocket cerrado - usando HTTP', 'warning');
+            }
+            this.isOpen = false;
+            this.socket = null;
+            this.resetFeedback();
+        };
+
+        this.socket.onerror = () => {
+            // El cierre posterior deja el cliente en modo HTTP
+        };
+    }
+
+    handleMessage(raw) {
+        let message;
+        try {
+            message = JSON.parse(raw);
+        } catch (error) {
+            return;
+        }
+
+        if (message.type === 'feedback') {
+            this.handleFeedback(message);
+        } else if (message.status === 'error') {
+            this.client.logger.log(`❌ Servidor: ${message.message}`, 'error');
+        }
+    }
+
+    handleFeedback(message) {
+        if (message.seq !== undefined) {
+            const sentAt = this.sentAt.get(message.seq);
+            if (sentAt !== undefined) {
+                // age_ms: lo que la confirmación esperó en el servidor antes de salir
+                const sample = performance.now() - sentAt - (message.age_ms || 0);
+                this.rtt = this.rtt === null ? sample : this.rtt + (sample - this.rtt) / 8;
+                this.client.ui.latencyInfo.textContent = `Latencia: ${Math.max(0, this.rtt).toFixed(1)} ms`;
+            }
+            // La confirmación es acumulativa: lo anterior ya se aplicó o quedó fusionado
+            for (const seq of this.sentAt.keys()) {
+                if (((message.seq - seq) >>> 0) >= 0x80000000) {
+                    break;
+                }
+                this.sentAt.delete(seq);
+            }
+        }
+        if (message.x !== undefined) {
+            this.client.canvas.setRemoteCursor(message.x, message.y);
+        }
+    }
+
+    resetFeedback() {
+        this.sentAt.clear();
+        this.rtt = null;
+        this.client.ui.latencyInfo.textContent = 'Latencia: --';
+        this.client.canvas.setRemoteCursor(null);
+    }
+
+    nextSeq() {
+        this.seq = (this.seq + 1) >>> 0;
+        if (CONFIG.SERVER.FEEDBACK) {
+            this.sentAt.set(this.seq, performance.now());
+            if (this.sentAt.size > CONFIG.SERVER.FEEDBACK_MAX_PENDING) {
+                // Sin confirmación (servidor sin canal de retorno o eventos descartados)
+                this.sentAt.delete(this.sentAt.keys().next().value);
+            }
+        }
+        return this.seq;
+    }
+
+    send(message) {
+        if (!this.isOpen) {
+            return false;
+        }
+
+        this.socket.send(JSON.stringify({ ...message, seq: this.nextSeq() }));
+        return true;
+    }
+
+    sendPointer(action, x, y, button = 'left', amount = 0, timestamp = null) {
+        if (!this.isOpen) {
+            return false;
+        }
+
+        // Eventos de alta frecuencia: 16 bytes binarios en lugar de JSON
+        this.socket.send(encodePointerEvent(action, this.nextSeq(), x, y, button, amount, timestamp));
+        return true;
+    }
+
+    close() {
+        if (this.socket) {
+            this.isOpen = false;
+            this.socket.close();
+            this.socket = null;
+        }
+    }
+}
@@ -1,3 +1,5 @@
+import { CONFIG } from '../config/constants.js';
+
 /**
  * MouseManager - Maneja todas las interacciones del mouse
  */
@@ -14,6 +16,72 @@ export class MouseManager {
         this.dragStartCanvasX = 0;
         this.dragStartCanvasY = 0;
         this.justFinishedDrag = false;
+
+        // Modo touchpad: último punto del dedo y restos de píxel sin enviar
+        this.touch = null;
+        this.touchRemainderX = 0;
+        this.touchRemainderY = 0;
+    }
+
+    handleTouchStart(e) {
+        if (!this.client.ui.touchpadModeToggle.checked) return;
+        e.preventDefault(); // Evita los eventos de mouse sintéticos del navegador
+
+        const point = e.touches[0];
+        this.touch = {
+            lastX: point.clientX,
+            lastY: point.clientY,
+            startX: point.clientX,
+            startY: point.clientY,
+            startTime: performance.now(),
+            fingers: e.touches.length,
+            moved: false
+        };
+    }
+
+    handleTouchMove(e) {
+        if (!this.touch) return;
+        e.preventDefault();
+
+        const point = e.touches[0];
+        this.touch.fingers = Math.max(this.touch.fingers, e.touches.length);
+        if (Math.hypot(point.clientX - this.touch.startX, point.clientY - this.touch.startY) > CONFIG.MOUSE.TAP_MAX_DISTANCE) {
+            this.touch.moved = true;
+        }
+
+        // Delta del dedo en píxeles remotos; los restos de píxel se guardan para el próximo evento
+        const dx = (point.clientX - this.touch.lastX) * CONFIG.MOUSE.TOUCHPAD_SCALE + this.touchRemainderX;
+        const dy = (point.clientY - this.touch.lastY) * CONFIG.MOUSE.TOUCHPAD_SCALE + this.touchRemainderY;
+        this.touch.lastX = point.clientX;
+        this.touch.lastY = point.clientY;
+
+        const stepX = Math.trunc(dx);
+        const stepY = Math.trunc(dy);
+        this.touchRemainderX = dx - stepX;
+        this.touchRemainderY = dy - stepY;
+
+        const trackingEnabled = this.client.ui.mouseTrackingToggle.checked;
+        if ((stepX || stepY) && trackingEnabled && this.client.connection.getConnectionStatus()) {
+            this.client.api.sendMouseMoveRelative(stepX, stepY);
+        }
+    }
+
+    handleTouchEnd(e) {
+        if (!this.touch) return;
+        e.preventDefault();
+        if (e.touches.length > 0) return; // Esperar a que se levanten todos los dedos
+
+        const touch = this.touch;
+        this.touch = null;
+        this.touchRemainderX = 0;
+        this.touchRemainderY = 0;
+
+        // Un toque corto sin desplazamiento es un click (dos dedos = click derecho)
+        const isTap = !touch.moved && performance.now() - touch.startTime <= CONFIG.MOUSE.TAP_MAX_DURATION;
+        const trackingEnabled = this.client.ui.mouseTrackingToggle.checked;
+        if (isTap && trackingEnabled && this.client.connection.getConnectionStatus()) {
+            this.client.api.sendMouseClickHere(touch.fingers > 1 ? 'right' : 'left');
+        }
     }
 
     handleCanvasMouseMove(e) {
@@ -29,12 +97,14 @@ export class MouseManager {
         const adjustedY = canvasY - margin;
 
         // Convert canvas coordinates to server screen coordinates con mayor precisión
-        const serverX = Math.round(adjustedX / this.client.canvas.canvasScale);
-        const serverY = Math.round(adjustedY / this.client.canvas.canvasScale);
+        // (el origen del escritorio virtual puede ser negativo con varios monitores)
+        const screen = this.client.canvas.serverScreen;
+        const serverX = Math.round(adjustedX / this.client.canvas.canvasScale) + screen.x;
+        const serverY = Math.round(adjustedY / this.client.canvas.canvasScale) + screen.y;
 
-        // Ensure coordinates are within bounds (permitir valores negativos para el margen)
-        const boundedX = Math.max(0, Math.min(serverX, this.client.canvas.serverScreen.width - 1));
-        const boundedY = Math.max(0, Math.min(serverY, this.client.canvas.serverScreen.height - 1));
+        // Ensure coordinates are within bounds (el servidor ajusta los huecos entre monitores)
+        const boundedX = Math.max(screen.x, Math.min(serverX, screen.x + screen.width - 1));
+        const boundedY = Math.max(screen.y, Math.min(serverY, screen.y + screen.height - 1));
 
         // Determinar si estamos en el área útil o en el margen
         const inUsableArea = (adjustedX >= 0 && adjustedX <= this.client.canvas.usableWidth &&
@@ -218,13 +288,14 @@ export class MouseManager {
         const adjustedX = canvasX - margin;
         const adjustedY = canvasY - margin;
 
-        // Convert canvas coordinates to server screen coordinates
-        const serverX = Math.round(adjustedX / this.client.canvas.canvasScale);
-        const serverY = Math.round(adjustedY / this.client.canvas.canvasScale);
+        // Convert canvas coordinates to server screen coordinates (escritorio virtual)
+        const screen = this.client.canvas.serverScreen;
+        const serverX = Math.round(adjustedX / this.client.canvas.canvasScale) + screen.x;
+        const serverY = Math.round(adjustedY / this.client.canvas.canvasScale) + screen.y;
 
         // Ensure coordinates are within bounds
-        const boundedX = Math.max(0, Math.min(serverX, this.client.canvas.serverScreen.width - 1));
-        const boundedY = Math.max(0, Math.min(serverY, this.client.canvas.serverScreen.height - 1));
+        const boundedX = Math.max(screen.x, Math.min(serverX, screen.x + screen.width - 1));
+        const boundedY = Math.max(screen.y, Math.min(serverY, screen.y + screen.height - 1));
 
         // Solo permitir acciones en el área útil (pero cerca del borde también funciona)
         const nearEdge = (adjustedX >= -10 && adjustedX <= this.client.canvas.usableWidth + 10 &&
@@ -0,0 +1,153 @@
+import { CONFIG } from '../config/constants.js';
+
+// Formato de frame de screen_stream.py (little-endian)
+const FRAME_MAGIC = 0x4653434d; // 'MCSF'
+const FRAME_HEADER_SIZE = 28;
+const RECT_HEADER_SIZE = 12;
+const FLAG_KEYFRAME = 0x01;
+
+/**
+ * ScreenView - Vista en vivo de la pantalla remota
+ * Recibe frames con solo los rectángulos que cambiaron (JPEG), los compone en
+ * un canvas fuera de pantalla y confirma cada frame después de dibujarlo:
+ * el servidor adapta fps y resolución a lo rápido que llegan las confirmaciones
+ */
+export class ScreenView {
+    constructor(client) {
+        this.client = client;
+        this.socket = null;
+        this.isOpen = false;
+        this.frameCanvas = document.createElement('canvas');
+        this.frameCtx = this.frameCanvas.getContext('2d');
+        this.area = null; // Rectángulo del escritorio virtual que cubre el frame
+        this.pending = Promise.resolve(); // Los frames se componen en orden
+        this.stats = { frames: 0, bytes: 0 };
+    }
+
+    get hasFrame() {
+        return this.isOpen && this.area !== null;
+    }
+
+    open(serverURL) {
+        this.close();
+
+        const wsURL = serverURL.replace(/^http/, 'ws') + CONFIG.SERVER.SCREEN_STREAM_ENDPOINT;
+        try {
+            this.socket = new WebSocket(wsURL);
+            this.socket.binaryType = 'arraybuffer';
+        } catch (error) {
+            this.client.logger.log(`⚠️ Vista en vivo no disponible: ${error.message}`, 'warning');
+            return;
+        }
+
+        this.socket.onopen = () => {
+            this.isOpen = true;
+            this.client.logger.log('🎥 Vista en vivo conectada', 'success');
+        };
+
+        this.socket.onmessage = (event) => {
+            if (typeof event.data === 'string') {
+                this.handleMessage(event.data);
+                return;
+            }
+            const socket = this.socket;
+            this.pending = this.pending
+                .then(() => this.drawFrame(event.data, socket))
+                .catch((error) => this.client.logger.log(`⚠️ Frame inválido: ${error.message}`, 'warning'));
+        };
+
+        this.socket.onclose = () => {
+            if (this.isOpen) {
+                this.client.logger.log('🎥 Vista en vivo cerrada', 'warning');
+            }
+            this.isOpen = false;
+            this.socket = null;
+            this.area = null;
+            this.client.canvas.redraw();
+        };
+
+        this.socket.onerror = () => {
+            // El cierre posterior vuelve a la representación sin imagen
+        };
+    }
+
+    close() {
+        if (this.socket) {
+            this.socket.close();
+            this.socket = null;
+        }
+        this.isOpen = false;
+        this.area = null;
+    }
+
+    handleMessage(raw) {
+        try {
+            const message = JSON.parse(raw);
+            if (message.status === 'error') {
+                this.client.logger.log(`❌ Vista en vivo: ${message.message}`, 'error');
+            }
+        } catch (error) {
+            // Mensaje no JSON: se ignora
+        }
+    }
+
+    async drawFrame(buffer, socket) {
+        const view = new DataView(buffer);
+        if (view.getUint32(0, true) !== FRAME_MAGIC) {
+            return;
+        }
+
+        const flags = view.getUint8(5);
+        const seq = view.getUint32(6, true);
+        const area = {
+            x: view.getInt32(10, true),
+            y: view.getInt32(14, true),
+            width: view.getUint16(18, true),
+            height: view.getUint16(20, true)
+        };
+        const width = view.getUint16(22, true);
+        const height = view.getUint16(24, true);
+        const count = view.getUint16(26, true);
+
+        if (this.frameCanvas.width !== width || this.frameCanvas.height !== height) {
+            if (!(flags & FLAG_KEYFRAME)) {
+                // Un frame parcial de otro tamaño no se puede componer: pedir uno completo
+                this.send(socket, { ack: seq, keyframe: true });
+                return;
+            }
+            this.frameCanvas.width = width;
+            this.frameCanvas.height = height;
+        }
+
+        // Decodificar todos los rectángulos en paralelo y dibujarlos juntos
+        const rects = [];
+        let offset = FRAME_HEADER_SIZE;
+        for (let i = 0; i < count; i++) {
+            const x = view.getUint16(offset, true);
+            const y = view.getUint16(offset + 2, true);
+            const length = view.getUint32(offset + 8, true);
+            offset += RECT_HEADER_SIZE;
+            rects.push({ x, y, blob: new Blob([new Uint8Array(buffer, offset, length)], { type: 'image/jpeg' }) });
+            offset += length;
+        }
+        const bitmaps = await Promise.all(rects.map((rect) => createImageBitmap(rect.blob)));
+        bitmaps.forEach((bitmap, index) => {
+            this.frameCtx.drawImage(bitmap, rects[index].x, rects[index].y);
+            bitmap.close();
+        });
+
+        this.area = area;
+        this.stats.frames++;
+        this.stats.bytes += buffer.byteLength;
+        this.client.canvas.redraw();
+
+        // Confirmar después de dibujar: así el servidor mide lo que el cliente realmente alcanza
+        this.send(socket, { ack: seq });
+    }
+
+    send(socket, message) {
+        if (socket && socket.readyState === WebSocket.OPEN) {
+            socket.send(JSON.stringify(message));
+        }
+    }
+}
@@ -43,8 +43,15 @@ export class TextCapture {
                 }
             }
 
-            // Evitar capturar otros shortcuts del sistema
-            if (e.ctrlKey || e.metaKey || e.altKey) return;
+            // Otras combinaciones de letra/número con modificadores van a /keys
+            if (e.ctrlKey || e.metaKey || e.altKey) {
+                const chord = this._buildChord(e, isMac);
+                if (chord) {
+                    this.client.api.sendKeys(chord);
+                    e.preventDefault();
+                }
+                return;
+            }
 
             // Evitar teclas de función
             if (['F1', 'F2', 'F3', 'F4', 'F5', 'F6', 'F7', 'F8', 'F9', 'F10', 'F11', 'F12'].includes(e.key)) return;
@@ -77,6 +84,18 @@ export class TextCapture {
             }
         });
 
+        // Pegar texto local (menú contextual, Shift+Insert): se escribe en el remoto
+        // como trabajo de escritura masiva, sin un request por carácter
+        document.addEventListener('paste', (e) => {
+            if (!this.client.connection.getConnectionStatus()) return;
+
+            const text = e.clipboardData ? e.clipboardData.getData('text') : '';
+            if (text) {
+                this.client.api.sendBulkText(text);
+                e.preventDefault();
+            }
+        });
+
         // Mantener el input oculto enfocado, pero solo si no se hace click en controles UI
         document.addEventListener('click', (e) => {
             if (!this.client.connection.getConnectionStatus()) return;
@@ -125,6 +144,28 @@ export class TextCapture {
         this.client.logger.log('🎯 Captura de texto global activada - escribe desde cualquier lugar', 'info');
     }
 
+    _buildChord(e, isMac) {
+        // Usar la tecla física para que Alt/Option no cambie el carácter (ej. Option+A = å)
+        let key = null;
+        const codeMatch = /^(?:Key|Digit)([A-Z0-9])$/.exec(e.code || '');
+        if (codeMatch) {
+            key = codeMatch[1].toLowerCase();
+        } else if (e.key.length === 1) {
+            key = e.key.toLowerCase();
+        }
+        if (!key) return null;
+
+        // 'primary' es Cmd/Ctrl según el sistema del servidor, igual que los shortcuts
+        const modifiers = [];
+        if (isMac ? e.metaKey : e.ctrlKey) modifiers.push('primary');
+        if (isMac && e.ctrlKey) modifiers.push('ctrl');
+        if (!isMac && e.metaKey) modifiers.push('cmd');
+        if (e.altKey) modifiers.push('alt');
+        if (e.shiftKey) modifiers.push('shift');
+
+        return [...modifiers, key].join('+');
+    }
+
     focusHiddenInputSafely() {
         // Guardar la posición actual del scroll
         const scrollX = window.scrollX;
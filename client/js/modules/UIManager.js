@@ -19,10 +19,18 @@ export class UIManager {
         this.mousePosition = document.getElementById('mousePosition');
         this.screenResolution = document.getElementById('screenResolution');
         this.precisionInfo = document.getElementById('precisionInfo');
+        this.latencyInfo = document.getElementById('latencyInfo');
         this.darkModeToggle = document.getElementById('darkModeToggle');
         this.hiddenTextInput = document.getElementById('hiddenTextInput');
         this.mouseTrackingToggle = document.getElementById('mouseTrackingToggle');
+        this.touchpadModeToggle = document.getElementById('touchpadModeToggle');
+        this.liveViewToggle = document.getElementById('liveViewToggle');
         this.testDragBtn = document.getElementById('testDragBtn');
+        this.clipboardPushBtn = document.getElementById('clipboardPushBtn');
+        this.clipboardPasteBtn = document.getElementById('clipboardPasteBtn');
+        this.clipboardPullBtn = document.getElementById('clipboardPullBtn');
+        this.fileUploadBtn = document.getElementById('fileUploadBtn');
+        this.fileUploadInput = document.getElementById('fileUploadInput');
     }
 
     initEventListeners() {
@@ -92,6 +100,42 @@ export class UIManager {
             this.client.darkMode.toggle();
         });
 
+        // Modo touchpad: eventos táctiles como desplazamientos relativos (passive: false para preventDefault)
+        this.client.canvas.canvas.addEventListener('touchstart', (e) => {
+            this.client.mouse.handleTouchStart(e);
+        }, { passive: false });
+
+        this.client.canvas.canvas.addEventListener('touchmove', (e) => {
+            this.client.mouse.handleTouchMove(e);
+        }, { passive: false });
+
+        this.client.canvas.canvas.addEventListener('touchend', (e) => {
+            this.client.mouse.handleTouchEnd(e);
+        }, { passive: false });
+
+        this.client.canvas.canvas.addEventListener('touchcancel', (e) => {
+            this.client.mouse.handleTouchEnd(e);
+        }, { passive: false });
+
+        this.touchpadModeToggle.addEventListener('change', (e) => {
+            const isEnabled = e.target.checked;
+            this.client.logger.log(`👆 Modo touchpad ${isEnabled ? 'activado (movimiento relativo)' : 'desactivado'}`, 'info');
+        });
+
+        // Vista en vivo de la pantalla remota
+        this.liveViewToggle.addEventListener('change', (e) => {
+            if (!this.client.connection.getConnectionStatus()) {
+                return; // Se abre al conectar
+            }
+            if (e.target.checked) {
+                this.client.screenView.open(this.client.connection.getServerURL());
+            } else {
+                this.client.screenView.close();
+                this.client.canvas.redraw();
+                this.client.logger.log('🎥 Vista en vivo desactivada', 'info');
+            }
+        });
+
         // Mouse tracking toggle
         this.mouseTrackingToggle.addEventListener('change', (e) => {
             const isEnabled = e.target.checked;
@@ -119,6 +163,31 @@ export class UIManager {
             this.testRealtimeDrag();
         });
 
+        // Portapapeles y archivos: el contenido no pasa por el teclado
+        const clipboardActions = [
+            [this.clipboardPushBtn, () => this.client.clipboard.push()],
+            [this.clipboardPasteBtn, () => this.client.clipboard.push(true)],
+            [this.clipboardPullBtn, () => this.client.clipboard.pull()],
+            [this.fileUploadBtn, () => this.fileUploadInput.click()]
+        ];
+        for (const [button, action] of clipboardActions) {
+            button.addEventListener('click', () => {
+                if (!this.client.connection.getConnectionStatus()) {
+                    this.client.logger.log('🚫 Portapapeles bloqueado - No conectado', 'warning');
+                    return;
+                }
+                action();
+            });
+        }
+
+        this.fileUploadInput.addEventListener('change', (e) => {
+            const file = e.target.files[0];
+            e.target.value = ''; // Permite volver a elegir el mismo archivo
+            if (file) {
+                this.client.files.upload(file);
+            }
+        });
+
         // Window resize event with debouncing
         let resizeTimeout;
         window.addEventListener('resize', () => {
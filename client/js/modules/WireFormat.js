@@ -0,0 +1,55 @@
+/**
+ * WireFormat - Codificación binaria compacta de eventos de puntero
+ * Espejo de server/wire_format.py: 16 bytes little-endian por evento
+ *
+ *   offset  tipo    campo
+ *   0       uint8   opcode (acción)
+ *   1       uint8   botón (0 left, 1 right, 2 middle)
+ *   2       int16   delta de scroll
+ *   4       uint32  número de secuencia
+ *   8       int32   x
+ *   12      int32   y
+ *
+ * En move_rel los campos x/y llevan el desplazamiento (dx, dy) en píxeles.
+ * En move/drag_move con TIMESTAMP_FLAG en el byte de botón, el int16 lleva los
+ * 16 bits bajos del instante de la muestra en ms (para el buffer de jitter)
+ */
+export const EVENT_SIZE = 16;
+
+export const OPCODES = {
+    move: 1,
+    click: 2,
+    drag_start: 3,
+    drag_move: 4,
+    drag_end: 5,
+    scroll: 6,
+    move_rel: 7
+};
+
+export const TIMESTAMP_FLAG = 0x80;
+
+const BUTTON_CODES = {
+    left: 0,
+    right: 1,
+    middle: 2
+};
+
+export function encodePointerEvent(action, seq, x, y, button = 'left', amount = 0, timestamp = null) {
+    const buffer = new ArrayBuffer(EVENT_SIZE);
+    const view = new DataView(buffer);
+
+    view.setUint8(0, OPCODES[action]);
+    if (timestamp !== null) {
+        // Solo move/drag_move: botón y scroll no se usan, el int16 lleva la marca de tiempo
+        view.setUint8(1, (BUTTON_CODES[button] || 0) | TIMESTAMP_FLAG);
+        view.setUint16(2, Math.round(timestamp) & 0xFFFF, true);
+    } else {
+        view.setUint8(1, BUTTON_CODES[button] || 0);
+        view.setInt16(2, Math.max(-32768, Math.min(32767, Math.round(amount))), true);
+    }
+    view.setUint32(4, seq >>> 0, true);
+    view.setInt32(8, Math.round(x), true);
+    view.setInt32(12, Math.round(y), true);
+
+    return buffer;
+}
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Validación del vocabulario de acciones de entrada (sin ejecutarlas)
+La usan el servidor antes de encolar y los procesos intermedios (fan-out y
+hub) antes de reenviar: una acción mal formada se rechaza donde entra, en
+lugar de llegar a un lote compartido que el destino rechazaría completo.
+Solo depende de tablas (teclas, perfiles, curvas), no del backend de entrada.
+"""
+
+import math
+
+from input_backends import MOUSE_BUTTONS
+from keymap import SHORTCUTS, SPECIAL_KEYS, KeySpecError, compile_sequence
+from latency_profiles import LATENCY_PROFILES
+from pointer_motion import ACCELERATION_CURVES
+
+# Vocabulario aceptado por /events y por los lotes del canal WebSocket
+MOUSE_ACTIONS = ('move', 'click', 'drag_start', 'drag_move', 'drag_end', 'drag', 'scroll', 'move_rel')
+
+# Mayor valor numérico aceptado en una acción (el rango int32 del formato binario)
+MAX_NUMBER = 2 ** 31
+
+# Pasos de scroll por evento: un amount enorme ocuparía el hilo despachador para todos
+MAX_SCROLL_AMOUNT = 100
+
+
+def is_number(value):
+    # 1e999 en JSON se parsea como inf: infinito y NaN no sirven como coordenada ni delta
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and abs(value) <= MAX_NUMBER)
+
+
+def key_sequence(data):
+    """Secuencia de combinaciones de una acción 'keys' como tupla (clave de la caché)"""
+    sequence = data.get('sequence')
+    if sequence is None:
+        sequence = [data.get('keys')]
+    if not isinstance(sequence, list) or not sequence:
+        raise KeySpecError('Se esperaba "keys" o una lista "sequence"')
+    return tuple(sequence)
+
+
+def validate_action(data, layout=None):
+    """Valida una acción sin ejecutarla. Retorna None si es válida o el mensaje de error.
+
+    Con ``layout`` también se verifica que el monitor indicado exista (el
+    fan-out y el hub no conocen los monitores de cada destino).
+    """
+    if not isinstance(data, dict):
+        return 'se esperaba un objeto JSON'
+    seq = data.get('seq')
+    if seq is not None and (not isinstance(seq, int) or isinstance(seq, bool)):
+        return 'seq debe ser un entero (número de secuencia del cliente)'
+
+    action = data.get('action', '')
+    if action == 'move_rel':
+        for field in ('dx', 'dy'):
+            if not is_number(data.get(field)):
+                return f'{field} debe ser numérico'
+        samples = data.get('samples', 1)
+        if not isinstance(samples, int) or isinstance(samples, bool) or samples < 1:
+            return 'samples debe ser un entero positivo'
+        if data.get('accel') is not None and data['accel'] not in ACCELERATION_CURVES:
+            return f"Curva de aceleración desconocida: {data['accel']}"
+    elif action in MOUSE_ACTIONS:
+        fields = ('x', 'y', 'to_x', 'to_y') if action == 'drag' else ('x', 'y')
+        for field in fields:
+            if field in data and not is_number(data[field]):
+                return f'{field} debe ser numérico'
+        if 't' in data and not is_number(data['t']):
+            return 't debe ser numérico (ms del cliente)'
+        if 'nx' in data or 'ny' in data:
+            for field in ('nx', 'ny'):
+                if not is_number(data.get(field)) or not 0 <= data[field] <= 1:
+                    return f'{field} debe ser un número entre 0 y 1'
+            if (layout is not None and data.get('monitor') is not None
+                    and not layout.has_monitor(data['monitor'])):
+                return f"Monitor desconocido: {data['monitor']}"
+        if data.get('button', 'left') not in MOUSE_BUTTONS:
+            return f"Botón no reconocido: {data.get('button')}"
+        if action == 'scroll' and not is_number(data.get('amount', 1)):
+            return 'amount debe ser numérico'
+    elif action == 'type':
+        text = data.get('text')
+        if not isinstance(text, str) or not text:
+            return 'No text provided'
+    elif action == 'special':
+        if data.get('key') not in SPECIAL_KEYS:
+            return 'Tecla especial no reconocida'
+    elif action == 'shortcut':
+        if data.get('shortcut') not in SHORTCUTS:
+            return 'Shortcut no reconocido'
+    elif action == 'keys':
+        try:
+            compile_sequence(key_sequence(data))
+        except (KeySpecError, TypeError) as e:
+            return str(e)
+    elif action == 'paste_text':
+        text = data.get('text')
+        if not isinstance(text, str) or not text:
+            return 'No text provided'
+        if data.get('keys') is not None:
+            try:
+                compile_sequence(key_sequence(data))
+            except (KeySpecError, TypeError) as e:
+                return str(e)
+    else:
+        return f'Acción no reconocida: {action}'
+
+    if 'profile' in data and data['profile'] not in LATENCY_PROFILES:
+        return f"Perfil de latencia desconocido: {data['profile']}"
+
+    return None
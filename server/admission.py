@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Control de admisión: cuota por cliente antes de hacer cualquier trabajo
+Un cliente que dispara eventos sin control (ej. drag_move a 500 Hz o un bucle
+sin pausa) no debe poder acaparar el servidor. Cada cliente (IP) tiene un
+token bucket: ``rate`` solicitudes por segundo con ráfagas de hasta ``burst``.
+La consulta se hace antes de leer el cuerpo del request, así rechazar con 429
+cuesta casi nada. Las colas acotadas del despachador (input_dispatcher.py)
+cubren lo que sí se admite.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_REQUEST_RATE = 300
+DEFAULT_REQUEST_BURST = 150
+
+# Clientes recordados; los inactivos más antiguos se olvidan primero
+MAX_CLIENTS = 4096
+
+
+class _Bucket:
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens, updated):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """Token bucket por cliente. ``allow(client)`` consume un token o retorna False"""
+
+    def __init__(self, rate=DEFAULT_REQUEST_RATE, burst=DEFAULT_REQUEST_BURST, max_clients=MAX_CLIENTS):
+        self.rate = float(rate)
+        self.burst = float(max(burst, 1))
+        self._max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            'rate': self.rate,
+            'burst': self.burst,
+            'allowed': 0,
+            'limited': 0,
+            'clients': 0
+        }
+
+    def allow(self, client, cost=1.0):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = _Bucket(self.burst, now)
+                if len(self._buckets) > self._max_clients:
+                    self._buckets.popitem(last=False)
+                self.stats['clients'] = len(self._buckets)
+            else:
+                self._buckets.move_to_end(client)
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+
+            if bucket.tokens >= cost:
+                bucket.tokens -= cost
+                self.stats['allowed'] += 1
+                return True
+            self.stats['limited'] += 1
+            return False
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP de producción sobre asyncio (solo librería estándar)
+Alternativa al servidor de desarrollo de Werkzeug (``app.run``): un solo hilo
+con un event loop atiende todas las conexiones, que se mantienen abiertas
+(HTTP/1.1 keep-alive) y tienen Nagle deshabilitado (TCP_NODELAY), así cada
+evento pequeño sale de inmediato sin esperar a juntarse con otros.
+
+Las rutas son las mismas funciones que usa la app Flask: reciben un request
+y retornan (respuesta, código HTTP). Deben ser rápidas y no bloquear (solo
+validan y encolan en el despachador).
+"""
+
+import asyncio
+import json
+import socket
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qsl
+
+# Tamaño máximo de la línea de request más los headers
+MAX_HEADER_SIZE = 64 * 1024
+
+# Tamaño máximo del cuerpo de un request
+MAX_BODY_SIZE = 1024 * 1024
+
+# El cuerpo de un request rechazado se descarta leyendo de a este tamaño
+SKIP_CHUNK_SIZE = 64 * 1024
+
+# Una conexión sin requests por este tiempo se cierra
+KEEP_ALIVE_TIMEOUT = 75.0
+
+# El navegador guarda la respuesta al preflight CORS por este tiempo
+CORS_MAX_AGE = 86400
+
+CORS_HEADERS = (
+    b'Access-Control-Allow-Origin: *\r\n'
+)
+
+_STATUS_LINES = {}
+
+
+def status_line(status_code):
+    """Línea de estado HTTP/1.1 (en caché por código)"""
+    line = _STATUS_LINES.get(status_code)
+    if line is None:
+        try:
+            reason = HTTPStatus(status_code).phrase
+        except ValueError:
+            reason = ''
+        line = f'HTTP/1.1 {status_code} {reason}\r\n'.encode('latin-1')
+        _STATUS_LINES[status_code] = line
+    return line
+
+
+class HTTPError(Exception):
+    """Request inválido: se responde con ``status_code`` y se cierra la conexión"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def body_length(headers):
+    """Largo del cuerpo según Content-Length (valida sin leer nada)"""
+    if 'transfer-encoding' in headers:
+        raise HTTPError(411, 'Se requiere Content-Length (sin chunked)')
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(400, 'Content-Length inválido') from None
+    if length < 0:
+        raise HTTPError(400, 'Content-Length inválido')
+    if length > MAX_BODY_SIZE:
+        raise HTTPError(413, f'Cuerpo demasiado grande (máximo {MAX_BODY_SIZE} bytes)')
+    return length
+
+
+class Headers(dict):
+    """Headers del request con nombres en minúscula (``get`` no distingue mayúsculas)"""
+
+    def get(self, key, default=None):
+        return dict.get(self, key.lower(), default)
+
+
+class HTTPRequest:
+    """Request HTTP ya leído completo.
+
+    Expone el mismo subconjunto de la API de ``flask.request`` que usan los
+    handlers (``headers``, ``args``, ``remote_addr``, ``mimetype``, ``get_data``, ``get_json``).
+    """
+
+    __slots__ = ('method', 'path', 'args', 'headers', 'body', 'remote_addr')
+
+    def __init__(self, method, path, args, headers, body, remote_addr=None):
+        self.method = method
+        self.path = path
+        self.args = args
+        self.headers = headers
+        self.body = body
+        self.remote_addr = remote_addr
+
+    @property
+    def mimetype(self):
+        return self.headers.get('content-type', '').split(';', 1)[0].strip().lower()
+
+    def get_data(self):
+        return self.body
+
+    def get_json(self, silent=False):
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            if silent:
+                return None
+            raise
+
+
+def parse_head(head):
+    """Parsea la línea de request y los headers. Retorna (método, target, versión, Headers)"""
+    try:
+        lines = head.decode('latin-1').split('\r\n')
+        method, target, version = lines[0].split(' ')
+    except (UnicodeDecodeError, ValueError):
+        raise HTTPError(400, 'Línea de request inválida') from None
+    if not version.startswith('HTTP/1.'):
+        raise HTTPError(505, f'Versión no soportada: {version}')
+
+    headers = Headers()
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, separator, value = line.partition(':')
+        if not separator:
+            raise HTTPError(400, 'Header inválido')
+        headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def wants_keep_alive(version, headers):
+    """HTTP/1.1 es persistente salvo 'Connection: close'; HTTP/1.0 solo con 'keep-alive'"""
+    connection = headers.get('connection', '').lower()
+    if version == 'HTTP/1.0':
+        return 'keep-alive' in connection
+    return 'close' not in connection
+
+
+class AsyncHTTPServer:
+    """Servidor HTTP/1.1 sobre asyncio con conexiones persistentes.
+
+    ``routes`` es un dict ``(método, ruta) -> handler(request)``; el handler
+    retorna ``(payload, código)`` donde ``payload`` es un dict (se envía como
+    JSON), un str (texto plano) o ``None`` (cuerpo vacío).
+
+    ``admit(request)`` (opcional) se consulta con los headers, antes de leer el
+    cuerpo: si retorna ``(payload, código)`` esa es la respuesta y el cuerpo se
+    descarta sin guardarlo.
+    """
+
+    def __init__(self, routes, host='0.0.0.0', port=5000, admit=None):
+        self._routes = routes
+        self._admit = admit
+        self._paths = {}
+        for method, path in routes:
+            self._paths.setdefault(path, set()).add(method)
+        self._address = (host, port)
+        self._server = None
+        self._idle = {}  # writer -> instante del último request
+        self.stats = {
+            'connections': 0,
+            'open_connections': 0,
+            'requests': 0,
+            'rejected': 0,
+            'errors': 0
+        }
+
+    def run(self):
+        """Atiende conexiones hasta que se interrumpa el proceso (bloquea)"""
+        asyncio.run(self.serve_forever())
+
+    async def serve_forever(self):
+        host, port = self._address
+        self._server = await asyncio.start_server(
+            self._handle_connection, host, port,
+            limit=MAX_HEADER_SIZE, reuse_address=True
+        )
+        sweeper = asyncio.ensure_future(self._close_idle_connections())
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            sweeper.cancel()
+
+    async def _close_idle_connections(self):
+        # Un barrido periódico en lugar de un timeout por request (asyncio.wait_for
+        # cuesta ~30 µs por lectura, más que parsear el request completo)
+        while True:
+            await asyncio.sleep(KEEP_ALIVE_TIMEOUT / 3)
+            deadline = time.monotonic() - KEEP_ALIVE_TIMEOUT
+            for writer, last_request in list(self._idle.items()):
+                if last_request < deadline:
+                    writer.close()
+
+    async def _handle_connection(self, reader, writer):
+        # Deshabilitar Nagle: los eventos pequeños se envían sin esperar
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        peer = writer.get_extra_info('peername')
+        remote_addr = peer[0] if peer else None
+
+        self.stats['connections'] += 1
+        self.stats['open_connections'] += 1
+        idle = self._idle
+        try:
+            keep_alive = True
+            while keep_alive:
+                idle[writer] = time.monotonic()
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break  # El cliente cerró la conexión (o se cerró por inactividad)
+                except asyncio.LimitOverrunError:
+                    writer.write(self._error_response(431, 'Headers demasiado grandes', False))
+                    break
+
+                try:
+                    method, target, version, headers = parse_head(head)
+                    keep_alive = wants_keep_alive(version, headers)
+                    length = body_length(headers)
+                except HTTPError as e:
+                    writer.write(self._error_response(e.status_code, str(e), False))
+                    break
+
+                path, _, query = target.partition('?')
+                request = HTTPRequest(method, path, dict(parse_qsl(query)) if query else {},
+                                      headers, b'', remote_addr)
+                rejected = self._admit(request) if self._admit is not None else None
+                if rejected is not None:
+                    # Rechazado con solo los headers: el cuerpo se salta sin guardarlo
+                    self.stats['rejected'] += 1
+                    await self._skip_body(reader, length)
+                    payload, status_code = rejected
+                    writer.write(self._response(status_code, payload, keep_alive))
+                else:
+                    if length:
+                        request.body = await reader.readexactly(length)
+                    writer.write(self._dispatch(request, keep_alive))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            idle.pop(writer, None)
+            self.stats['open_connections'] -= 1
+            writer.close()
+
+    async def _skip_body(self, reader, length):
+        # Consumir el cuerpo mantiene la conexión utilizable para el siguiente request
+        while length > 0:
+            chunk = await reader.read(min(length, SKIP_CHUNK_SIZE))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b'', length)
+            length -= len(chunk)
+
+    def _dispatch(self, request, keep_alive):
+        """Ejecuta el handler de la ruta y arma la respuesta completa en bytes"""
+        self.stats['requests'] += 1
+        methods = self._paths.get(request.path)
+        if methods is None:
+            return self._error_response(404, f'Ruta no encontrada: {request.path}', keep_alive)
+        if request.method == 'OPTIONS':
+            return self._preflight_response(request, methods, keep_alive)
+
+        handler = self._routes.get((request.method, request.path))
+        if handler is None:
+            return self._error_response(405, f'Método no permitido: {request.method}', keep_alive)
+
+        try:
+            payload, status_code = handler(request)
+        except Exception as e:
+            self.stats['errors'] += 1
+            return self._error_response(500, str(e), keep_alive)
+        return self._response(status_code, payload, keep_alive)
+
+    def _response(self, status_code, payload, keep_alive, extra_headers=b''):
+        if payload is None:
+            body, content_type = b'', b''
+        elif isinstance(payload, str):
+            body, content_type = payload.encode(), b'Content-Type: text/plain; charset=utf-8\r\n'
+        else:
+            body, content_type = json.dumps(payload).encode(), b'Content-Type: application/json\r\n'
+        return b''.join((
+            status_line(status_code),
+            content_type,
+            b'Content-Length: %d\r\n' % len(body),
+            b'Connection: keep-alive\r\n' if keep_alive else b'Connection: close\r\n',
+            CORS_HEADERS,
+            extra_headers,
+            b'\r\n',
+            body
+        ))
+
+    def _error_response(self, status_code, message, keep_alive):
+        return self._response(status_code, {'status': 'error', 'message': message}, keep_alive)
+
+    def _preflight_response(self, request, methods, keep_alive):
+        # Preflight CORS del navegador (ej. POST con Content-Type: application/json)
+        allow_headers = request.headers.get('access-control-request-headers', 'Content-Type')
+        extra_headers = (
+            f"Access-Control-Allow-Methods: {', '.join(sorted(methods | {'OPTIONS'}))}\r\n"
+            f'Access-Control-Allow-Headers: {allow_headers}\r\n'
+            f'Access-Control-Max-Age: {CORS_MAX_AGE}\r\n'
+        ).encode('latin-1')
+        return self._response(204, None, keep_alive, extra_headers)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Portapapeles compartido: leer y escribir el portapapeles remoto sin teclear
+``/shortcut`` copy/paste solo presiona Ctrl/Cmd+C/V en la máquina remota; para
+mover contenido entre el controlador y el destino había que escribirlo con
+``/type``. Aquí el contenido viaja directo al portapapeles del backend:
+
+- Cada contenido se identifica por su sha256 (ETag): un cliente que ya tiene esa
+  versión recibe 304 sin cuerpo, y escribir lo mismo que ya está no toca nada.
+- Se transfiere por trozos de CHUNK_SIZE en ambos sentidos, con un máximo de
+  ``max_bytes``. Las imágenes (solo lectura, con Pillow) se codifican a PNG en un
+  archivo temporal que pasa a disco sobre SPOOL_LIMIT, así la memoria no crece
+  con el tamaño de la imagen codificada.
+"""
+
+import codecs
+import hashlib
+import tempfile
+import threading
+
+try:
+    from PIL import ImageGrab
+except ImportError:  # Pillow es opcional: sin él solo se sincroniza texto
+    ImageGrab = None
+
+CHUNK_SIZE = 64 * 1024
+
+# Tamaño máximo del contenido (texto recibido o imagen enviada)
+MAX_CLIPBOARD_BYTES = 16 * 1024 * 1024
+
+# Las imágenes codificadas quedan en memoria hasta este tamaño y luego en disco
+SPOOL_LIMIT = 1024 * 1024
+
+TEXT_CONTENT_TYPE = 'text/plain; charset=utf-8'
+IMAGE_CONTENT_TYPE = 'image/png'
+
+
+class ClipboardTooLarge(Exception):
+    """El contenido supera el máximo configurado"""
+
+
+class ClipboardContent:
+    """Contenido del portapapeles listo para enviarse por trozos"""
+    __slots__ = ('content_type', 'etag', 'size', '_data', '_file')
+
+    def __init__(self, content_type, etag, size, data=None, file=None):
+        self.content_type = content_type
+        self.etag = etag
+        self.size = size
+        self._data = data
+        self._file = file
+
+    def chunks(self):
+        """Genera el contenido en trozos de CHUNK_SIZE (cierra el archivo temporal al final)"""
+        if self._file is None:
+            view = memoryview(self._data)
+            for offset in range(0, self.size, CHUNK_SIZE):
+                yield bytes(view[offset:offset + CHUNK_SIZE])
+            return
+        try:
+            self._file.seek(0)
+            while True:
+                chunk = self._file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _HashingWriter:
+    """Archivo que calcula el sha256 de lo que se escribe (para codificar PNG sin copias)"""
+
+    def __init__(self, target, max_bytes):
+        self.target = target
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self._max_bytes = max_bytes
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self._max_bytes:
+            raise ClipboardTooLarge(f'Imagen demasiado grande (máximo {self._max_bytes} bytes)')
+        self.digest.update(data)
+        return self.target.write(data)
+
+    def flush(self):
+        self.target.flush()
+
+
+class ClipboardSync:
+    """Lectura y escritura del portapapeles del backend con deduplicación por hash.
+
+    ``read_images=False`` desactiva la lectura de imágenes del sistema (ej. backend nulo).
+    """
+
+    def __init__(self, backend, max_bytes=MAX_CLIPBOARD_BYTES, read_images=True):
+        self._backend = backend
+        self.max_bytes = max_bytes
+        self._read_images = read_images and ImageGrab is not None
+        self._lock = threading.Lock()
+        self._cached = (None, None)  # (texto, etag): evita re-hashear el mismo texto
+        self.stats = {
+            'reads': 0,
+            'not_modified': 0,
+            'writes': 0,
+            'unchanged': 0,
+            'bytes_in': 0,
+            'bytes_out': 0
+        }
+
+    @property
+    def available(self):
+        return self._backend.has_clipboard
+
+    def _text_etag(self, text, data):
+        cached_text, cached_etag = self._cached
+        if cached_text is not None and cached_text == text:
+            return cached_etag
+        etag = hashlib.sha256(data).hexdigest()
+        self._cached = (text, etag)
+        return etag
+
+    def read(self, known_etag=None):
+        """Contenido actual, o None si es igual a ``known_etag`` (el cliente ya lo tiene).
+
+        Primero el texto del backend; si está vacío, una imagen (Pillow, si la plataforma
+        permite leerla). Lanza ClipboardUnavailable o ClipboardTooLarge.
+        """
+        with self._lock:
+            text = self._backend.clipboard_get() or ''
+            if text or not self._read_images:
+                data = text.encode('utf-8')
+                etag = self._text_etag(text, data)
+                content = ClipboardContent(TEXT_CONTENT_TYPE, etag, len(data), data=data)
+            else:
+                content = self._read_image()
+        if content is None:
+            content = ClipboardContent(TEXT_CONTENT_TYPE, self._text_etag('', b''), 0, data=b'')
+
+        self.stats['reads'] += 1
+        if known_etag is not None and known_etag == content.etag:
+            content.close()
+            self.stats['not_modified'] += 1
+            return None
+        self.stats['bytes_out'] += content.size
+        return content
+
+    def _read_image(self):
+        try:
+            image = ImageGrab.grabclipboard()
+        except (OSError, NotImplementedError):
+            return None  # Ej. Linux sin xclip/wl-paste
+        if image is None or isinstance(image, list):
+            return None  # Sin imagen, o una lista de archivos copiados
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_LIMIT)
+        writer = _HashingWriter(spool, self.max_bytes)
+        try:
+            image.save(writer, format='PNG')
+        except BaseException:
+            spool.close()
+            raise
+        return ClipboardContent(IMAGE_CONTENT_TYPE, writer.digest.hexdigest(), writer.size, file=spool)
+
+    def write(self, stream, expected_hash=None):
+        """Escribe en el portapapeles un texto UTF-8 leído por trozos de ``stream``.
+
+        Retorna ``(etag, cambió)``. Lanza ClipboardTooLarge, ValueError (UTF-8
+        inválido o hash distinto de ``expected_hash``) o ClipboardUnavailable.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        digest = hashlib.sha256()
+        parts = []
+        size = 0
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ClipboardTooLarge(f'Contenido demasiado grande (máximo {self.max_bytes} bytes)')
+                digest.update(chunk)
+                parts.append(decoder.decode(chunk))
+            parts.append(decoder.decode(b'', final=True))
+        except UnicodeDecodeError as e:
+            raise ValueError(f'El contenido no es UTF-8 válido: {e}') from e
+
+        etag = digest.hexdigest()
+        if expected_hash is not None and expected_hash.lower() != etag:
+            raise ValueError('El sha256 del contenido no coincide con el indicado')
+        text = ''.join(parts)
+        del parts
+
+        self.stats['bytes_in'] += size
+        with self._lock:
+            if self._backend.clipboard_get() == text:
+                self.stats['unchanged'] += 1
+                return etag, False
+            self._backend.clipboard_set(text)
+            self._cached = (text, etag)
+        self.stats['writes'] += 1
+        return etag, True
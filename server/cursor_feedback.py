@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Canal de retorno: posición real del cursor y confirmación de lo ya aplicado
+Los eventos de alta frecuencia (move, drag_move, scroll) son fire-and-forget,
+así que el cliente no sabe si llegaron ni dónde quedó realmente el cursor. Cada
+cliente suscrito recibe, a lo sumo PUSH_RATE veces por segundo y solo cuando
+algo cambió, un mensaje con la posición del cursor y el último número de
+secuencia suyo que el despachador ya ejecutó:
+
+    {"type": "feedback", "x": 812, "y": 430, "seq": 1532, "age_ms": 4.1}
+
+``age_ms`` es el tiempo entre la ejecución de ``seq`` y el envío del mensaje:
+restándolo, el cliente mide el RTT real sin el retardo propio de este canal.
+Los números de secuencia los pone el cliente (campo ``seq`` de las acciones
+JSON o el del formato binario) y son propios de cada conexión.
+"""
+
+import json
+import threading
+import time
+
+from udp_listener import is_newer
+
+# Mensajes por segundo como máximo para cada cliente
+PUSH_RATE = 30
+
+
+class _Subscriber:
+    """Cliente suscrito y lo último que se le envió"""
+    __slots__ = ('send', 'last_state')
+
+    def __init__(self, send):
+        self.send = send
+        self.last_state = None
+
+
+class CursorFeedback:
+    """Junta lo que aplica el despachador y lo empuja a los clientes suscritos.
+
+    ``read_position()`` retorna la posición real del cursor o None. El despachador
+    llama ``applied(source, data)`` después de cada acción; un hilo propio lee el
+    cursor una vez por tick y envía las novedades con el ``send(texto)`` de cada
+    suscriptor (que debe ser seguro entre hilos).
+    """
+
+    def __init__(self, read_position, rate=PUSH_RATE):
+        self._read_position = read_position
+        self._interval = 1.0 / rate
+        self._subscribers = {}  # cliente -> _Subscriber
+        self._acks = {}  # cliente -> (última secuencia aplicada, instante de aplicación)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+        self.stats = {
+            'rate': rate,
+            'subscribers': 0,
+            'pushed': 0,
+            'errors': 0
+        }
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='cursor-feedback', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def subscribe(self, source, send):
+        with self._lock:
+            self._subscribers[source] = _Subscriber(send)
+            self.stats['subscribers'] = len(self._subscribers)
+        self._wakeup.set()
+
+    def unsubscribe(self, source):
+        with self._lock:
+            self._subscribers.pop(source, None)
+            self._acks.pop(source, None)
+            self.stats['subscribers'] = len(self._subscribers)
+
+    def applied(self, source, data):
+        """Registra la secuencia de una acción ejecutada (corre en el hilo despachador)"""
+        seq = data.get('seq')
+        if seq is None or source not in self._subscribers:
+            return
+        last = self._acks.get(source)
+        # Las teclas van por el carril prioritario y pueden adelantarse: se guarda la mayor
+        if last is None or is_newer(seq, last[0]):
+            self._acks[source] = (seq, time.perf_counter())
+
+    def _run(self):
+        while self._running:
+            if not self._subscribers:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            started = time.perf_counter()
+            self._push()
+            # Se sigue leyendo el cursor aunque no lleguen acciones: también lo mueve el usuario local
+            time.sleep(max(0.0, self._interval - (time.perf_counter() - started)))
+
+    def _push(self):
+        try:
+            position = self._read_position()
+        except Exception:
+            position = None
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+
+        now = time.perf_counter()
+        for source, subscriber in subscribers:
+            ack = self._acks.get(source)
+            state = (position, ack[0] if ack else None)
+            if state == subscriber.last_state:
+                continue  # Nada nuevo para este cliente
+            message = {'type': 'feedback'}
+            if position is not None:
+                message['x'], message['y'] = position
+            if ack is not None:
+                message['seq'] = ack[0]
+                message['age_ms'] = round((now - ack[1]) * 1000, 1)
+            try:
+                subscriber.send(json.dumps(message))
+            except Exception:
+                # Conexión cerrada: el handler del WebSocket también lo quita al salir
+                self.stats['errors'] += 1
+                self.unsubscribe(source)
+                continue
+            subscriber.last_state = state
+            self.stats['pushed'] += 1
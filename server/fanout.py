@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Fan-out de entrada - Un cliente controla varios computadores a la vez
+Para laboratorios con máquinas idénticas o demostraciones en clase: el
+cliente web se conecta a este proceso como si fuera un servidor normal y cada
+acción se replica en todos los destinos.
+
+Cada destino tiene su propia cola y conexiones persistentes (ver upstream.py):
+el request del cliente responde apenas la acción queda encolada, así que
+replicar a 20 máquinas cuesta lo mismo que a una, y un destino lento o caído
+no atrasa a los demás. ``/status`` muestra el estado de cada destino y el
+desfase (skew) entre el primero y el último en aplicar cada acción.
+
+Uso:
+    python3 fanout.py --target 192.168.1.21 --target 192.168.1.22:5000
+    python3 fanout.py --targets-file laboratorio.txt --port 5000
+"""
+
+import argparse
+import asyncio
+import time
+from collections import OrderedDict
+
+from action_schema import validate_action
+from async_server import AsyncHTTPServer
+from latency_profiles import LATENCY_PROFILES
+from upstream import (BINARY_CONTENT_TYPE, FORWARDED_ENDPOINTS, KEYBOARD_ENDPOINTS, UpstreamTarget,
+                      parse_target)
+from wire_format import WireFormatError, decode_events
+
+# Entradas recientes cuyo desfase entre destinos se sigue midiendo
+SKEW_WINDOW = 1024
+
+# Cada cuánto se consulta /screen a los destinos (también sirve de chequeo de salud)
+SCREEN_REFRESH = 5.0
+
+
+class SkewTracker:
+    """Desfase entre el primer y el último destino en confirmar cada entrada"""
+
+    def __init__(self):
+        self._pending = OrderedDict()  # seq -> [primera confirmación, ids que confirmaron]
+        self.stats = {
+            'samples': 0,
+            'last_ms': None,
+            'avg_ms': None,
+            'max_ms': 0.0
+        }
+
+    def delivered(self, target_id, seq, delivered_at, target_count):
+        entry = self._pending.get(seq)
+        if entry is None:
+            entry = self._pending[seq] = [delivered_at, set()]
+            if len(self._pending) > SKEW_WINDOW:
+                self._pending.popitem(last=False)  # Nunca llegó a todos (destino caído o fusionado)
+        entry[1].add(target_id)
+        if len(entry[1]) < target_count:
+            return
+
+        del self._pending[seq]
+        skew = (delivered_at - entry[0]) * 1000
+        stats = self.stats
+        stats['samples'] += 1
+        stats['last_ms'] = round(skew, 2)
+        stats['avg_ms'] = round(skew if stats['avg_ms'] is None else stats['avg_ms'] + (skew - stats['avg_ms']) / 16, 2)
+        stats['max_ms'] = round(max(stats['max_ms'], skew), 2)
+
+
+class FanOut:
+    """Replica cada acción recibida en todos los destinos"""
+
+    def __init__(self, addresses):
+        self._addresses = addresses
+        self.targets = []
+        self.skew = SkewTracker()
+        self.screen = None
+        self.geometry_mismatch = []
+        self._seq = 0
+        self.http = None
+        self.stats = {
+            'accepted': 0,
+            'rejected': 0,
+            'partial': 0,
+            'invalid': 0
+        }
+
+    def start(self):
+        """Crea los destinos y sus tareas (dentro del event loop)"""
+        for index, (host, port) in enumerate(self._addresses, start=1):
+            target = UpstreamTarget(f'target-{index}', host, port, on_delivered=self._delivered)
+            target.start()
+            self.targets.append(target)
+        asyncio.ensure_future(self._refresh_screens())
+
+    def _delivered(self, target, seq, delivered_at):
+        # Solo cuentan los destinos conectados: uno caído no deja la medición esperando
+        connected = sum(1 for other in self.targets if other.connected)
+        self.skew.delivered(target.id, seq, delivered_at, connected)
+
+    def broadcast(self, entries, profile=None):
+        """Encola ``[(tipo, datos), ...]`` en cada destino con lugar para todas.
+
+        Cada destino recibe todas las entradas o ninguna. Un destino con la cola
+        llena (ej. caído hace rato) queda fuera sin frenar a los demás. Retorna
+        (cuántos destinos las aceptaron, ids de los que quedaron fuera).
+        """
+        self._seq += 1
+        now = time.perf_counter()
+        accepted, skipped = 0, []
+        for target in self.targets:
+            if not target.has_room(len(entries)):
+                target.stats['rejected'] += 1
+                skipped.append(target.id)
+                continue
+            for kind, data in entries:
+                target.enqueue(kind, data, profile, self._seq, now)
+            accepted += 1
+        self.stats['accepted' if accepted else 'rejected'] += 1
+        if skipped:
+            self.stats['partial'] += 1
+        return accepted, skipped
+
+    async def _refresh_screens(self):
+        while True:
+            results = await asyncio.gather(*(target.refresh_screen() for target in self.targets))
+            screens = {target.id: screen for target, screen in zip(self.targets, results) if screen is not None}
+            if screens:
+                # El primer destino que responde es la referencia del canvas del cliente
+                reference = next(iter(screens.values()))
+                self.screen = reference
+                self.geometry_mismatch = [target_id for target_id, screen in screens.items() if screen != reference]
+            # Hasta tener una geometría de referencia se reintenta más seguido
+            await asyncio.sleep(SCREEN_REFRESH if self.screen is not None else SCREEN_REFRESH / 10)
+
+    # ------------------------------------------------------------------
+    # Rutas (mismas firmas que los handlers de server.py)
+    # ------------------------------------------------------------------
+
+    def _accepted_response(self, delivery):
+        accepted, skipped = delivery
+        if not accepted:
+            return {'status': 'error', 'message': 'Ningún destino aceptó la acción (colas llenas)'}, 503
+        result = {'status': 'success', 'targets': accepted}
+        if skipped:
+            result['skipped'] = skipped  # Entrega parcial: estos destinos tenían la cola llena
+        return result, 200
+
+    def _invalid(self, message):
+        self.stats['invalid'] += 1
+        return {'status': 'error', 'message': message}, 400
+
+    def _validated(self, entries, profile):
+        """Respuesta 400 si el perfil o alguna entrada no es válida, o None.
+
+        Se valida aquí, antes de encolar: una acción mal formada dentro de un /events
+        compartido haría que el destino rechace la tanda completa, con la entrada
+        válida de otros requests.
+        """
+        if profile is not None and profile not in LATENCY_PROFILES:
+            return self._invalid(f'Perfil de latencia desconocido: {profile}')
+        for kind, data in entries:
+            if kind == 'binary':
+                try:
+                    decode_events(data)
+                except WireFormatError as e:
+                    return self._invalid(str(e))
+                continue
+            error = validate_action(data)
+            if error is not None:
+                return self._invalid(error)
+        return None
+
+    def _broadcast_response(self, entries, profile):
+        return self._validated(entries, profile) or self._accepted_response(self.broadcast(entries, profile))
+
+    def ping_response(self, req):
+        return {'status': 'pong'}, 200
+
+    def status_response(self, req):
+        return {
+            'status': 'online',
+            'server': 'MultiComputer Fan-out',
+            'targets': [target.to_dict() for target in self.targets],
+            'connected': sum(1 for target in self.targets if target.connected),
+            'skew': self.skew.stats,
+            'geometry_mismatch': self.geometry_mismatch,
+            'fanout': self.stats,
+            'http': self.http.stats if self.http is not None else None,
+            'uptime': time.time()
+        }, 200
+
+    def screen_response(self, req):
+        if self.screen is None:
+            return {'status': 'error', 'message': 'Ningún destino respondió todavía'}, 503
+        return {'status': 'success', 'screen': self.screen, 'targets': len(self.targets)}, 200
+
+    def mouse_response(self, req):
+        profile = req.headers.get('X-Latency-Profile')
+        if req.mimetype == BINARY_CONTENT_TYPE:
+            return self._broadcast_response([('binary', req.get_data())], profile)
+        data = req.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('action'), str):
+            return {'status': 'error', 'message': 'Se esperaba una acción JSON'}, 400
+        return self._broadcast_response([('action', data)], profile)
+
+    def events_response(self, req):
+        profile = req.headers.get('X-Latency-Profile')
+        if req.mimetype == BINARY_CONTENT_TYPE:
+            return self._broadcast_response([('binary', req.get_data())], profile)
+        data = req.get_json(silent=True)
+        events = data.get('events') if isinstance(data, dict) else data
+        if not isinstance(events, list) or not all(isinstance(event, dict) for event in events):
+            return {'status': 'error', 'message': 'Se esperaba una lista de eventos'}, 400
+        return self._broadcast_response([('action', event) for event in events], profile)
+
+    def keyboard_route(self, action):
+        def handler(req):
+            data = req.get_json(silent=True)
+            data = dict(data) if isinstance(data, dict) else {}
+            data['action'] = action
+            return self._broadcast_response([('action', data)], req.headers.get('X-Latency-Profile'))
+        return handler
+
+    def forward_route(self, path):
+        def handler(req):
+            request = ('POST', path, req.get_data(), req.headers.get('content-type', 'application/json'))
+            accepted, skipped = self.broadcast([('request', request)])
+            if not accepted:
+                return self._accepted_response((accepted, skipped))
+            # Los destinos responden cada uno por su lado: el resultado se ve en /status
+            result = {'status': 'success', 'message': 'Reenviado a los destinos', 'targets': accepted}
+            if skipped:
+                result['skipped'] = skipped
+            return result, 202
+        return handler
+
+    def routes(self):
+        routes = {
+            ('GET', '/ping'): self.ping_response,
+            ('GET', '/status'): self.status_response,
+            ('GET', '/screen'): self.screen_response,
+            ('POST', '/mouse'): self.mouse_response,
+            ('POST', '/events'): self.events_response
+        }
+        for path, action in KEYBOARD_ENDPOINTS.items():
+            routes[('POST', path)] = self.keyboard_route(action)
+        for path in FORWARDED_ENDPOINTS:
+            routes[('POST', path)] = self.forward_route(path)
+        return routes
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='MultiComputer Fan-out: replica la entrada en varios servidores')
+    parser.add_argument('--target', action='append', default=[], metavar='HOST[:PUERTO]',
+                        help='Servidor destino (repetir por cada máquina; puerto por defecto 5000)')
+    parser.add_argument('--targets-file', metavar='ARCHIVO', default=None,
+                        help='Archivo con un destino HOST[:PUERTO] por línea (# para comentarios)')
+    parser.add_argument('--port', type=int, default=5000, help='Puerto HTTP para el cliente (default: 5000)')
+    return parser.parse_args(argv)
+
+
+def load_targets(args):
+    specs = list(args.target)
+    if args.targets_file:
+        with open(args.targets_file, encoding='utf-8') as targets_file:
+            specs += [line.split('#', 1)[0].strip() for line in targets_file]
+    return [parse_target(spec) for spec in specs if spec]
+
+
+async def serve(fanout, port):
+    fanout.start()
+    fanout.http = AsyncHTTPServer(fanout.routes(), port=port)
+    await fanout.http.serve_forever()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    addresses = load_targets(args)
+    if not addresses:
+        raise SystemExit('❌ Indica al menos un destino con --target o --targets-file')
+
+    print("=" * 80)
+    print("📡 MultiComputer Fan-out - un cliente, varios computadores")
+    print("=" * 80)
+    print(f"🌐 Escuchando en el puerto {args.port} (conecta el cliente aquí)")
+    print(f"🖥️  {len(addresses)} destinos:")
+    for host, port in addresses:
+        print(f"   • {host}:{port}")
+    print("📊 Estado de cada destino y desfase en /status")
+    print("=" * 80)
+
+    try:
+        asyncio.run(serve(FanOut(addresses), args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Fan-out detenido correctamente")
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Transferencia de archivos hacia y desde la máquina controlada (/files)
+Hasta ahora el único canal hacia el destino eran teclas simuladas. Aquí los
+archivos van directo a disco, por trozos de CHUNK_SIZE y sin cargar nunca el
+archivo completo en memoria:
+
+- Subida (PUT): se escribe en ``<nombre>.part`` y se renombra al terminar. Con
+  ``Content-Range: bytes INICIO-FIN/TOTAL`` una subida cortada continúa desde lo
+  que ya llegó (``HEAD`` informa el offset en ``X-Upload-Offset``). El sha256 se
+  calcula a medida que llegan los trozos y el estado se conserva entre reanudaciones;
+  si el cliente indica ``X-Content-SHA256`` y no coincide, el archivo se descarta.
+- Descarga (GET): por trozos, con ``Range`` para continuar una descarga cortada.
+
+Los handlers corren en los hilos de request de Werkzeug; la E/S de disco y
+sha256 liberan el GIL, así que una transferencia no frena al despachador.
+"""
+
+import hashlib
+import os
+import re
+import threading
+
+CHUNK_SIZE = 256 * 1024
+
+PARTIAL_SUFFIX = '.part'
+
+# Nombres simples: sin rutas, sin ocultos y sin el sufijo de las subidas parciales
+FILE_NAME = re.compile(r'^[\w][\w.\- ()]{0,254}$')
+
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class TransferError(Exception):
+    """Error de transferencia con su código HTTP y datos extra para la respuesta"""
+
+    def __init__(self, status_code, message, **extra):
+        super().__init__(message)
+        self.status_code = status_code
+        self.extra = extra
+
+    def to_response(self):
+        return dict({'status': 'error', 'message': str(self)}, **self.extra), self.status_code
+
+
+def parse_content_range(value):
+    """``bytes INICIO-FIN/TOTAL`` -> (inicio, fin, total o None)"""
+    match = CONTENT_RANGE.match(value.strip())
+    if match is None:
+        raise TransferError(400, f'Content-Range inválido: {value}')
+    start, end = int(match.group(1)), int(match.group(2))
+    total = None if match.group(3) == '*' else int(match.group(3))
+    if end < start or (total is not None and end >= total):
+        raise TransferError(400, f'Content-Range inválido: {value}')
+    return start, end, total
+
+
+def parse_range(value, size):
+    """``Range: bytes=INICIO-FIN`` (un solo rango) -> (inicio, fin) dentro de ``size``"""
+    match = RANGE.match(value.strip())
+    if match is None or match.group(1) == match.group(2) == '':
+        raise TransferError(416, f'Range no soportado: {value}', size=size)
+    if match.group(1) == '':
+        # Sufijo: los últimos N bytes
+        start, end = max(0, size - int(match.group(2))), size - 1
+    else:
+        start = int(match.group(1))
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+    if start >= size or end < start:
+        raise TransferError(416, f'Range fuera del archivo ({size} bytes)', size=size)
+    return start, end
+
+
+def file_digest(path, chunk_size=CHUNK_SIZE, length=None):
+    """sha256 de los primeros ``length`` bytes (o de todo) leyendo por trozos"""
+    digest = hashlib.sha256()
+    remaining = length
+    with open(path, 'rb') as source:
+        while remaining is None or remaining > 0:
+            chunk = source.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest
+
+
+class FileTransfers:
+    """Subidas reanudables y descargas por rangos dentro de ``directory``.
+
+    El directorio se crea recién con la primera subida: construir el objeto (al
+    importar server.py) no escribe en disco, y las consultas no lo crean.
+    """
+
+    def __init__(self, directory, chunk_size=CHUNK_SIZE):
+        self.directory = os.path.abspath(directory)
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._active = set()  # Nombres con una subida en curso
+        self._digests = {}  # nombre -> (offset, sha256 parcial) para reanudar sin releer
+        self._hashes = {}  # ruta -> (tamaño, mtime_ns, sha256) de archivos completos
+        self.stats = {
+            'uploads': 0,
+            'resumed': 0,
+            'interrupted': 0,
+            'checksum_errors': 0,
+            'downloads': 0,
+            'bytes_in': 0,
+            'bytes_out': 0
+        }
+
+    def path_for(self, name):
+        if not FILE_NAME.match(name) or name.endswith(PARTIAL_SUFFIX):
+            raise TransferError(400, f'Nombre de archivo no permitido: {name}')
+        return os.path.join(self.directory, name)
+
+    # ------------------------------------------------------------------
+    # Subida
+    # ------------------------------------------------------------------
+
+    def upload(self, name, stream, content_range=None, expected_hash=None):
+        """Escribe ``stream`` en el archivo por trozos; retorna (respuesta, código HTTP).
+
+        Sin ``content_range`` el cuerpo es el archivo completo. Con él, el cuerpo
+        continúa la subida parcial y debe empezar justo donde quedó.
+        """
+        path = self.path_for(name)
+        partial = path + PARTIAL_SUFFIX
+        start, total = 0, None
+        if content_range:
+            start, _, total = parse_content_range(content_range)
+
+        with self._lock:
+            if name in self._active:
+                raise TransferError(409, f'Ya hay una subida en curso de {name}')
+            self._active.add(name)
+        try:
+            # En cada subida (es barato): el directorio pudo borrarse con el servidor andando
+            os.makedirs(self.directory, exist_ok=True)
+            offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+            if start == 0:
+                digest = hashlib.sha256()
+                mode = 'wb'
+            elif start != offset:
+                raise TransferError(416, f'La subida debe continuar desde el byte {offset}', offset=offset)
+            else:
+                digest = self._resume_digest(name, partial, offset)
+                mode = 'ab'
+                self.stats['resumed'] += 1
+
+            offset = start + self._receive(name, stream, partial, mode, start, total, digest)
+            if total is not None and offset < total:
+                # Subida por tramos: el cliente envía el siguiente desde offset
+                return {'status': 'partial', 'name': name, 'offset': offset, 'total': total}, 202
+            return self._complete(name, path, partial, offset, digest, expected_hash)
+        finally:
+            with self._lock:
+                self._active.discard(name)
+
+    def _receive(self, name, stream, partial, mode, start, total, digest):
+        received = 0
+        try:
+            with open(partial, mode) as target:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    if total is not None and start + received + len(chunk) > total:
+                        raise TransferError(400, f'Se recibieron más bytes que el total indicado ({total})')
+                    target.write(chunk)
+                    digest.update(chunk)
+                    received += len(chunk)
+        except Exception:
+            self.stats['interrupted'] += 1
+            raise
+        finally:
+            # Lo escrito queda en el .part: la próxima reanudación sigue con este estado
+            self._digests[name] = (start + received, digest)
+            self.stats['bytes_in'] += received
+        return received
+
+    def _resume_digest(self, name, partial, offset):
+        state = self._digests.get(name)
+        if state is not None and state[0] == offset:
+            return state[1].copy()
+        # Servidor reiniciado (o estado desfasado): se recalcula desde el disco
+        return file_digest(partial, self.chunk_size, offset)
+
+    def _complete(self, name, path, partial, size, digest, expected_hash):
+        self._digests.pop(name, None)
+        sha256 = digest.hexdigest()
+        if expected_hash and expected_hash.strip().lower() != sha256:
+            os.remove(partial)
+            self.stats['checksum_errors'] += 1
+            raise TransferError(422, 'El sha256 no coincide: el archivo se descartó', sha256=sha256)
+        os.replace(partial, path)
+        stat = os.stat(path)
+        self._hashes[path] = (stat.st_size, stat.st_mtime_ns, sha256)
+        self.stats['uploads'] += 1
+        return {'status': 'success', 'name': name, 'size': size, 'sha256': sha256}, 201
+
+    # ------------------------------------------------------------------
+    # Consulta y descarga
+    # ------------------------------------------------------------------
+
+    def _known_hash(self, path, stat):
+        cached = self._hashes.get(path)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        return None
+
+    def status(self, name):
+        """Tamaño y sha256 del archivo completo, y offset de la subida parcial si existe"""
+        path = self.path_for(name)
+        info = {'name': name, 'size': None, 'sha256': None, 'offset': None}
+        partial = path + PARTIAL_SUFFIX
+        if os.path.exists(partial):
+            info['offset'] = os.path.getsize(partial)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            sha256 = self._known_hash(path, stat)
+            if sha256 is None:
+                sha256 = file_digest(path, self.chunk_size).hexdigest()
+                self._hashes[path] = (stat.st_size, stat.st_mtime_ns, sha256)
+            info['size'], info['sha256'] = stat.st_size, sha256
+        if info['size'] is None and info['offset'] is None:
+            raise TransferError(404, f'No existe {name}')
+        return info
+
+    def list_files(self):
+        files = []
+        if not os.path.isdir(self.directory):
+            return files
+        for entry in sorted(os.scandir(self.directory), key=lambda entry: entry.name):
+            if not entry.is_file():
+                continue
+            partial = entry.name.endswith(PARTIAL_SUFFIX)
+            files.append({
+                'name': entry.name[:-len(PARTIAL_SUFFIX)] if partial else entry.name,
+                'size': entry.stat().st_size,
+                'partial': partial
+            })
+        return files
+
+    def download(self, name, range_header=None):
+        """Retorna (código HTTP, headers, generador de trozos) del archivo o del rango pedido"""
+        path = self.path_for(name)
+        try:
+            source = open(path, 'rb')
+        except (FileNotFoundError, IsADirectoryError):
+            raise TransferError(404, f'No existe {name}') from None
+        try:
+            stat = os.fstat(source.fileno())
+            size = stat.st_size
+            start, end, status_code = 0, size - 1, 200
+            headers = {'Accept-Ranges': 'bytes'}
+            if range_header:
+                start, end = parse_range(range_header, size)
+                status_code = 206
+                headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+            headers['Content-Length'] = str(end - start + 1)
+            sha256 = self._known_hash(path, stat)
+            if sha256 is not None:
+                headers['X-Content-SHA256'] = sha256
+        except BaseException:
+            source.close()
+            raise
+        self.stats['downloads'] += 1
+        return status_code, headers, self._read_range(source, start, end - start + 1)
+
+    def _read_range(self, source, start, length):
+        try:
+            source.seek(start)
+            while length > 0:
+                chunk = source.read(min(self.chunk_size, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+                self.stats['bytes_out'] += len(chunk)
+                yield chunk
+        finally:
+            source.close()
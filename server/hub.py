@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Hub de entrada - Varios controladores, varios computadores
+Para redes donde los controladores y los destinos están en subredes
+distintas, o donde los teléfonos entran por un único equipo de acceso: los
+clientes se conectan una sola vez al hub y el hub mantiene conexiones
+persistentes con cada servidor destino registrado.
+
+Cada acción se enruta a un destino por su ID (campo ``target`` de cada
+evento, ``?target=ID`` o header ``X-Target``). Cada destino tiene su propia
+cola acotada y una sola tarea de envío (ver upstream.py), así las acciones
+de un destino llegan en el orden en que entraron al hub y un destino lento
+no atrasa a los demás. El registro consulta ``/screen`` de cada destino
+periódicamente: sirve de chequeo de salud y deja la geometría en caché.
+
+Uso:
+    python3 hub.py --target sala1=192.168.1.21 --target sala2=192.168.2.40:5001
+    python3 hub.py --targets-file destinos.txt --port 5000
+"""
+
+import argparse
+import asyncio
+import re
+import time
+
+from action_schema import validate_action
+from async_server import AsyncHTTPServer
+from latency_profiles import LATENCY_PROFILES
+from upstream import (BINARY_CONTENT_TYPE, FORWARDED_ENDPOINTS, KEYBOARD_ENDPOINTS, UpstreamTarget,
+                      parse_target)
+from wire_format import WireFormatError, decode_events
+
+# Cada cuánto se consulta /screen a un destino conectado
+HEALTH_INTERVAL = 5.0
+
+# Cada cuánto se reintenta un destino sin conexión
+RETRY_INTERVAL = 1.0
+
+TARGET_ID = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+
+def parse_target_entry(spec, index):
+    """'sala1=192.168.1.21:5001' o '192.168.1.21' -> (id, host, puerto)"""
+    target_id, separator, address = spec.strip().partition('=')
+    if not separator:
+        target_id, address = f'target-{index}', target_id
+    target_id = target_id.strip()
+    if not TARGET_ID.match(target_id):
+        raise ValueError(f'ID de destino inválido: {target_id!r} (letras, números, _ . -)')
+    host, port = parse_target(address)
+    return target_id, host, port
+
+
+class TargetRegistry:
+    """Destinos registrados, cada uno con su cola, sus conexiones y su geometría en caché.
+
+    Debe usarse dentro del event loop.
+    """
+
+    def __init__(self):
+        self._targets = {}
+        self._watchers = {}
+
+    def __len__(self):
+        return len(self._targets)
+
+    def __iter__(self):
+        return iter(self._targets.values())
+
+    def get(self, target_id):
+        return self._targets.get(target_id)
+
+    def register(self, target_id, host, port):
+        """Agrega un destino o cambia su dirección. Retorna (destino, creado)"""
+        current = self._targets.get(target_id)
+        if current is not None:
+            if (current.host, current.port) == (host, port):
+                return current, False
+            self.unregister(target_id)
+
+        target = UpstreamTarget(target_id, host, port)
+        target.start()
+        self._targets[target_id] = target
+        self._watchers[target_id] = asyncio.ensure_future(self._watch(target))
+        return target, current is None
+
+    def unregister(self, target_id):
+        """Quita un destino y descarta lo que tenía pendiente. Retorna False si no existía"""
+        target = self._targets.pop(target_id, None)
+        if target is None:
+            return False
+        self._watchers.pop(target_id).cancel()
+        target.stop()
+        return True
+
+    @property
+    def live(self):
+        return sum(1 for target in self._targets.values() if target.connected)
+
+    async def _watch(self, target):
+        while True:
+            await target.refresh_screen()
+            await asyncio.sleep(HEALTH_INTERVAL if target.connected else RETRY_INTERVAL)
+
+    def to_list(self):
+        return [dict(target.to_dict(), screen=target.screen) for target in self._targets.values()]
+
+
+class Hub:
+    """Enruta las acciones de los controladores al destino indicado"""
+
+    def __init__(self, default_target=None):
+        self.registry = TargetRegistry()
+        self.default_target = default_target
+        self.http = None
+        self.stats = {
+            'routed': 0,
+            'rejected': 0,
+            'unrouted': 0,
+            'invalid': 0
+        }
+
+    def resolve(self, req, target_id=None, require_live=True):
+        """Destino de una acción. Retorna (destino, None) o (None, (respuesta de error, código)).
+
+        El ID sale del evento, de ``?target=``, del header ``X-Target`` o del
+        destino por defecto; con un solo destino registrado no hace falta indicarlo.
+        """
+        target_id = target_id or req.args.get('target') or req.headers.get('X-Target') or self.default_target
+        if target_id is None:
+            if len(self.registry) == 1:
+                target_id = next(iter(self.registry)).id
+            else:
+                return None, ({'status': 'error',
+                               'message': 'Indica el destino (?target=ID, header X-Target o campo target)'}, 400)
+
+        target = self.registry.get(target_id)
+        if target is None:
+            return None, ({'status': 'error', 'message': f'Destino desconocido: {target_id}'}, 404)
+        if require_live and not target.connected:
+            return None, ({'status': 'error', 'message': f'Destino sin conexión: {target_id}',
+                           'last_error': target.last_error}, 503)
+        return target, None
+
+    def _enqueue(self, target, kind, data, profile):
+        if target.enqueue(kind, data, profile):
+            self.stats['routed'] += 1
+            return True
+        self.stats['rejected'] += 1
+        return False
+
+    def _routed_response(self, counts, rejected):
+        if rejected:
+            return {'status': 'error', 'message': f"Cola llena en: {', '.join(sorted(rejected))}",
+                    'targets': counts}, 503
+        return {'status': 'success', 'targets': counts}, 200
+
+    def _invalid(self, message):
+        self.stats['invalid'] += 1
+        return {'status': 'error', 'message': message}, 400
+
+    @staticmethod
+    def _entry_error(kind, data):
+        """Mensaje de error de una entrada, o None si es válida"""
+        if kind == 'binary':
+            try:
+                decode_events(data)
+            except WireFormatError as e:
+                return str(e)
+            return None
+        if kind == 'action':
+            return validate_action(data)
+        return None
+
+    def route(self, req, entries, profile=None):
+        """Enruta ``[(tipo, datos), ...]``. Un evento con campo ``target`` va a ese destino.
+
+        Primero se resuelven los destinos, se validan las acciones y se verifica que
+        cada cola tenga lugar: un ID, una acción inválida o una cola llena rechazan la
+        tanda completa sin encolar nada (una acción mal formada en el /events compartido
+        de un destino haría rechazar también la entrada de otros controladores).
+        Cada destino recibe sus eventos en el orden original.
+        """
+        if profile is not None and profile not in LATENCY_PROFILES:
+            return self._invalid(f'Perfil de latencia desconocido: {profile}')
+        routed = []
+        needed = {}
+        for kind, data in entries:
+            event_target = data.get('target') if kind == 'action' else None
+            target, error = self.resolve(req, event_target)
+            if error is not None:
+                self.stats['unrouted'] += 1
+                return error
+            if event_target is not None:
+                data = {key: value for key, value in data.items() if key != 'target'}
+            message = self._entry_error(kind, data)
+            if message is not None:
+                return self._invalid(message)
+            routed.append((target, kind, data))
+            needed[target] = needed.get(target, 0) + 1
+
+        rejected = {target.id for target, count in needed.items() if not target.has_room(count)}
+        if rejected:
+            self.stats['rejected'] += len(routed)
+            return self._routed_response({}, rejected)
+
+        counts = {}
+        for target, kind, data in routed:
+            if self._enqueue(target, kind, data, profile):
+                counts[target.id] = counts.get(target.id, 0) + 1
+        return self._routed_response(counts, rejected)
+
+    # ------------------------------------------------------------------
+    # Rutas (mismas firmas que los handlers de server.py)
+    # ------------------------------------------------------------------
+
+    def ping_response(self, req):
+        return {'status': 'pong'}, 200
+
+    def status_response(self, req):
+        return {
+            'status': 'online',
+            'server': 'MultiComputer Hub',
+            'targets': self.registry.to_list(),
+            'live': self.registry.live,
+            'default_target': self.default_target,
+            'hub': self.stats,
+            'http': self.http.stats if self.http is not None else None,
+            'uptime': time.time()
+        }, 200
+
+    def screen_response(self, req):
+        # Geometría en caché: no requiere que el destino esté conectado ahora mismo
+        target, error = self.resolve(req, require_live=False)
+        if error is not None:
+            return error
+        if target.screen is None:
+            return {'status': 'error', 'message': f'El destino {target.id} no respondió todavía'}, 503
+        return {'status': 'success', 'screen': target.screen, 'target': target.id}, 200
+
+    def targets_response(self, req):
+        return {'status': 'success', 'targets': self.registry.to_list(), 'live': self.registry.live}, 200
+
+    def register_response(self, req):
+        data = req.get_json(silent=True)
+        if not isinstance(data, dict):
+            return {'status': 'error', 'message': 'Se esperaba JSON con id, host y port'}, 400
+        target_id, host, port = data.get('id'), data.get('host'), data.get('port', 5000)
+        if not isinstance(target_id, str) or not TARGET_ID.match(target_id):
+            return {'status': 'error', 'message': 'id inválido (letras, números, _ . -)'}, 400
+        if not isinstance(host, str) or not host.strip():
+            return {'status': 'error', 'message': 'host inválido'}, 400
+        if not isinstance(port, int) or isinstance(port, bool) or not 0 < port < 65536:
+            return {'status': 'error', 'message': 'port inválido'}, 400
+
+        target, created = self.registry.register(target_id, host.strip(), port)
+        print(f"🖥️  Destino {'registrado' if created else 'actualizado'}: {target.id} ({target.address})")
+        return {'status': 'success', 'target': target.to_dict()}, 201 if created else 200
+
+    def unregister_response(self, req):
+        data = req.get_json(silent=True)
+        target_id = data.get('id') if isinstance(data, dict) else req.args.get('id')
+        if not self.registry.unregister(target_id):
+            return {'status': 'error', 'message': f'Destino desconocido: {target_id}'}, 404
+        print(f"🗑️  Destino eliminado: {target_id}")
+        return {'status': 'success', 'id': target_id}, 200
+
+    def mouse_response(self, req):
+        profile = req.headers.get('X-Latency-Profile')
+        if req.mimetype == BINARY_CONTENT_TYPE:
+            return self.route(req, [('binary', req.get_data())], profile)
+        data = req.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('action'), str):
+            return {'status': 'error', 'message': 'Se esperaba una acción JSON'}, 400
+        return self.route(req, [('action', data)], profile)
+
+    def events_response(self, req):
+        profile = req.headers.get('X-Latency-Profile')
+        if req.mimetype == BINARY_CONTENT_TYPE:
+            return self.route(req, [('binary', req.get_data())], profile)
+        data = req.get_json(silent=True)
+        events = data.get('events') if isinstance(data, dict) else data
+        if not isinstance(events, list) or not all(isinstance(event, dict) for event in events):
+            return {'status': 'error', 'message': 'Se esperaba una lista de eventos'}, 400
+        return self.route(req, [('action', event) for event in events], profile)
+
+    def keyboard_route(self, action):
+        def handler(req):
+            data = req.get_json(silent=True)
+            data = dict(data) if isinstance(data, dict) else {}
+            data['action'] = action
+            return self.route(req, [('action', data)], req.headers.get('X-Latency-Profile'))
+        return handler
+
+    def forward_route(self, path):
+        def handler(req):
+            request = ('POST', path, req.get_data(), req.headers.get('content-type', 'application/json'))
+            payload, status_code = self.route(req, [('request', request)])
+            if status_code != 200:
+                return payload, status_code
+            # El destino responde por su lado: el resultado del trabajo se consulta en el destino
+            return dict(payload, message='Reenviado al destino'), 202
+        return handler
+
+    def routes(self):
+        routes = {
+            ('GET', '/ping'): self.ping_response,
+            ('GET', '/status'): self.status_response,
+            ('GET', '/screen'): self.screen_response,
+            ('GET', '/targets'): self.targets_response,
+            ('POST', '/targets'): self.register_response,
+            ('DELETE', '/targets'): self.unregister_response,
+            ('POST', '/mouse'): self.mouse_response,
+            ('POST', '/events'): self.events_response
+        }
+        for path, action in KEYBOARD_ENDPOINTS.items():
+            routes[('POST', path)] = self.keyboard_route(action)
+        for path in FORWARDED_ENDPOINTS:
+            routes[('POST', path)] = self.forward_route(path)
+        return routes
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='MultiComputer Hub: enruta varios controladores a varios servidores')
+    parser.add_argument('--target', action='append', default=[], metavar='ID=HOST[:PUERTO]',
+                        help='Destino inicial (repetir por cada máquina; también se registran con POST /targets)')
+    parser.add_argument('--targets-file', metavar='ARCHIVO', default=None,
+                        help='Archivo con un destino ID=HOST[:PUERTO] por línea (# para comentarios)')
+    parser.add_argument('--default-target', metavar='ID', default=None,
+                        help='Destino de los requests que no indican uno (ej. el cliente web sin cambios)')
+    parser.add_argument('--port', type=int, default=5000, help='Puerto HTTP para los controladores (default: 5000)')
+    return parser.parse_args(argv)
+
+
+def load_targets(args):
+    specs = list(args.target)
+    if args.targets_file:
+        with open(args.targets_file, encoding='utf-8') as targets_file:
+            specs += [line.split('#', 1)[0].strip() for line in targets_file]
+    return [parse_target_entry(spec, index) for index, spec in enumerate(filter(None, specs), start=1)]
+
+
+async def serve(hub, targets, port):
+    for target_id, host, target_port in targets:
+        hub.registry.register(target_id, host, target_port)
+    hub.http = AsyncHTTPServer(hub.routes(), port=port)
+    await hub.http.serve_forever()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    try:
+        targets = load_targets(args)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f'❌ {e}')
+
+    print("=" * 80)
+    print("🔀 MultiComputer Hub - varios controladores, varios computadores")
+    print("=" * 80)
+    print(f"🌐 Escuchando en el puerto {args.port}")
+    print(f"🖥️  {len(targets)} destinos iniciales (más con POST /targets):")
+    for target_id, host, port in targets:
+        print(f"   • {target_id}: {host}:{port}")
+    if args.default_target:
+        print(f"🎯 Destino por defecto: {args.default_target}")
+    print("🧭 Enrutamiento: ?target=ID, header X-Target o campo 'target' de cada evento")
+    print("=" * 80)
+
+    try:
+        asyncio.run(serve(Hub(args.default_target), targets, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Hub detenido correctamente")
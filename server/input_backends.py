@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Backends de inyección de entrada
+Separan el servidor de las librerías que mueven el mouse y presionan teclas,
+para poder correrlo y medirlo sin pantalla (ej. en CI).
+"""
+
+import json
+import threading
+import time
+from collections import deque
+
+from screen_layout import enumerate_monitors
+
+MOUSE_BUTTONS = ('left', 'right', 'middle')
+
+
+class FailSafeTriggered(Exception):
+    """El usuario activó el FailSafe (mouse en la esquina superior izquierda)"""
+
+
+class ClipboardUnavailable(Exception):
+    """El backend no tiene acceso al portapapeles"""
+
+
+class InputBackend:
+    """Interfaz común de inyección.
+
+    Las teclas se nombran de forma neutral: ``'enter'``, ``'escape'``,
+    ``'arrow_up'``, ``'ctrl'``, ``'cmd'``, ``'f5'`` o un carácter como ``'a'``.
+    ``duration`` es el tiempo de interpolación del movimiento en segundos.
+    """
+
+    name = 'base'
+
+    def screen_size(self):
+        raise NotImplementedError
+
+    def move(self, x, y, duration=0.0):
+        raise NotImplementedError
+
+    def button_down(self, button='left'):
+        raise NotImplementedError
+
+    def button_up(self, button='left'):
+        raise NotImplementedError
+
+    def click(self, x, y, button='left'):
+        raise NotImplementedError
+
+    def scroll(self, amount, x=None, y=None):
+        raise NotImplementedError
+
+    def position(self):
+        """Posición actual del cursor (x, y), o None si el backend no la conoce"""
+        return None
+
+    def monitors(self):
+        """Lista de monitores (dicts con id, name, x, y, width, height, primary) o None"""
+        return None
+
+    def key_down(self, key):
+        raise NotImplementedError
+
+    def key_up(self, key):
+        raise NotImplementedError
+
+    def text(self, text):
+        raise NotImplementedError
+
+    @property
+    def has_clipboard(self):
+        return False
+
+    def clipboard_get(self):
+        raise ClipboardUnavailable(f'El backend {self.name} no tiene portapapeles')
+
+    def clipboard_set(self, text):
+        raise ClipboardUnavailable(f'El backend {self.name} no tiene portapapeles')
+
+    def close(self):
+        """Libera recursos del backend (opcional)"""
+
+
+class PyAutoGUIBackend(InputBackend):
+    """Backend real: pyautogui para el mouse y pynput para el teclado.
+
+    Las llamadas a pyautogui usan ``_pause=False``: las pausas entre acciones
+    las decide el perfil de latencia, no ``pyautogui.PAUSE``.
+    """
+
+    name = 'pyautogui'
+
+    # Nombres neutrales que no coinciden con el atributo de pynput.keyboard.Key
+    KEY_ALIASES = {
+        'escape': 'esc',
+        'arrow_up': 'up',
+        'arrow_down': 'down',
+        'arrow_left': 'left',
+        'arrow_right': 'right'
+    }
+
+    def __init__(self):
+        # Importar aquí para que los demás backends funcionen sin pantalla
+        import pyautogui
+        from pynput.keyboard import Controller, Key
+
+        self._pyautogui = pyautogui
+        self._key = Key
+        self._keyboard = Controller()
+        self._resolved_keys = {}
+
+        try:
+            # Portapapeles opcional: sin pyperclip no hay pegado rápido
+            import pyperclip
+            self._pyperclip = pyperclip
+        except ImportError:
+            self._pyperclip = None
+
+        # Configurar pyautogui para mayor seguridad
+        pyautogui.FAILSAFE = True  # Mover mouse a esquina superior izquierda para parar
+
+    def _resolve_key(self, key):
+        resolved = self._resolved_keys.get(key)
+        if resolved is not None:
+            return resolved
+        if len(key) == 1:
+            return key
+        name = self.KEY_ALIASES.get(key, key)
+        resolved = getattr(self._key, name, None)
+        if resolved is None:
+            raise ValueError(f'Tecla no soportada en este sistema: {key}')
+        self._resolved_keys[key] = resolved
+        return resolved
+
+    def _call(self, function, *args, **kwargs):
+        try:
+            return function(*args, _pause=False, **kwargs)
+        except self._pyautogui.FailSafeException as e:
+            raise FailSafeTriggered(str(e)) from e
+
+    def screen_size(self):
+        width, height = self._pyautogui.size()
+        return width, height
+
+    def move(self, x, y, duration=0.0):
+        self._call(self._pyautogui.moveTo, x, y, duration=duration)
+
+    def button_down(self, button='left'):
+        self._call(self._pyautogui.mouseDown, button=button)
+
+    def button_up(self, button='left'):
+        self._call(self._pyautogui.mouseUp, button=button)
+
+    def click(self, x, y, button='left'):
+        self._call(self._pyautogui.click, x, y, button=button)
+
+    def scroll(self, amount, x=None, y=None):
+        self._call(self._pyautogui.scroll, amount, x=x, y=y)
+
+    def position(self):
+        x, y = self._pyautogui.position()
+        return x, y
+
+    def monitors(self):
+        return enumerate_monitors()
+
+    def key_down(self, key):
+        self._keyboard.press(self._resolve_key(key))
+
+    def key_up(self, key):
+        self._keyboard.release(self._resolve_key(key))
+
+    def text(self, text):
+        self._keyboard.type(text)
+
+    @property
+    def has_clipboard(self):
+        return self._pyperclip is not None
+
+    def clipboard_get(self):
+        if self._pyperclip is None:
+            raise ClipboardUnavailable('pyperclip no instalado')
+        try:
+            return self._pyperclip.paste()
+        except self._pyperclip.PyperclipException as e:
+            raise ClipboardUnavailable(str(e)) from e
+
+    def clipboard_set(self, text):
+        if self._pyperclip is None:
+            raise ClipboardUnavailable('pyperclip no instalado')
+        try:
+            self._pyperclip.copy(text)
+        except self._pyperclip.PyperclipException as e:
+            raise ClipboardUnavailable(str(e)) from e
+
+
+class RecordingBackend(InputBackend):
+    """Backend nulo: no toca el sistema, solo registra cada llamada con su marca de tiempo.
+
+    Las llamadas quedan en memoria (``calls``, acotado a ``max_calls``) y,
+    si se indica ``path``, también en un archivo JSON Lines con buffer.
+    ``monitors`` simula una distribución de varios monitores (ver
+    ``screen_layout.parse_monitor_spec``); el primero es el principal.
+    """
+
+    name = 'null'
+
+    def __init__(self, path=None, screen_size=(1920, 1080), max_calls=100000, monitors=None):
+        self._monitors = monitors
+        if monitors:
+            screen_size = (monitors[0]['width'], monitors[0]['height'])
+        self._screen_size = tuple(screen_size)
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8', buffering=1 << 16) if path else None
+        self.calls = deque(maxlen=max_calls)
+        self._clipboard = ''
+        self._position = (self._screen_size[0] // 2, self._screen_size[1] // 2)
+
+    def _record(self, name, *args):
+        entry = (time.perf_counter(), name, args)
+        with self._lock:
+            self.calls.append(entry)
+            if self._file is not None:
+                self._file.write(json.dumps([entry[0], name, list(args)]) + '\n')
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def screen_size(self):
+        return self._screen_size
+
+    def monitors(self):
+        return [dict(monitor) for monitor in self._monitors] if self._monitors else None
+
+    def move(self, x, y, duration=0.0):
+        self._record('move', x, y, duration)
+        self._position = (x, y)
+
+    def button_down(self, button='left'):
+        self._record('button_down', button)
+
+    def button_up(self, button='left'):
+        self._record('button_up', button)
+
+    def click(self, x, y, button='left'):
+        self._record('click', x, y, button)
+        self._position = (x, y)
+
+    def scroll(self, amount, x=None, y=None):
+        self._record('scroll', amount, x, y)
+        if x is not None and y is not None:
+            self._position = (x, y)
+
+    def position(self):
+        return self._position
+
+    def key_down(self, key):
+        self._record('key_down', key)
+
+    def key_up(self, key):
+        self._record('key_up', key)
+
+    def text(self, text):
+        self._record('text', text)
+
+    @property
+    def has_clipboard(self):
+        return True
+
+    def clipboard_get(self):
+        return self._clipboard
+
+    def clipboard_set(self, text):
+        self._record('clipboard_set', len(text))
+        self._clipboard = text
+
+
+BACKENDS = {
+    'pyautogui': PyAutoGUIBackend,
+    'null': RecordingBackend
+}
+
+
+def create_backend(name, record_path=None, monitors=None):
+    """Crea el backend indicado por nombre ('pyautogui' o 'null')"""
+    if name not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {name} (opciones: {', '.join(BACKENDS)})")
+    if name == 'null':
+        return RecordingBackend(path=record_path, monitors=monitors)
+    return BACKENDS[name]()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Despachador de entrada - Hilo único de inyección
+Todas las acciones de mouse y teclado se encolan aquí y un solo hilo las
+ejecuta, así los requests concurrentes de Flask nunca compiten entre sí.
+"""
+
+import threading
+import time
+from collections import deque
+
+# Carril de alta prioridad: acciones discretas que el usuario espera ver ya
+HIGH_PRIORITY_ACTIONS = frozenset(('click', 'type', 'special', 'shortcut', 'keys', 'paste_text'))
+
+# Movimientos puros a posición absoluta: solo importa el más reciente, y un click
+# posterior que trae sus propias coordenadas los deja obsoletos
+MOTION_ACTIONS = frozenset(('move', 'drag_move'))
+
+# Movimientos relativos: no se pueden descartar, pero dos seguidos equivalen a su suma
+RELATIVE_MOTION_ACTIONS = frozenset(('move_rel',))
+
+# Cada clase de evento tiene su cola acotada. Al llenarse, 'motion' descarta el
+# movimiento pendiente más antiguo (uno nuevo lo reemplaza de todas formas; los
+# relativos se suman al siguiente);
+# 'keys' y 'pointer' (clicks, botones, scroll) rechazan con QueueFull: perder
+# una tecla o un botón en silencio dejaría al destino en otro estado
+QUEUE_LIMITS = {
+    'motion': 64,
+    'pointer': 256,
+    'keys': 512
+}
+
+
+def event_class(action):
+    """Clase de cola de una acción: 'motion', 'keys' o 'pointer'"""
+    if action in MOTION_ACTIONS or action in RELATIVE_MOTION_ACTIONS:
+        return 'motion'
+    if action in HIGH_PRIORITY_ACTIONS and action != 'click':
+        return 'keys'
+    return 'pointer'
+
+
+def has_position(data):
+    """True si la acción fija su propia posición (sin x/y completos usa la del cursor)"""
+    if data.get('nx') is not None:
+        return True
+    return data.get('x') is not None and data.get('y') is not None
+
+
+def class_counts(actions):
+    """Acciones por clase de cola que rechaza ('keys' y 'pointer'); los movimientos no cuentan"""
+    needed = {}
+    for data in actions:
+        kind = event_class(data.get('action'))
+        if kind != 'motion':
+            needed[kind] = needed.get(kind, 0) + 1
+    return needed
+
+
+class QueueFull(Exception):
+    """La cola de una clase de evento con política de rechazo está llena"""
+
+    def __init__(self, kind, limit, message=None):
+        super().__init__(message or f"Cola de '{kind}' llena ({limit} pendientes)")
+        self.kind = kind
+        self.limit = limit
+
+
+class BatchTooLarge(QueueFull):
+    """Un lote trae más acciones de una clase que las que caben en su cola vacía.
+
+    Reintentarlo no sirve: hay que partirlo (el servidor responde 413, no 429).
+    """
+
+    def __init__(self, kind, limit):
+        super().__init__(kind, limit, f"Lote con más de {limit} acciones de '{kind}' (límite de su cola)")
+
+
+def sum_relative_motion(previous, data):
+    """Fusiona dos movimientos relativos en una acción nueva (las originales no se modifican).
+
+    ``samples`` cuenta los eventos sumados para que la curva de aceleración
+    use la velocidad de cada muestra y no la del total.
+    """
+    merged = {
+        'action': data.get('action'),
+        'dx': previous.get('dx', 0) + data.get('dx', 0),
+        'dy': previous.get('dy', 0) + data.get('dy', 0),
+        'samples': previous.get('samples', 1) + data.get('samples', 1)
+    }
+    for field in ('profile', 'accel', 'seq'):
+        if data.get(field) is not None:
+            merged[field] = data.get(field)
+    return merged
+
+
+class _QueuedAction:
+    """Acción pendiente en uno de los carriles"""
+    __slots__ = ('seq', 'enqueued_at', 'data', 'source', 'kind')
+
+    def __init__(self, seq, data, source=None, kind='pointer'):
+        self.seq = seq
+        self.enqueued_at = time.perf_counter()
+        self.data = data
+        self.source = source
+        self.kind = kind
+
+
+class InputDispatcher:
+    """Cola con dos carriles de prioridad consumida por un único hilo escritor.
+
+    ``apply_action`` recibe el diccionario de la acción y retorna
+    (respuesta, código HTTP), igual que los handlers del servidor.
+    ``on_applied(data, queue_wait, duration, status_code)`` se llama después
+    de cada acción con los tiempos en segundos (ej. para métricas).
+    ``on_submit(actions)`` recibe cada tanda aceptada en el mismo orden en que
+    se encola (ej. para grabar la sesión); debe ser rápido porque corre con el lock tomado.
+    ``on_progress(source, data)`` se llama después de cada acción encolada con
+    ``source`` (el cliente que la envió), ej. para confirmarle lo ya aplicado.
+    ``limits`` acota las colas por clase de evento (ver QUEUE_LIMITS).
+    """
+
+    def __init__(self, apply_action, on_error=None, on_applied=None, on_submit=None, on_progress=None,
+                 limits=None):
+        self._apply_action = apply_action
+        self._on_error = on_error
+        self._on_applied = on_applied
+        self._on_submit = on_submit
+        self._on_progress = on_progress
+        self._high = deque()
+        self._low = deque()
+        self._limits = dict(QUEUE_LIMITS, **(limits or {}))
+        self._depth = dict.fromkeys(self._limits, 0)  # Pendientes por clase de evento
+        self._blocked = 0  # Productores internos esperando lugar (submit con block=True)
+        self._condition = threading.Condition()
+        self._next_seq = 0
+        # Última acción que no es movimiento puro: los movimientos no se fusionan a través de ella
+        self._barrier_seq = 0
+        self._running = False
+        self._applying = False
+        self._thread = None
+        self.stats = {
+            'enqueued': 0,
+            'applied': 0,
+            'superseded': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'rejected': 0,
+            'errors': 0
+        }
+
+    def start(self):
+        """Inicia el hilo despachador (idempotente)"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name='input-dispatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Detiene el hilo despachador; las acciones pendientes se descartan"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, data, source=None, block=False):
+        """Encola una acción y retorna su número de secuencia.
+
+        Si su cola está llena lanza QueueFull, o con ``block=True`` espera a que
+        haya lugar (para productores internos como los trabajos de escritura).
+        """
+        with self._condition:
+            self._admit((data,), block)
+            if self._on_submit is not None:
+                self._on_submit((data,))
+            seq = self._enqueue(data, source)
+            self._condition.notify()
+        return seq
+
+    def submit_many(self, actions, source=None, block=False):
+        """Encola varias acciones de forma atómica (sin intercalar otras).
+
+        Se aceptan todas o ninguna: si alguna cola con rechazo no tiene lugar lanza QueueFull.
+        """
+        with self._condition:
+            self._admit(actions, block)
+            if self._on_submit is not None:
+                self._on_submit(actions)
+            seqs = [self._enqueue(data, source) for data in actions]
+            self._condition.notify()
+        return seqs
+
+    def submit_entries(self, entries, block=False):
+        """Como submit_many, pero cada acción con su cliente: ``[(acción, source), ...]``.
+
+        Para quien reúne acciones de varios clientes en una sola entrega (ej. el buffer de jitter).
+        """
+        actions = [data for data, _ in entries]
+        with self._condition:
+            self._admit(actions, block)
+            if self._on_submit is not None:
+                self._on_submit(actions)
+            seqs = [self._enqueue(data, source) for data, source in entries]
+            self._condition.notify()
+        return seqs
+
+    def wait_idle(self, timeout=None):
+        """Espera a que no quede nada pendiente ni en ejecución. Retorna False si vence el plazo"""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._high and not self._low and not self._applying, timeout)
+
+    def pending(self):
+        """Cantidad de acciones pendientes por carril y por clase de evento"""
+        with self._condition:
+            return {'high': len(self._high), 'low': len(self._low), 'by_class': dict(self._depth)}
+
+    def check_batch(self, actions):
+        """Lanza BatchTooLarge si ``actions`` no cabría ni con las colas vacías"""
+        for kind, count in class_counts(actions).items():
+            if count > self._limits[kind]:
+                self.stats['rejected'] += len(actions)
+                raise BatchTooLarge(kind, self._limits[kind])
+
+    def _admit(self, actions, block):
+        # Debe llamarse con el lock tomado. Los movimientos nunca se rechazan (descartan el más antiguo)
+        self.check_batch(actions)
+        needed = class_counts(actions)
+        while True:
+            full = next((kind for kind, count in needed.items()
+                         if self._depth[kind] + count > self._limits[kind]), None)
+            if full is None:
+                return
+            if not block or not self._running:
+                self.stats['rejected'] += len(actions)
+                raise QueueFull(full, self._limits[full])
+            self._blocked += 1
+            try:
+                self._condition.wait()
+            finally:
+                self._blocked -= 1
+
+    def _enqueue(self, data, source=None):
+        # Debe llamarse con el lock tomado
+        self._next_seq += 1
+        seq = self._next_seq
+        action = data.get('action')
+        self.stats['enqueued'] += 1
+
+        if action in MOTION_ACTIONS:
+            # El más reciente gana: si el último pendiente es el mismo tipo de movimiento
+            # y no hay ningún click, botón ni tecla en medio, se reemplaza su posición
+            tail = self._low[-1] if self._low else None
+            if (tail is not None and tail.seq > self._barrier_seq
+                    and tail.data.get('action') == action):
+                tail.seq = seq
+                tail.data = data
+                tail.source = source
+                tail.enqueued_at = time.perf_counter()
+                self.stats['coalesced'] += 1
+                return seq
+        elif action in RELATIVE_MOTION_ACTIONS:
+            # Si el último pendiente es otro movimiento relativo sin nada en medio
+            # (es la última barrera), los deltas se suman en una sola inyección
+            tail = self._low[-1] if self._low else None
+            if (tail is not None and tail.seq == self._barrier_seq
+                    and tail.data.get('action') == action):
+                tail.data = sum_relative_motion(tail.data, data)
+                tail.seq = seq
+                tail.source = source
+                self._barrier_seq = seq
+                self.stats['coalesced'] += 1
+                return seq
+            self._barrier_seq = seq
+        else:
+            self._barrier_seq = seq
+
+        kind = event_class(action)
+        item = _QueuedAction(seq, data, source, kind)
+        if action in HIGH_PRIORITY_ACTIONS:
+            self._high.append(item)
+        else:
+            self._low.append(item)
+        self._depth[kind] += 1
+        if kind == 'motion' and self._depth[kind] > self._limits[kind]:
+            self._drop_oldest_motion()
+        return seq
+
+    def _drop_oldest_motion(self):
+        # Debe llamarse con el lock tomado: los movimientos solo viven en el carril bajo.
+        # Se descarta la posición absoluta más antigua; si solo hay relativos, el más
+        # antiguo se suma al siguiente para no perder su desplazamiento
+        relative = None
+        for index, item in enumerate(self._low):
+            action = item.data.get('action')
+            if action in MOTION_ACTIONS:
+                del self._low[index]
+                break
+            if action in RELATIVE_MOTION_ACTIONS:
+                if relative is None:
+                    relative = index
+                    continue
+                oldest = self._low[relative]
+                item.data = sum_relative_motion(oldest.data, item.data)
+                del self._low[relative]
+                break
+        else:
+            return
+        self._depth['motion'] -= 1
+        self.stats['dropped'] += 1
+
+    def _pop_low(self):
+        # Debe llamarse con el lock tomado
+        item = self._low.popleft()
+        self._depth[item.kind] -= 1
+        return item
+
+    def _take(self):
+        """Espera y retorna la siguiente tanda de acciones a ejecutar en orden"""
+        with self._condition:
+            self._applying = False
+            if not self._high and not self._low:
+                self._condition.notify_all()  # Despierta a wait_idle
+            while self._running and not self._high and not self._low:
+                self._condition.wait()
+            if not self._running:
+                return []
+            self._applying = True
+            if self._blocked:
+                self._condition.notify_all()  # Se libera lugar para quien espera en submit(block=True)
+
+            if not self._high:
+                return [self._pop_low()]
+
+            item = self._high.popleft()
+            self._depth[item.kind] -= 1
+            if item.data.get('action') != 'click':
+                # Las teclas no dependen de la posición del cursor: pasan primero
+                return [item]
+
+            # Un click no puede adelantarse a botones, drags o scrolls anteriores. De los
+            # movimientos se aplica solo el último antes de cada una de esas acciones
+            # (pueden depender de la posición); el último antes del click se descarta
+            # únicamente si el click trae su propia posición
+            batch = []
+            move = None
+            while self._low and self._low[0].seq < item.seq:
+                previous = self._pop_low()
+                if previous.data.get('action') in MOTION_ACTIONS:
+                    if move is not None:
+                        self.stats['superseded'] += 1
+                    move = previous
+                    continue
+                if move is not None:
+                    batch.append(move)
+                    move = None
+                batch.append(previous)
+            if move is not None:
+                if has_position(item.data):
+                    self.stats['superseded'] += 1
+                else:
+                    batch.append(move)
+            batch.append(item)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                return
+            for item in batch:
+                started = time.perf_counter()
+                try:
+                    result, status_code = self._apply_action(item.data)
+                except Exception as e:
+                    result, status_code = {'status': 'error', 'message': str(e)}, 500
+                self.stats['applied'] += 1
+                if self._on_applied is not None:
+                    self._on_applied(item.data, started - item.enqueued_at,
+                                     time.perf_counter() - started, status_code)
+                if item.source is not None and self._on_progress is not None:
+                    self._on_progress(item.source, item.data)
+                if status_code >= 400:
+                    self.stats['errors'] += 1
+                    if self._on_error is not None:
+                        self._on_error(item.data, result)
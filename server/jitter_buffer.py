@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Buffer de jitter para movimientos con marca de tiempo
+Las muestras de ``move`` y ``drag_move`` que traen el instante del cliente
+(campo ``t``, milisegundos de ``performance.now()``) no se inyectan al llegar:
+se retienen un retardo corto y se reproducen con el mismo espaciado con que
+el cliente las generó. Si la red las entrega amontonadas, el cursor sigue
+moviéndose parejo en lugar de trabarse y saltar.
+
+El retardo se adapta al jitter medido (entre un mínimo y el objetivo de
+latencia configurado). Las acciones sin marca de tiempo (clicks, inicio y fin
+de drag, scroll) vacían el buffer antes de entrar, así nunca se adelantan a
+los movimientos que el cliente envió antes que ellas.
+"""
+
+import threading
+import time
+from collections import deque
+
+# Acciones que se retienen en el buffer cuando traen 't'
+BUFFERED_ACTIONS = frozenset(('move', 'drag_move'))
+
+# Objetivo de latencia por defecto (retardo máximo agregado por el buffer)
+DEFAULT_TARGET = 0.04
+
+# Retardo mínimo aunque la red no tenga jitter
+MIN_DELAY = 0.005
+
+# El retardo es JITTER_FACTOR veces el jitter medido (cubre la mayoría de las variaciones)
+JITTER_FACTOR = 3.0
+
+# Ventana para estimar el menor tiempo de tránsito (la base del reloj del cliente)
+CLOCK_WINDOW = 2.0
+
+# Muestras retenidas antes de liberar las más viejas sin esperar
+MAX_DEPTH = 256
+
+# Relojes de cliente olvidados tras este tiempo sin muestras
+STREAM_TIMEOUT = 30.0
+
+# Un cliente que vuelve tras esta pausa empieza un reloj nuevo (la marca binaria de
+# 16 bits da la vuelta cada 65,5 s: con pausas más largas ya no se puede reconstruir)
+STREAM_RESET = 10.0
+
+
+class _StreamClock:
+    """Relación entre el reloj de un cliente y el del servidor"""
+
+    __slots__ = ('transits', 'jitter', 'last_transit', 'last_t', 'last_seen', 'last_raw', 'last_unwrapped')
+
+    def __init__(self):
+        self.transits = deque()  # (llegada, tránsito) con tránsitos crecientes: mínimo de ventana
+        self.jitter = 0.0
+        self.last_transit = None
+        self.last_t = None
+        self.last_seen = 0.0
+        self.last_raw = None  # Última marca truncada y su valor reconstruido (ms)
+        self.last_unwrapped = None
+
+    def copy(self):
+        clock = _StreamClock()
+        for name in self.__slots__:
+            setattr(clock, name, getattr(self, name))
+        clock.transits = deque(self.transits)
+        return clock
+
+    def unwrap(self, raw, modulo):
+        """Marca truncada (ej. 16 bits del formato binario) -> ms continuos con las anteriores"""
+        if self.last_raw is None:
+            self.last_raw, self.last_unwrapped = raw, float(raw)
+            return float(raw)
+        delta = (raw - self.last_raw) % modulo
+        if delta >= modulo / 2:
+            delta -= modulo  # Más vieja que la anterior: llegó desordenada
+        unwrapped = self.last_unwrapped + delta
+        if delta > 0:
+            self.last_raw, self.last_unwrapped = raw, unwrapped
+        return unwrapped
+
+    def observe(self, now, transit):
+        """Registra el tránsito de una muestra y retorna el menor de la ventana"""
+        # Jitter entre llegadas (RFC 3550): promedio móvil de la variación del tránsito
+        if self.last_transit is not None:
+            self.jitter += (abs(transit - self.last_transit) - self.jitter) / 16
+        self.last_transit = transit
+        self.last_seen = now
+
+        transits = self.transits
+        while transits and transits[-1][1] >= transit:
+            transits.pop()
+        transits.append((now, transit))
+        while transits[0][0] < now - CLOCK_WINDOW:
+            transits.popleft()
+        return transits[0][1]
+
+
+class JitterBuffer:
+    """Retiene muestras de movimiento y las entrega a ``submit_entries`` en su instante.
+
+    ``submit_entries([(acción, source), ...])`` es el de InputDispatcher. Todas las
+    acciones de puntero deben entrar por ``submit_many`` de este buffer para conservar
+    el orden; ``source`` identifica al cliente (cada uno tiene su propio reloj).
+    """
+
+    def __init__(self, submit_entries, target=DEFAULT_TARGET):
+        self._submit_entries = submit_entries
+        self.target = target
+        self._pending = deque()  # (instante de reproducción, muestra, cliente), en orden
+        self._clocks = {}
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+        self.stats = {
+            'target_ms': round(target * 1000, 1),
+            'delay_ms': 0.0,
+            'jitter_ms': 0.0,
+            'depth': 0,
+            'max_depth': 0,
+            'buffered': 0,
+            'released': 0,
+            'underruns': 0,
+            'reordered': 0,
+            'flushed': 0
+        }
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name='jitter-buffer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Entrega lo pendiente de inmediato y detiene el hilo"""
+        with self._condition:
+            self._running = False
+            self._flush()
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit_many(self, actions, source=None, block=False):
+        """Encola acciones de puntero: las muestras con 't' se retienen, el resto pasa en orden.
+
+        Lo que sale ahora (lo retenido que una acción sin 't' debe adelantar, y esas
+        acciones) entra al despachador en una sola entrega: si lanza QueueFull no se
+        encoló nada y lo retenido queda como estaba (el lote es todo o nada).
+        Con ``block=True`` espera lugar en el despachador en lugar de lanzar QueueFull.
+        """
+        with self._condition:
+            now = time.perf_counter()
+            pending = deque(self._pending)
+            entries = []
+            flushed = released = 0
+            # Para deshacer el lote si el despachador lo rechaza (el cliente lo reintentará)
+            clocks = {key: clock.copy() for key, clock in self._clocks.items()}
+            stats = dict(self.stats)
+            for data in actions:
+                if data.get('action') in BUFFERED_ACTIONS and data.get('t') is not None:
+                    self._schedule(data, source, now, pending)
+                    if len(pending) > MAX_DEPTH:
+                        entries.append(pending.popleft()[1:])
+                        released += 1
+                else:
+                    flushed += len(pending)
+                    entries.extend(entry[1:] for entry in pending)
+                    pending.clear()
+                    entries.append((data, source))
+            if entries:
+                try:
+                    self._submit_entries(entries, block)
+                except Exception:
+                    self._clocks, self.stats = clocks, stats
+                    raise
+
+            self._pending = pending
+            stats = self.stats
+            stats['flushed'] += flushed
+            stats['released'] += released
+            stats['depth'] = len(pending)
+            stats['max_depth'] = max(stats['max_depth'], stats['depth'])
+            self._condition.notify()
+
+    def submit(self, data, source=None):
+        self.submit_many((data,), source)
+
+    def _schedule(self, data, source, now, pending):
+        # Debe llamarse con el lock tomado. Agrega la muestra a ``pending`` con su instante
+        clock = self._clocks.get(source)
+        if clock is None or now - clock.last_seen > STREAM_RESET:
+            self._forget_idle(now)
+            clock = self._clocks[source] = _StreamClock()
+
+        t = data.get('t')
+        modulo = getattr(data, 't_modulo', None)  # Solo en eventos binarios (PointerEvent)
+        if modulo:
+            t = clock.unwrap(t, modulo)
+        t /= 1000
+        if clock.last_t is not None and t <= clock.last_t:
+            # Llegó después de una muestra más nueva: la posición ya es vieja
+            self.stats['reordered'] += 1
+            return
+        clock.last_t = t
+
+        base = clock.observe(now, now - t)
+        delay = min(self.target, max(MIN_DELAY, JITTER_FACTOR * clock.jitter))
+        due = t + base + delay
+        if due <= now:
+            # Llegó cuando ya debía estar en pantalla: el buffer se quedó sin muestras
+            self.stats['underruns'] += 1
+            due = now
+        if pending and due < pending[-1][0]:
+            due = pending[-1][0]  # Nunca reproducir fuera de orden si el retardo baja
+        pending.append((due, data, source))
+
+        stats = self.stats
+        stats['buffered'] += 1
+        stats['delay_ms'] = round(delay * 1000, 2)
+        stats['jitter_ms'] = round(clock.jitter * 1000, 2)
+
+    def _flush(self):
+        # Debe llamarse con el lock tomado: entrega todo lo retenido (el despachador fusiona)
+        if not self._pending:
+            return
+        self.stats['flushed'] += len(self._pending)
+        self.stats['depth'] = 0
+        entries = [entry[1:] for entry in self._pending]
+        self._pending.clear()
+        self._submit_entries(entries)
+
+    def _release(self, data, source):
+        self.stats['released'] += 1
+        self._submit_entries(((data, source),))
+
+    def _forget_idle(self, now):
+        for source in [source for source, clock in self._clocks.items()
+                       if now - clock.last_seen > STREAM_TIMEOUT]:
+            del self._clocks[source]
+
+    def _run(self):
+        with self._condition:
+            while self._running:
+                if not self._pending:
+                    self._condition.wait()
+                    continue
+                wait = self._pending[0][0] - time.perf_counter()
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                self._release(*self._pending.popleft()[1:])
+                self.stats['depth'] = len(self._pending)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tablas de teclas y combinaciones
+Todo se compila una sola vez al arrancar: cada tecla especial y cada shortcut
+es un plan de presionar/soltar ya resuelto, y el modificador del sistema
+operativo (Cmd en Mac, Ctrl en Windows/Linux) se decide aquí y no por request.
+"""
+
+import platform
+from functools import lru_cache
+
+IS_MAC = platform.system() == 'Darwin'
+
+# Modificador de los shortcuts del sistema (Cmd en Mac, Ctrl en Windows/Linux)
+PRIMARY_MODIFIER = 'cmd' if IS_MAC else 'ctrl'
+PRIMARY_LABEL = 'Cmd' if IS_MAC else 'Ctrl'
+
+MODIFIERS = ('ctrl', 'shift', 'alt', 'alt_gr', 'cmd')
+
+NAMED_KEYS = (
+    'backspace', 'enter', 'tab', 'escape', 'delete', 'space',
+    'arrow_up', 'arrow_down', 'arrow_left', 'arrow_right',
+    'home', 'end', 'page_up', 'page_down', 'insert',
+    'caps_lock', 'num_lock', 'scroll_lock', 'print_screen', 'pause', 'menu'
+) + tuple(f'f{number}' for number in range(1, 21))
+
+# Otros nombres aceptados en /keys
+KEY_ALIASES = {
+    'primary': PRIMARY_MODIFIER,
+    'mod': PRIMARY_MODIFIER,
+    'control': 'ctrl',
+    'option': 'alt',
+    'meta': 'cmd',
+    'win': 'cmd',
+    'super': 'cmd',
+    'command': 'cmd',
+    'esc': 'escape',
+    'return': 'enter',
+    'del': 'delete',
+    'up': 'arrow_up',
+    'down': 'arrow_down',
+    'left': 'arrow_left',
+    'right': 'arrow_right',
+    'pgup': 'page_up',
+    'pgdn': 'page_down',
+    'ins': 'insert'
+}
+
+# Shortcuts con nombre: tecla que se combina con el modificador del sistema
+SHORTCUT_KEYS = {
+    'select_all': ('a', 'Select All'),
+    'copy': ('c', 'Copy'),
+    'paste': ('v', 'Paste'),
+    'undo': ('z', 'Undo'),
+    'redo': ('y', 'Redo'),
+    'cut': ('x', 'Cut'),
+    'save': ('s', 'Save'),
+    'find': ('f', 'Find'),
+    'new': ('n', 'New'),
+    'open': ('o', 'Open'),
+    'print': ('p', 'Print'),
+    'refresh': ('r', 'Refresh')
+}
+
+# Tamaño de la caché de combinaciones compiladas para /keys
+CHORD_CACHE_SIZE = 512
+
+
+class KeySpecError(ValueError):
+    """Combinación de teclas inválida"""
+
+
+def normalize_key(name):
+    """Nombre neutral de una tecla (ej. 'Esc' -> 'escape', 'primary' -> 'ctrl')"""
+    if not isinstance(name, str) or not name:
+        raise KeySpecError('Tecla vacía')
+    key = name.strip() or name  # ' ' solo es la barra espaciadora
+    if len(key) == 1:
+        return key.lower()
+    key = key.lower()
+    key = KEY_ALIASES.get(key, key)
+    if key not in MODIFIERS and key not in NAMED_KEYS:
+        raise KeySpecError(f'Tecla no reconocida: {name}')
+    return key
+
+
+def _build_plan(modifiers, key):
+    # Presionar modificadores, tocar la tecla y soltar en orden inverso
+    plan = [(True, modifier) for modifier in modifiers]
+    plan.append((True, key))
+    plan.append((False, key))
+    plan.extend((False, modifier) for modifier in reversed(modifiers))
+    return tuple(plan)
+
+
+def compile_chord(chord):
+    """Compila 'ctrl+shift+t' en un plan: tupla de (presionar?, tecla)"""
+    if not isinstance(chord, str) or not chord.strip():
+        raise KeySpecError('Combinación vacía')
+    # '+' solo o al final es la propia tecla '+'
+    parts = chord.split('+') if chord != '+' else ['+']
+    if chord.endswith('++'):
+        parts = parts[:-2] + ['+']
+    keys = [normalize_key(part) for part in parts]
+
+    *modifiers, key = keys
+    for modifier in modifiers:
+        if modifier not in MODIFIERS:
+            raise KeySpecError(f'No es un modificador: {modifier}')
+    if len(set(modifiers)) != len(modifiers):
+        raise KeySpecError(f'Modificador repetido en {chord}')
+    return _build_plan(modifiers, key)
+
+
+@lru_cache(maxsize=CHORD_CACHE_SIZE)
+def compile_sequence(chords):
+    """Compila una secuencia de combinaciones (tupla) en un solo plan, con caché LRU"""
+    plan = ()
+    for chord in chords:
+        plan += compile_chord(chord)
+    return plan
+
+
+class KeyEntry:
+    """Tecla especial o shortcut precompilado"""
+    __slots__ = ('label', 'plan')
+
+    def __init__(self, label, plan):
+        self.label = label
+        self.plan = plan
+
+
+# Tablas de despacho O(1), construidas una sola vez al importar
+SPECIAL_KEYS = {
+    name: KeyEntry(name.replace('_', ' ').title(), _build_plan((), name))
+    for name in NAMED_KEYS
+}
+
+SHORTCUTS = {
+    name: KeyEntry(f'{PRIMARY_LABEL} + {key.upper()} ({description})',
+                   _build_plan((PRIMARY_MODIFIER,), key))
+    for name, (key, description) in SHORTCUT_KEYS.items()
+}
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Perfiles de latencia
+Cada perfil define, por acción, cuánto dura la interpolación del movimiento
+(tween) y cuánto se espera después de inyectarla (pause). Reemplazan a
+pyautogui.PAUSE y a las duraciones fijas, sin tocar estado global.
+"""
+
+
+class LatencyProfile:
+    """Tiempos por acción en segundos: ``tweens`` y ``pauses`` son dicts acción -> segundos"""
+
+    __slots__ = ('name', 'description', 'tweens', 'pauses')
+
+    def __init__(self, name, description, tweens, pauses):
+        self.name = name
+        self.description = description
+        self.tweens = tweens
+        self.pauses = pauses
+
+    def tween(self, action):
+        """Duración de la interpolación del movimiento para la acción"""
+        return self.tweens.get(action, 0.0)
+
+    def pause(self, action):
+        """Espera posterior a la acción"""
+        return self.pauses.get(action, 0.0)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'description': self.description,
+            'tweens': dict(self.tweens),
+            'pauses': dict(self.pauses)
+        }
+
+
+LATENCY_PROFILES = {
+    # Sin interpolación ni pausas: el cursor salta directo a la posición
+    'instant': LatencyProfile(
+        'instant',
+        'Sin interpolación ni pausas - mínima latencia',
+        tweens={},
+        pauses={}
+    ),
+    # Interpolación corta para que el movimiento se vea continuo
+    'smooth': LatencyProfile(
+        'smooth',
+        'Interpolación corta, pausas mínimas',
+        tweens={'move': 0.01, 'drag_start': 0.01, 'drag_move': 0.01,
+                'drag_end': 0.01, 'drag': 0.15},
+        pauses={'click': 0.01, 'drag_start': 0.01, 'drag_end': 0.01,
+                'drag': 0.01, 'scroll': 0.01}
+    ),
+    # Mismos tiempos que el servidor original (pyautogui.PAUSE = 0.1)
+    'compat': LatencyProfile(
+        'compat',
+        'Tiempos del servidor original (PAUSE 0.1)',
+        tweens={'move': 0.1, 'drag_start': 0.05, 'drag_move': 0.02,
+                'drag_end': 0.05, 'drag': 0.3, 'drag_approach': 0.1},
+        pauses={'move': 0.1, 'click': 0.1, 'drag_start': 0.2, 'drag_move': 0.1,
+                'drag_end': 0.2, 'drag': 0.4, 'scroll': 0.01}
+    )
+}
+
+DEFAULT_PROFILE = 'smooth'
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Métricas del servidor en formato de texto de Prometheus
+Contadores por acción e histogramas de latencia por etapa:
+
+    parse       leer el cuerpo del request (JSON o binario)
+    validate    validar la acción antes de encolarla
+    queue_wait  tiempo en la cola del despachador
+    inject      ejecutar la acción (clamping, llamadas al backend y pausas del perfil)
+
+Los histogramas usan buckets fijos: registrar una muestra es una búsqueda
+binaria y tres sumas, sin crear listas ni diccionarios en el camino de /mouse.
+"""
+
+from bisect import bisect_left
+
+PREFIX = 'multicomputer'
+
+STAGES = ('parse', 'validate', 'queue_wait', 'inject')
+
+# Límites superiores de los buckets en segundos (50 µs a 2.5 s)
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+# Contadores propios: nombre -> (ayuda, nombre de la etiqueta o None)
+COUNTERS = {
+    'actions': ('Acciones aceptadas y encoladas', 'action'),
+    'rejected': ('Acciones rechazadas por validación', 'action'),
+    'errors': ('Acciones que fallaron al inyectarse', 'action'),
+    'throttled': ('Solicitudes rechazadas por control de admisión (429)', 'reason'),
+    'failsafe': ('Veces que se activó el FailSafe de pyautogui', None)
+}
+
+
+class Histogram:
+    """Histograma de buckets fijos (el último cuenta lo que supera al mayor límite).
+
+    Sin lock: bajo el GIL una carrera entre hilos puede perder alguna muestra,
+    lo que es aceptable para métricas y evita bloquear el camino caliente.
+    """
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+
+class Metrics:
+    """Registro de histogramas por (etapa, acción) y de contadores con etiquetas"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+
+    def histogram(self, stage, action):
+        """Histograma de una etapa y acción (se crea la primera vez)"""
+        key = (stage, action)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, stage, action, seconds):
+        self.histogram(stage, action).observe(seconds)
+
+    def count(self, name, label=None, amount=1):
+        """Suma ``amount`` al contador ``name`` (con una etiqueta opcional, ej. la acción)"""
+        key = (name, label)
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def counter_value(self, name, label=None):
+        return self._counters.get((name, label), 0)
+
+    def render(self, collected=()):
+        """Texto de exposición de Prometheus.
+
+        ``collected`` son contadores leídos al momento de exportar (ej. los del
+        despachador): tuplas ``(nombre, ayuda, etiqueta, {valor_etiqueta: total})``.
+        """
+        lines = []
+        name = f'{PREFIX}_stage_seconds'
+        lines.append(f'# HELP {name} Latencia por etapa y acción')
+        lines.append(f'# TYPE {name} histogram')
+        for (stage, action), histogram in sorted(self._histograms.copy().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{_labels(stage=stage, action=action, le=bound)}}} {cumulative}')
+            lines.append(f'{name}_bucket{{{_labels(stage=stage, action=action, le="+Inf")}}} {histogram.count}')
+            lines.append(f'{name}_sum{{{_labels(stage=stage, action=action)}}} {histogram.sum:.9f}')
+            lines.append(f'{name}_count{{{_labels(stage=stage, action=action)}}} {histogram.count}')
+
+        counters = {}
+        for (counter, label), value in self._counters.copy().items():
+            counters.setdefault(counter, []).append((label, value))
+        for counter, (help_text, label_name) in COUNTERS.items():
+            name = f'{PREFIX}_{counter}_total'
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            values = sorted(counters.get(counter, ()), key=lambda item: str(item[0]))
+            if not values and label_name is None:
+                lines.append(f'{name} 0')
+            for label, value in values:
+                if label_name is None:
+                    lines.append(f'{name} {value}')
+                else:
+                    lines.append(f'{name}{{{_labels(**{label_name: label})}}} {value}')
+
+        for counter, help_text, label_name, values in collected:
+            name = f'{PREFIX}_{counter}_total'
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for label, value in values.items():
+                lines.append(f'{name}{{{_labels(**{label_name: label})}}} {value}')
+
+        lines.append('')
+        return '\n'.join(lines)
+
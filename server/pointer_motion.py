@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Movimiento relativo del puntero (modo touchpad)
+El cliente envía desplazamientos (dx, dy) en lugar de coordenadas absolutas y
+el servidor mantiene la posición autoritativa del cursor. Cada delta pasa por
+una curva de aceleración: los gestos lentos mueven el cursor con precisión y
+los rápidos cruzan la pantalla sin tener que levantar el dedo varias veces.
+
+La posición se guarda en coma flotante, así los restos de píxel que deja la
+curva se acumulan en lugar de perderse al redondear cada delta.
+"""
+
+import math
+import time
+
+# Sin movimiento relativo durante este tiempo se vuelve a leer la posición real
+# del cursor (pudo moverse con el mouse físico del equipo o con una acción absoluta)
+RESYNC_IDLE = 1.0
+
+
+class AccelerationCurve:
+    """Ganancia del puntero según la velocidad del gesto.
+
+    La velocidad se mide en píxeles por muestra (un evento del cliente, ~16 ms).
+    Hasta ``threshold`` la ganancia es ``sensitivity``; por encima crece
+    linealmente con ``acceleration`` por cada píxel extra, hasta ``max_gain``
+    veces la sensibilidad.
+    """
+
+    __slots__ = ('name', 'description', 'sensitivity', 'threshold', 'acceleration', 'max_gain')
+
+    def __init__(self, name, description, sensitivity=1.0, threshold=0.0, acceleration=0.0, max_gain=1.0):
+        self.name = name
+        self.description = description
+        self.sensitivity = sensitivity
+        self.threshold = threshold
+        self.acceleration = acceleration
+        self.max_gain = max_gain
+
+    def gain(self, speed):
+        """Multiplicador para un delta de ``speed`` píxeles por muestra"""
+        if speed <= self.threshold:
+            return self.sensitivity
+        boost = 1.0 + self.acceleration * (speed - self.threshold)
+        return self.sensitivity * min(boost, self.max_gain)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'description': self.description,
+            'sensitivity': self.sensitivity,
+            'threshold': self.threshold,
+            'acceleration': self.acceleration,
+            'max_gain': self.max_gain
+        }
+
+
+ACCELERATION_CURVES = {
+    # El cursor recorre exactamente lo mismo que el dedo (en píxeles del cliente)
+    'flat': AccelerationCurve(
+        'flat',
+        'Sin aceleración - desplazamiento 1:1'
+    ),
+    # Aceleración moderada, parecida a la de un escritorio
+    'adaptive': AccelerationCurve(
+        'adaptive',
+        'Aceleración moderada - precisión en gestos lentos',
+        sensitivity=1.0, threshold=3.0, acceleration=0.06, max_gain=3.0
+    ),
+    # Pantallas chicas de teléfono: más ganancia para cruzar la pantalla remota
+    'touchpad': AccelerationCurve(
+        'touchpad',
+        'Ganancia alta para pantallas táctiles de teléfono',
+        sensitivity=1.5, threshold=2.0, acceleration=0.1, max_gain=5.0
+    )
+}
+
+DEFAULT_CURVE = 'adaptive'
+
+
+class RelativePointer:
+    """Posición autoritativa del cursor para el movimiento relativo.
+
+    ``read_position`` es una función sin argumentos que retorna la posición
+    real del cursor (o None si el backend no la conoce). Solo la usa el hilo
+    despachador, así que no necesita locks.
+    """
+
+    def __init__(self, read_position, curve):
+        self._read_position = read_position
+        self.curve = curve
+        self._x = None
+        self._y = None
+        self._last_motion = 0.0
+
+    def sync(self, x, y):
+        """Fija la posición después de una acción con coordenadas absolutas"""
+        self._x = float(x)
+        self._y = float(y)
+        self._last_motion = time.monotonic()
+
+    def position(self, layout):
+        """Posición actual en píxeles enteros, dentro de la pantalla visible (ScreenLayout)"""
+        if self._x is None:
+            self._resync(layout)
+        return self._clamp(layout)
+
+    def move_by(self, dx, dy, layout, samples=1, curve=None):
+        """Aplica un delta (suma de ``samples`` muestras) y retorna la nueva posición entera"""
+        now = time.monotonic()
+        if self._x is None or now - self._last_motion > RESYNC_IDLE:
+            self._resync(layout)
+        self._last_motion = now
+
+        # Una suma de varias muestras se acelera según la velocidad media de cada una
+        speed = math.hypot(dx, dy) / max(1, samples)
+        gain = (curve or self.curve).gain(speed)
+        self._x += dx * gain
+        self._y += dy * gain
+        return self._clamp(layout)
+
+    def _resync(self, layout):
+        try:
+            position = self._read_position()
+        except Exception:
+            position = None
+        if position is None:
+            # Sin posición conocida: el centro del monitor principal
+            position = layout.center()
+        x, y = position
+        # Conservar los restos de píxel si el cursor no se movió por otro lado
+        if self._x is None or (math.floor(self._x), math.floor(self._y)) != (x, y):
+            self._x, self._y = float(x), float(y)
+
+    def _clamp(self, layout):
+        # Al chocar con un borde se descarta el exceso: volver atrás responde de inmediato
+        self._x, self._y = layout.clamp(self._x, self._y)
+        # floor y no int(): con monitores a la izquierda o arriba hay coordenadas negativas
+        return math.floor(self._x), math.floor(self._y)
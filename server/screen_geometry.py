@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Geometría de pantalla en caché
+Evita consultar al servidor gráfico en cada evento de mouse: un hilo vigilante
+refresca la instantánea periódicamente y se puede invalidar a demanda.
+"""
+
+import threading
+
+from screen_layout import ScreenLayout
+
+
+class ScreenGeometry:
+    """Instantánea compartida de la geometría de pantalla.
+
+    ``probe`` es una función sin argumentos que retorna el diccionario de
+    pantalla (``width``, ``height``, ``monitors``). La instantánea se reemplaza
+    de forma atómica, así que leerla no requiere locks. Incluye el índice de
+    monitores (``layout``) ya construido: el camino de /mouse solo lo consulta.
+    """
+
+    def __init__(self, probe, interval=2.0):
+        self._probe = probe
+        self._interval = interval
+        self._refresh_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.version = 0
+        self._current = self._build(probe())
+
+    @staticmethod
+    def _build(info):
+        # (información completa, ancho, alto, índice) en una sola tupla para lecturas consistentes
+        return (info, info['width'], info['height'], ScreenLayout(info['monitors']))
+
+    @property
+    def info(self):
+        """Diccionario de pantalla de la última instantánea (no modificar)"""
+        return self._current[0]
+
+    @property
+    def size(self):
+        """(ancho, alto) de la última instantánea"""
+        _, width, height, _ = self._current
+        return width, height
+
+    @property
+    def layout(self):
+        """ScreenLayout de la última instantánea"""
+        return self._current[3]
+
+    def refresh(self):
+        """Vuelve a consultar la pantalla. Retorna True si la geometría cambió"""
+        with self._refresh_lock:
+            info = self._probe()
+            if info == self._current[0]:
+                return False
+            self._current = self._build(info)
+            self.version += 1
+            return True
+
+    def invalidate(self):
+        """Pide al hilo vigilante que refresque de inmediato"""
+        self._wakeup.set()
+
+    def start_watcher(self, on_change=None):
+        """Inicia el hilo que detecta cambios de configuración de pantalla"""
+        if self._thread is not None:
+            return
+
+        def watch():
+            while True:
+                self._wakeup.wait(self._interval)
+                self._wakeup.clear()
+                try:
+                    changed = self.refresh()
+                except Exception as e:
+                    print(f"⚠️  Error refrescando geometría de pantalla: {e}")
+                    continue
+                if changed and on_change is not None:
+                    on_change(self.info)
+
+        self._thread = threading.Thread(target=watch, name='screen-watcher', daemon=True)
+        self._thread.start()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Distribución de monitores y mapeo de coordenadas
+Con varios monitores el escritorio virtual no es un rectángulo: puede haber
+orígenes negativos (un monitor a la izquierda o arriba del principal) y
+huecos entre monitores de distinto tamaño. El clamping contra un solo
+rectángulo deja monitores inalcanzables o permite puntos fuera de toda
+pantalla.
+
+``ScreenLayout`` precalcula, cada vez que cambia la geometría, una grilla
+sobre el rectángulo que envuelve a todos los monitores. Cada celda guarda los
+monitores que la tocan y el más cercano, así convertir una coordenada
+normalizada en un píxel y ajustarla a la pantalla visible más cercana cuesta
+lo mismo con uno o con seis monitores.
+
+La enumeración real usa ``screeninfo`` (opcional); sin él se reporta un único
+monitor con el tamaño que da el backend.
+"""
+
+import math
+import re
+
+try:
+    from screeninfo import get_monitors
+except ImportError:
+    get_monitors = None
+
+# Celdas por eje de la grilla de clamping (como máximo)
+GRID_CELLS = 32
+
+# DPI de referencia para estimar la escala (100 %)
+BASE_DPI = 96
+
+MONITOR_SPEC = re.compile(r'^(\d+)x(\d+)([+-]\d+)([+-]\d+)$')
+
+
+def enumerate_monitors():
+    """Monitores reales con screeninfo, o None si no está instalado o falla"""
+    if get_monitors is None:
+        return None
+    try:
+        found = get_monitors()
+    except Exception as e:
+        print(f"⚠️  Error enumerando monitores: {e}")
+        return None
+
+    monitors = []
+    for index, monitor in enumerate(found, start=1):
+        entry = {
+            'id': index,
+            'name': monitor.name or f'Monitor {index}',
+            'x': monitor.x,
+            'y': monitor.y,
+            'width': monitor.width,
+            'height': monitor.height,
+            'primary': bool(getattr(monitor, 'is_primary', False))
+        }
+        # Escala estimada desde el tamaño físico (screeninfo no expone la del sistema)
+        width_mm = getattr(monitor, 'width_mm', None)
+        if width_mm:
+            dpi = monitor.width / (width_mm / 25.4)
+            entry['dpi'] = round(dpi)
+            entry['scale'] = max(1.0, round(dpi / BASE_DPI * 4) / 4)
+        monitors.append(entry)
+    if monitors and not any(monitor['primary'] for monitor in monitors):
+        # Sin monitor principal declarado: el que contiene el origen, o el primero
+        origin = next((m for m in monitors if m['x'] == 0 and m['y'] == 0), monitors[0])
+        origin['primary'] = True
+    return monitors or None
+
+
+def parse_monitor_spec(spec):
+    """Distribución simulada para el backend nulo: '1920x1080+0+0,1280x1024-1280+0'"""
+    monitors = []
+    for index, part in enumerate(spec.split(','), start=1):
+        match = MONITOR_SPEC.match(part.strip())
+        if match is None:
+            raise ValueError(f'Monitor inválido: {part!r} (formato ANCHOxALTO+X+Y)')
+        width, height, x, y = (int(value) for value in match.groups())
+        monitors.append({'id': index, 'name': f'Monitor {index}', 'x': x, 'y': y,
+                         'width': width, 'height': height, 'primary': index == 1})
+    return monitors
+
+
+def describe_layout(monitors):
+    """Diccionario de pantalla para /screen a partir de la lista de monitores.
+
+    ``width``/``height`` siguen siendo los del monitor principal (clientes
+    anteriores); ``virtual`` es el rectángulo que envuelve a todos.
+    """
+    for monitor in monitors:
+        monitor.setdefault('scale', 1.0)
+    primary = next((m for m in monitors if m.get('primary')), monitors[0])
+    left = min(m['x'] for m in monitors)
+    top = min(m['y'] for m in monitors)
+    right = max(m['x'] + m['width'] for m in monitors)
+    bottom = max(m['y'] + m['height'] for m in monitors)
+    return {
+        'width': primary['width'],
+        'height': primary['height'],
+        'virtual': {'x': left, 'y': top, 'width': right - left, 'height': bottom - top},
+        'monitors': monitors
+    }
+
+
+class Monitor:
+    """Rectángulo de un monitor en coordenadas del escritorio virtual"""
+
+    __slots__ = ('id', 'x', 'y', 'width', 'height', 'right', 'bottom')
+
+    def __init__(self, info):
+        self.id = info.get('id')
+        self.x = info['x']
+        self.y = info['y']
+        self.width = info['width']
+        self.height = info['height']
+        # Último píxel visible (inclusive)
+        self.right = self.x + self.width - 1
+        self.bottom = self.y + self.height - 1
+
+    def contains(self, x, y):
+        return self.x <= x <= self.right and self.y <= y <= self.bottom
+
+    def clamp(self, x, y):
+        return min(max(x, self.x), self.right), min(max(y, self.y), self.bottom)
+
+    def distance(self, left, top, right, bottom):
+        """Distancia entre este monitor y un rectángulo (0 si se tocan)"""
+        dx = max(self.x - right, left - self.right, 0)
+        dy = max(self.y - bottom, top - self.bottom, 0)
+        return math.hypot(dx, dy)
+
+
+class ScreenLayout:
+    """Índice precalculado de la distribución de monitores (inmutable)"""
+
+    def __init__(self, monitors):
+        self.monitors = tuple(Monitor(info) for info in monitors)
+        self.primary = next((Monitor(info) for info in monitors if info.get('primary')), self.monitors[0])
+        self._by_id = {monitor.id: monitor for monitor in self.monitors}
+
+        self.x = min(monitor.x for monitor in self.monitors)
+        self.y = min(monitor.y for monitor in self.monitors)
+        self.width = max(monitor.right for monitor in self.monitors) + 1 - self.x
+        self.height = max(monitor.bottom for monitor in self.monitors) + 1 - self.y
+
+        self._cell_width = max(1, math.ceil(self.width / GRID_CELLS))
+        self._cell_height = max(1, math.ceil(self.height / GRID_CELLS))
+        self._columns = math.ceil(self.width / self._cell_width)
+        self._rows = math.ceil(self.height / self._cell_height)
+        self._cells = [self._build_cell(column, row)
+                       for row in range(self._rows) for column in range(self._columns)]
+
+    def _build_cell(self, column, row):
+        # (monitores que tocan la celda, monitor más cercano a la celda)
+        left = self.x + column * self._cell_width
+        top = self.y + row * self._cell_height
+        right = left + self._cell_width - 1
+        bottom = top + self._cell_height - 1
+        touching = tuple(m for m in self.monitors if m.distance(left, top, right, bottom) == 0)
+        center_x, center_y = (left + right) / 2, (top + bottom) / 2
+        nearest = min(self.monitors, key=lambda m: m.distance(center_x, center_y, center_x, center_y))
+        return touching, nearest
+
+    @property
+    def single(self):
+        return len(self.monitors) == 1
+
+    def clamp(self, x, y):
+        """Ajusta un punto del escritorio virtual a la pantalla visible más cercana"""
+        column = min(max(int((x - self.x) // self._cell_width), 0), self._columns - 1)
+        row = min(max(int((y - self.y) // self._cell_height), 0), self._rows - 1)
+        touching, nearest = self._cells[row * self._columns + column]
+        for monitor in touching:
+            if monitor.contains(x, y):
+                return x, y
+        if not touching:
+            return nearest.clamp(x, y)
+        # Punto en el hueco de una celda de borde: el más cercano de los que la tocan
+        return min((monitor.clamp(x, y) for monitor in touching),
+                   key=lambda point: (point[0] - x) ** 2 + (point[1] - y) ** 2)
+
+    def from_normalized(self, nx, ny, monitor_id=None):
+        """Convierte (0..1, 0..1) del escritorio virtual, o de un monitor, en un píxel visible"""
+        monitor = self._by_id.get(monitor_id) if monitor_id is not None else None
+        if monitor is not None:
+            return monitor.clamp(round(monitor.x + nx * (monitor.width - 1)),
+                                 round(monitor.y + ny * (monitor.height - 1)))
+        return self.clamp(round(self.x + nx * (self.width - 1)), round(self.y + ny * (self.height - 1)))
+
+    def has_monitor(self, monitor_id):
+        return monitor_id in self._by_id
+
+    def center(self):
+        """Centro del monitor principal"""
+        return self.primary.x + self.primary.width // 2, self.primary.y + self.primary.height // 2
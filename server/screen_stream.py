@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+Vista en vivo de la pantalla remota
+Cada frame se divide en tiles de 64x64 y solo se envían los que cambiaron
+respecto al frame anterior, codificados en JPEG. Las tiras de tiles
+contiguos de una misma fila van juntas en una sola imagen. La comparación
+usa numpy (vectorizada) si está instalado; sin numpy se comparan las filas
+de bytes, más lento pero con el mismo resultado.
+
+El cliente confirma cada frame después de dibujarlo y el servidor no captura
+el siguiente mientras haya MAX_IN_FLIGHT sin confirmar: el ritmo lo marca lo
+rápido que el cliente consume el stream. Si el cliente se atrasa se baja la
+resolución (y luego los fps); cuando vuelve a ir holgado se suben de nuevo.
+
+La fuente de captura es intercambiable: ``screen`` captura la pantalla real
+(mss si está instalado, si no ImageGrab de Pillow) y ``synthetic`` genera
+frames sin pantalla para medir el encoder (``--benchmark``) o probar con el
+backend nulo.
+
+Formato de cada frame (little-endian):
+    cabecera  '<4sBBIiiHHHHH'  b'MCSF', versión, flags (bit 0: frame completo),
+              seq, x/y/ancho/alto del área capturada (escritorio virtual),
+              ancho/alto del frame en píxeles, cantidad de rectángulos
+    por rect  '<HHHHI'  x, y, ancho, alto (píxeles del frame), bytes del JPEG
+              seguido del JPEG
+"""
+
+import argparse
+import io
+import json
+import math
+import struct
+import time
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = ImageDraw = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import mss
+except ImportError:
+    mss = None
+
+FRAME_MAGIC = b'MCSF'
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct('<4sBBIiiHHHHH')
+RECT_HEADER = struct.Struct('<HHHHI')
+FLAG_KEYFRAME = 0x01
+
+# Lado de cada tile en píxeles del frame
+TILE_SIZE = 64
+
+JPEG_QUALITY = 70
+
+# Límites de frames por segundo
+DEFAULT_FPS = 15
+MIN_FPS = 2
+
+# Escalas de resolución, de mayor a menor calidad
+SCALES = (1.0, 0.75, 0.5, 0.35, 0.25)
+
+# Frames enviados sin confirmar antes de esperar al cliente
+MAX_IN_FLIGHT = 2
+
+# Un frame sin confirmar por este tiempo se da por perdido
+ACK_TIMEOUT = 2.0
+
+# Cada cuánto se revisan el ritmo y la resolución
+ADAPT_PERIOD = 1.0
+
+# Periodos holgados seguidos antes de subir la resolución
+RECOVER_PERIODS = 3
+
+
+def stream_available():
+    """El stream necesita Pillow para codificar (y capturar)"""
+    return Image is not None
+
+
+# ============================================================================
+# FUENTES DE CAPTURA
+# ============================================================================
+
+class CaptureSource:
+    """Fuente de frames: ``grab()`` retorna (imagen RGB de Pillow, (x, y, ancho, alto) en el escritorio)"""
+
+    name = 'base'
+
+    def grab(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ScreenCapture(CaptureSource):
+    """Pantalla real: todos los monitores con mss, o ImageGrab de Pillow"""
+
+    name = 'screen'
+
+    def __init__(self):
+        # mss guarda recursos por hilo: cada sesión crea su propia captura
+        self._mss = mss.mss() if mss is not None else None
+
+    def grab(self):
+        if self._mss is not None:
+            area = self._mss.monitors[0]  # Rectángulo que envuelve a todos los monitores
+            shot = self._mss.grab(area)
+            image = Image.frombytes('RGB', shot.size, shot.bgra, 'raw', 'BGRX')
+            return image, (area['left'], area['top'], shot.size[0], shot.size[1])
+
+        from PIL import ImageGrab
+        image = ImageGrab.grab(all_screens=True).convert('RGB')
+        return image, (0, 0, image.width, image.height)
+
+    def close(self):
+        if self._mss is not None:
+            self._mss.close()
+
+
+class SyntheticCapture(CaptureSource):
+    """Frames generados sin pantalla: escritorio fijo, una ventana que se mueve y un reloj.
+
+    Cambia una fracción pequeña de la pantalla por frame, como un escritorio
+    real, y es determinista: sirve para medir el encoder y para el backend nulo.
+    """
+
+    name = 'synthetic'
+
+    def __init__(self, width=1920, height=1080, origin=(0, 0)):
+        self.width = width
+        self.height = height
+        self.origin = origin
+        self._frame = 0
+        self._base = Image.new('RGB', (width, height), (32, 64, 112))
+        draw = ImageDraw.Draw(self._base)
+        for x in range(0, width, 128):
+            draw.line((x, 0, x, height), fill=(40, 76, 128))
+        for y in range(0, height, 128):
+            draw.line((0, y, width, y), fill=(40, 76, 128))
+        draw.rectangle((0, height - 40, width, height), fill=(24, 24, 32))  # Barra de tareas
+
+    def grab(self):
+        self._frame += 1
+        image = self._base.copy()
+        draw = ImageDraw.Draw(image)
+
+        # Ventana que recorre la pantalla
+        window_width, window_height = min(480, self.width // 2), min(320, self.height // 2)
+        x = (self._frame * 6) % max(1, self.width - window_width)
+        y = (self.height - window_height) // 2 + int(math.sin(self._frame / 15) * self.height / 6)
+        draw.rectangle((x, y, x + window_width, y + window_height), fill=(236, 236, 236), outline=(0, 0, 0))
+        draw.rectangle((x, y, x + window_width, y + 24), fill=(52, 152, 219))
+
+        # Reloj de la barra de tareas: cambia una vez por "segundo" de frames
+        tick = self._frame // 15
+        draw.rectangle((self.width - 120, self.height - 32, self.width - 10, self.height - 8),
+                       fill=((tick * 40) % 256, 200, 120))
+        return image, (self.origin[0], self.origin[1], self.width, self.height)
+
+
+# ============================================================================
+# ENCODER
+# ============================================================================
+
+class TileEncoder:
+    """Detecta los tiles que cambiaron respecto al frame anterior y los codifica en JPEG"""
+
+    def __init__(self, tile=TILE_SIZE, quality=JPEG_QUALITY):
+        self.tile = tile
+        self.quality = quality
+        self._previous = None
+        self._size = None
+        self._padded = None  # Máscara por píxel con el tamaño de la grilla (solo numpy)
+
+    def reset(self):
+        """El próximo frame se envía completo (ej. cambió la escala o el cliente lo pidió)"""
+        self._previous = None
+
+    def encode(self, image, area, seq):
+        """Retorna (mensaje, tiles) o (None, 0) si no cambió nada"""
+        width, height = image.size
+        data = image.tobytes()
+        rows = -(-height // self.tile)
+        columns = -(-width // self.tile)
+
+        keyframe = self._previous is None or self._size != (width, height)
+        if keyframe:
+            mask = [[True] * columns for _ in range(rows)]
+        elif np is not None:
+            mask = self._dirty_mask_numpy(data, width, height, rows, columns)
+        else:
+            mask = self._dirty_mask_bytes(data, width, height, rows, columns)
+        self._previous = data
+        self._size = (width, height)
+
+        rects = self._rects(mask, width, height)
+        if not rects:
+            return None, 0
+
+        x, y, area_width, area_height = area
+        parts = [FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, FLAG_KEYFRAME if keyframe else 0, seq,
+                                   x, y, area_width, area_height, width, height, len(rects))]
+        tiles = 0
+        for left, top, rect_width, rect_height in rects:
+            buffer = io.BytesIO()
+            image.crop((left, top, left + rect_width, top + rect_height)).save(
+                buffer, 'JPEG', quality=self.quality)
+            payload = buffer.getvalue()
+            parts.append(RECT_HEADER.pack(left, top, rect_width, rect_height, len(payload)))
+            parts.append(payload)
+            tiles += -(-rect_width // self.tile)
+        return b''.join(parts), tiles
+
+    def _dirty_mask_numpy(self, data, width, height, rows, columns):
+        tile = self.tile
+        # Cada fila como bytes planos (ancho * 3): reducir sobre el eje del canal RGB
+        # (de largo 3) es varias veces más lento que sobre los bytes de todo el tile
+        current = np.frombuffer(data, np.uint8).reshape(height, width * 3)
+        previous = np.frombuffer(self._previous, np.uint8).reshape(height, width * 3)
+        if self._padded is None or self._padded.shape != (rows * tile, columns * tile * 3):
+            self._padded = np.zeros((rows * tile, columns * tile * 3), dtype=bool)
+        np.not_equal(current, previous, out=self._padded[:height, :width * 3])
+        return self._padded.reshape(rows, tile, columns, tile * 3).any(axis=3).any(axis=1).tolist()
+
+    def _dirty_mask_bytes(self, data, width, height, rows, columns):
+        tile = self.tile
+        stride = width * 3
+        span = tile * 3
+        current = memoryview(data)
+        previous = memoryview(self._previous)
+        mask = [[False] * columns for _ in range(rows)]
+        for y in range(height):
+            start = y * stride
+            end = start + stride
+            if current[start:end] == previous[start:end]:
+                continue  # La mayoría de las filas no cambia
+            row_mask = mask[y // tile]
+            for column in range(columns):
+                if row_mask[column]:
+                    continue
+                left = start + column * span
+                right = min(left + span, end)
+                if current[left:right] != previous[left:right]:
+                    row_mask[column] = True
+        return mask
+
+    def _rects(self, mask, width, height):
+        # Tiles contiguos de una fila van en un solo rectángulo (un JPEG en lugar de varios)
+        tile = self.tile
+        rects = []
+        for row, row_mask in enumerate(mask):
+            top = row * tile
+            rect_height = min(tile, height - top)
+            column = 0
+            while column < len(row_mask):
+                if not row_mask[column]:
+                    column += 1
+                    continue
+                first = column
+                while column < len(row_mask) and row_mask[column]:
+                    column += 1
+                left = first * tile
+                rects.append((left, top, min(column * tile, width) - left, rect_height))
+        return rects
+
+
+# ============================================================================
+# RITMO ADAPTATIVO
+# ============================================================================
+
+class AdaptiveRate:
+    """Ritmo y resolución del stream según lo rápido que el cliente lo consume.
+
+    Cada ADAPT_PERIOD se revisa cuántas veces un frame tuvo que esperar
+    confirmaciones: si el cliente se atrasa se baja la resolución y, ya en
+    la mínima, los fps. Con el cliente holgado (confirma antes del siguiente
+    frame) suben primero los fps y luego la resolución.
+    """
+
+    def __init__(self, max_fps=DEFAULT_FPS):
+        self.max_fps = max_fps
+        self.fps = max_fps
+        self.scale_index = 0
+        self.rtt = None
+        self._in_flight = {}  # seq -> instante de envío
+        self._stalls = 0
+        self._healthy_periods = 0
+        self._period_start = time.perf_counter()
+
+    @property
+    def scale(self):
+        return SCALES[self.scale_index]
+
+    @property
+    def interval(self):
+        return 1.0 / self.fps
+
+    def window_open(self, now):
+        # Confirmaciones perdidas (o un cliente colgado) no bloquean el stream para siempre
+        for seq in [seq for seq, sent_at in self._in_flight.items() if now - sent_at > ACK_TIMEOUT]:
+            del self._in_flight[seq]
+        return len(self._in_flight) < MAX_IN_FLIGHT
+
+    def sent(self, seq, now):
+        self._in_flight[seq] = now
+
+    def acked(self, seq, now):
+        sent_at = self._in_flight.pop(seq, None)
+        for older in [older for older in self._in_flight if older < seq]:
+            del self._in_flight[older]  # Las confirmaciones son acumulativas
+        if sent_at is not None:
+            rtt = now - sent_at
+            self.rtt = rtt if self.rtt is None else self.rtt + (rtt - self.rtt) / 8
+
+    def stalled(self):
+        self._stalls += 1
+
+    def adapt(self, now):
+        """Revisa el periodo. Retorna True si cambió la escala (el próximo frame va completo)"""
+        if now - self._period_start < ADAPT_PERIOD:
+            return False
+        self._period_start = now
+        stalls, self._stalls = self._stalls, 0
+
+        if stalls:
+            self._healthy_periods = 0
+            if self.scale_index < len(SCALES) - 1:
+                self.scale_index += 1
+                return True
+            self.fps = max(MIN_FPS, self.fps * 0.7)
+            return False
+
+        if self.rtt is not None and self.rtt < self.interval:
+            self._healthy_periods += 1
+            if self.fps < self.max_fps:
+                self.fps = min(self.max_fps, self.fps * 1.25)
+            elif self.scale_index > 0 and self._healthy_periods >= RECOVER_PERIODS:
+                self.scale_index -= 1
+                self._healthy_periods = 0
+                return True
+        return False
+
+
+# ============================================================================
+# STREAMER
+# ============================================================================
+
+class ScreenStreamer:
+    """Sesiones de vista en vivo. ``capture_factory()`` crea la fuente de cada sesión"""
+
+    def __init__(self, capture_factory, max_fps=DEFAULT_FPS, quality=JPEG_QUALITY):
+        self._capture_factory = capture_factory
+        self.max_fps = max_fps
+        self.quality = quality
+        self.stats = {
+            'active': 0,
+            'frames': 0,
+            'keyframes': 0,
+            'tiles': 0,
+            'bytes': 0,
+            'unchanged': 0,
+            'encode_ms': None,
+            'fps': None,
+            'scale': None,
+            'rtt_ms': None
+        }
+
+    def serve(self, send, receive):
+        """Atiende una sesión hasta que la conexión se cierre (la excepción la maneja quien llama).
+
+        ``send(bytes)`` envía un frame; ``receive(timeout)`` retorna el próximo
+        mensaje del cliente o None. El cliente envía ``{"ack": seq}`` después de
+        dibujar cada frame y ``{"keyframe": true}`` para pedir uno completo.
+        """
+        capture = self._capture_factory()
+        encoder = TileEncoder(quality=self.quality)
+        rate = AdaptiveRate(self.max_fps)
+        stats = self.stats
+        seq = 0
+        next_due = time.perf_counter()
+        waiting = False
+        stats['active'] += 1
+        try:
+            while True:
+                now = time.perf_counter()
+                timeout = max(0.0, next_due - now) if rate.window_open(now) else ADAPT_PERIOD / 10
+                message = receive(timeout)
+                if message is not None:
+                    self._handle_message(message, rate, encoder)
+                    continue
+
+                now = time.perf_counter()
+                if now < next_due:
+                    continue
+                if not rate.window_open(now):
+                    if not waiting:
+                        rate.stalled()  # Una vez por frame demorado, no por cada espera
+                        waiting = True
+                    continue
+                waiting = False
+
+                if rate.adapt(now):
+                    encoder.reset()
+                next_due = now + rate.interval
+
+                image, area = capture.grab()
+                if rate.scale != 1.0:
+                    image = image.resize((max(1, round(image.width * rate.scale)),
+                                          max(1, round(image.height * rate.scale))), Image.BILINEAR)
+                started = time.perf_counter()
+                payload, tiles = encoder.encode(image, area, seq + 1)
+                encode_ms = (time.perf_counter() - started) * 1000
+                stats['encode_ms'] = round(encode_ms if stats['encode_ms'] is None
+                                           else stats['encode_ms'] + (encode_ms - stats['encode_ms']) / 8, 2)
+                if payload is None:
+                    stats['unchanged'] += 1
+                    continue
+
+                seq += 1
+                send(payload)
+                rate.sent(seq, time.perf_counter())
+                stats['frames'] += 1
+                stats['keyframes'] += payload[5] & FLAG_KEYFRAME
+                stats['tiles'] += tiles
+                stats['bytes'] += len(payload)
+                stats['fps'] = round(rate.fps, 1)
+                stats['scale'] = rate.scale
+                stats['rtt_ms'] = round(rate.rtt * 1000, 1) if rate.rtt is not None else None
+        finally:
+            stats['active'] -= 1
+            capture.close()
+
+    def _handle_message(self, message, rate, encoder):
+        try:
+            data = json.loads(message)
+        except (TypeError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        if isinstance(data.get('ack'), int):
+            rate.acked(data['ack'], time.perf_counter())
+        if data.get('keyframe'):
+            encoder.reset()
+
+
+def create_capture(name, width=1920, height=1080, origin=(0, 0)):
+    """Fuente de captura por nombre ('screen' o 'synthetic')"""
+    if name == 'synthetic':
+        return SyntheticCapture(width, height, origin)
+    if name == 'screen':
+        return ScreenCapture()
+    raise ValueError(f'Fuente de captura desconocida: {name} (opciones: screen, synthetic)')
+
+
+def benchmark(frames, width, height, quality, tile):
+    """Mide el encoder con frames sintéticos (sin pantalla)"""
+    capture = SyntheticCapture(width, height)
+    encoder = TileEncoder(tile=tile, quality=quality)
+    total_bytes = total_tiles = 0
+    encode_times = []
+    for seq in range(1, frames + 1):
+        image, area = capture.grab()
+        started = time.perf_counter()
+        payload, tiles = encoder.encode(image, area, seq)
+        encode_times.append(time.perf_counter() - started)
+        total_bytes += len(payload) if payload else 0
+        total_tiles += tiles
+
+    encode_times.sort()
+    grid_tiles = -(-width // tile) * -(-height // tile)
+    return {
+        'frames': frames,
+        'size': f'{width}x{height}',
+        'diff': 'numpy' if np is not None else 'bytes',
+        'tiles_per_frame': round(total_tiles / frames, 1),
+        'grid_tiles': grid_tiles,
+        'kb_per_frame': round(total_bytes / frames / 1024, 1),
+        'encode_p50_ms': round(encode_times[len(encode_times) // 2] * 1000, 2),
+        'encode_p95_ms': round(encode_times[int(len(encode_times) * 0.95)] * 1000, 2),
+        'max_fps': round(1 / (sum(encode_times) / frames), 1)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark del encoder de la vista en vivo (frames sintéticos)')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--size', default='1920x1080', help='ANCHOxALTO (default: 1920x1080)')
+    parser.add_argument('--quality', type=int, default=JPEG_QUALITY)
+    parser.add_argument('--tile', type=int, default=TILE_SIZE)
+    args = parser.parse_args()
+
+    if not stream_available():
+        raise SystemExit('❌ Pillow no está instalado (pip install Pillow)')
+    width, height = (int(value) for value in args.size.lower().split('x'))
+    print(json.dumps(benchmark(args.frames, width, height, args.quality, args.tile), indent=2))
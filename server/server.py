@@ -6,13 +6,42 @@ Recibe texto via HTTP y lo simula como escritura
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from pynput.keyboard import Controller, Key
-from pynput.mouse import Controller as MouseController
-import pyautogui
+import argparse
+import os
 import socket
 import threading
 import time
+import json
 import logging
+import signal
+
+from input_dispatcher import BatchTooLarge, InputDispatcher, QueueFull
+from screen_geometry import ScreenGeometry
+from input_backends import BACKENDS, MOUSE_BUTTONS, ClipboardUnavailable, FailSafeTriggered, create_backend
+from screen_layout import describe_layout, parse_monitor_spec
+from latency_profiles import DEFAULT_PROFILE, LATENCY_PROFILES
+from wire_format import BINARY_CONTENT_TYPE, PointerEvent, WireFormatError, decode_events
+from udp_listener import UDPPointerListener
+from keymap import SHORTCUTS, SPECIAL_KEYS, KeySpecError, compile_sequence
+from async_server import AsyncHTTPServer
+from metrics import Metrics
+from session_recorder import SessionRecorder, SessionFormatError, replay_session
+from typing_jobs import DEFAULT_RATE, TYPING_MODES, TypingJobManager, is_bulk_text
+from pointer_motion import ACCELERATION_CURVES, DEFAULT_CURVE, RelativePointer
+from jitter_buffer import DEFAULT_TARGET, JitterBuffer
+from screen_stream import DEFAULT_FPS, ScreenStreamer, create_capture, stream_available
+from cursor_feedback import CursorFeedback
+from clipboard_sync import MAX_CLIPBOARD_BYTES, ClipboardSync, ClipboardTooLarge
+from file_transfer import FileTransfers, TransferError
+from admission import DEFAULT_REQUEST_BURST, DEFAULT_REQUEST_RATE, RateLimiter
+from action_schema import MAX_SCROLL_AMOUNT, MOUSE_ACTIONS, is_number, key_sequence
+from action_schema import validate_action as validate_schema
+
+try:
+    # Canal WebSocket persistente (opcional: sin flask-sock solo queda la API REST)
+    from flask_sock import Sock, ConnectionClosed
+except ImportError:
+    Sock = None
 
 # ============================================================================
 # CONFIGURACIÓN DE DEBUG
@@ -22,8 +51,62 @@ import logging
 DEBUG_MODE = False
 # ============================================================================
 
+def parse_args(argv=None):
+    """Opciones de arranque del servidor"""
+    parser = argparse.ArgumentParser(description='Remote Typing Server')
+    parser.add_argument('--backend', choices=sorted(BACKENDS),
+                        default=os.environ.get('MULTICOMPUTER_BACKEND', 'pyautogui'),
+                        help="Backend de inyección: 'pyautogui' (real) o 'null' (sin pantalla, solo registra)")
+    parser.add_argument('--record-calls', metavar='ARCHIVO', default=None,
+                        help="Con --backend null, guarda cada llamada con su marca de tiempo en ARCHIVO")
+    parser.add_argument('--null-monitors', metavar='SPEC', type=parse_monitor_spec, default=None,
+                        help="Con --backend null, simula varios monitores (ej. '1920x1080+0+0,1280x1024-1280+0')")
+    parser.add_argument('--port', type=int, default=5000, help='Puerto HTTP (default: 5000)')
+    parser.add_argument('--latency-profile', choices=sorted(LATENCY_PROFILES), default=DEFAULT_PROFILE,
+                        help=f'Perfil de latencia por defecto (default: {DEFAULT_PROFILE})')
+    parser.add_argument('--udp-port', type=int, default=None,
+                        help='Habilita el camino rápido UDP para move/drag_move/scroll en este puerto')
+    parser.add_argument('--record', metavar='ARCHIVO', default=None,
+                        help='Graba cada acción aceptada con su instante en ARCHIVO (formato compacto)')
+    parser.add_argument('--replay', metavar='ARCHIVO', default=None,
+                        help='Reproduce una sesión grabada con --record y termina (sin servidor HTTP)')
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help='Velocidad de --replay: 1 = tiempos originales, 2 = doble, 0 = lo más rápido posible')
+    parser.add_argument('--typing-rate', type=float, default=DEFAULT_RATE,
+                        help='Teclas por segundo de la escritura masiva (default: 0 = lo más rápido posible)')
+    parser.add_argument('--pointer-accel', choices=sorted(ACCELERATION_CURVES), default=DEFAULT_CURVE,
+                        help=f'Curva de aceleración del movimiento relativo (default: {DEFAULT_CURVE})')
+    parser.add_argument('--jitter-target', type=float, default=DEFAULT_TARGET * 1000, metavar='MS',
+                        help='Retardo máximo del buffer de jitter para move/drag_move con marca de '
+                             f'tiempo (default: {DEFAULT_TARGET * 1000:g} ms, 0 = deshabilitado)')
+    parser.add_argument('--capture', choices=('auto', 'screen', 'synthetic'), default='auto',
+                        help="Fuente de la vista en vivo (/screen/stream): 'screen', 'synthetic' (frames "
+                             "generados, sin pantalla) o 'auto' (synthetic con --backend null)")
+    parser.add_argument('--stream-fps', type=float, default=DEFAULT_FPS,
+                        help=f'Frames por segundo máximos de la vista en vivo (default: {DEFAULT_FPS})')
+    parser.add_argument('--transfer-dir', metavar='DIRECTORIO',
+                        default=os.path.join(os.path.expanduser('~'), 'MultiKeyboard'),
+                        help='Directorio de /files para subir y descargar archivos (default: ~/MultiKeyboard)')
+    parser.add_argument('--clipboard-max', type=float, default=MAX_CLIPBOARD_BYTES / (1024 * 1024), metavar='MB',
+                        help=f'Tamaño máximo del contenido de /clipboard en MB '
+                             f'(default: {MAX_CLIPBOARD_BYTES // (1024 * 1024)})')
+    parser.add_argument('--rate-limit', type=float, default=DEFAULT_REQUEST_RATE, metavar='N',
+                        help=f'Solicitudes de entrada por segundo por cliente; sobre eso responde 429 '
+                             f'(0 = sin límite, default: {DEFAULT_REQUEST_RATE})')
+    parser.add_argument('--rate-burst', type=float, default=DEFAULT_REQUEST_BURST, metavar='N',
+                        help=f'Ráfaga máxima por cliente por sobre --rate-limit (default: {DEFAULT_REQUEST_BURST})')
+    parser.add_argument('--mode', choices=('flask', 'async'), default='flask',
+                        help="Servidor HTTP: 'flask' (Werkzeug, incluye /ws) o 'async' "
+                             "(asyncio, keep-alive y TCP_NODELAY, para producción)")
+    return parser.parse_args(argv)
+
+# Al importarse como módulo se usan las opciones por defecto
+ARGS = parse_args() if __name__ == '__main__' else parse_args([])
+
 app = Flask(__name__)
-CORS(app)  # Permite conexiones desde cualquier origen
+# Permite conexiones desde cualquier origen (y leer los headers de /clipboard y /files)
+CORS(app, expose_headers=['ETag', 'X-Content-SHA256', 'X-Upload-Offset', 'Content-Range'])
+sock = Sock(app) if Sock is not None else None
 
 # Configurar logging de Flask
 if not DEBUG_MODE:
@@ -31,12 +114,21 @@ if not DEBUG_MODE:
     log = logging.getLogger('werkzeug')
     log.setLevel(logging.ERROR)
 
-keyboard = Controller()
-mouse = MouseController()
+# Backend de inyección de mouse y teclado
+backend = create_backend(ARGS.backend, record_path=ARGS.record_calls, monitors=ARGS.null_monitors)
+
+# Perfil de latencia usado cuando la sesión o el request no eligen otro
+default_latency_profile = LATENCY_PROFILES[ARGS.latency_profile]
+
+def resolve_profile(data):
+    """Perfil de latencia de una acción (campo 'profile' o el perfil por defecto)"""
+    return LATENCY_PROFILES.get(data.get('profile'), default_latency_profile)
+
+# Posición autoritativa del cursor para move_rel (modo touchpad)
+pointer = RelativePointer(backend.position, ACCELERATION_CURVES[ARGS.pointer_accel])
 
-# Configurar pyautogui para mayor seguridad
-pyautogui.FAILSAFE = True  # Mover mouse a esquina superior izquierda para parar
-pyautogui.PAUSE = 0.1  # Pausa entre comandos
+# Contadores e histogramas de latencia por etapa (expuestos en /metrics)
+metrics = Metrics()
 
 # Estado de conexión
 connection_status = {
@@ -56,13 +148,12 @@ def get_local_ip():
         return "localhost"
 
 def get_screen_info():
-    """Obtiene información de la pantalla"""
+    """Obtiene información de la pantalla (todos los monitores, con sus orígenes y escalas)"""
     try:
-        screen_width, screen_height = pyautogui.size()
-        return {
-            'width': screen_width,
-            'height': screen_height,
-            'monitors': [
+        monitors = backend.monitors()
+        if not monitors:
+            screen_width, screen_height = backend.screen_size()
+            monitors = [
                 {
                     'id': 1,
                     'name': 'Monitor Principal',
@@ -73,83 +164,143 @@ def get_screen_info():
                     'primary': True
                 }
             ]
-        }
+        return describe_layout(monitors)
     except Exception as e:
         print(f"⚠️  Error obteniendo información de pantalla: {e}")
+        return describe_layout([
+            {
+                'id': 1,
+                'name': 'Monitor Principal (Fallback)',
+                'x': 0,
+                'y': 0,
+                'width': 1920,
+                'height': 1080,
+                'primary': True
+            }
+        ])
+
+# Geometría en caché: el camino de clamping no consulta al servidor gráfico por evento
+screen_geometry = ScreenGeometry(get_screen_info)
+
+def create_stream_capture():
+    """Fuente de captura de cada sesión de la vista en vivo"""
+    name = ARGS.capture if ARGS.capture != 'auto' else ('synthetic' if backend.name == 'null' else 'screen')
+    layout = screen_geometry.layout
+    return create_capture(name, layout.width, layout.height, origin=(layout.x, layout.y))
+
+# Vista en vivo (/screen/stream): solo se envían los tiles que cambiaron. Necesita Pillow
+screen_streamer = ScreenStreamer(create_stream_capture, max_fps=ARGS.stream_fps) if stream_available() else None
+
+def stop_on_sigterm(signum, frame):
+    """SIGTERM (ej. ``terminate()`` del benchmark) sigue el mismo cierre que Ctrl+C:
+    así el registro de --record-calls y la grabación de --record se vuelcan a disco"""
+    raise KeyboardInterrupt
+
+def on_screen_change(screen_info):
+    """Avisa cuando cambia la configuración de pantalla"""
+    print(f"📺 Pantalla cambió: {screen_info['width']}x{screen_info['height']}")
+
+def respond(result):
+    """Convierte (respuesta, código HTTP) en una respuesta de Flask"""
+    payload, status_code = result
+    if payload is None:
+        return '', status_code
+    if isinstance(payload, str):
+        return app.response_class(payload, status=status_code, mimetype='text/plain')
+    return jsonify(payload), status_code
+
+# Los handlers *_response(req) reciben el request (de Flask o del servidor asyncio)
+# y retornan (respuesta, código HTTP); ambos servidores comparten la misma lógica
+
+def screen_response(req):
+    """Información de la pantalla desde la caché"""
+    try:
         return {
-            'width': 1920,
-            'height': 1080,
-            'monitors': [
-                {
-                    'id': 1,
-                    'name': 'Monitor Principal (Fallback)',
-                    'x': 0,
-                    'y': 0,
-                    'width': 1920,
-                    'height': 1080,
-                    'primary': True
-                }
-            ]
-        }
+            'status': 'success',
+            'screen': screen_geometry.info,
+            'version': screen_geometry.version
+        }, 200
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}, 500
 
 @app.route('/screen', methods=['GET'])
 def get_screen():
     """Endpoint para obtener información de la pantalla"""
+    return respond(screen_response(request))
+
+def refresh_screen_response(req):
+    """Vuelve a consultar la geometría y avisa si cambió"""
     try:
-        screen_info = get_screen_info()
-        return jsonify({
+        changed = screen_geometry.refresh()
+        if changed:
+            on_screen_change(screen_geometry.info)
+        return {
             'status': 'success',
-            'screen': screen_info
-        })
+            'changed': changed,
+            'screen': screen_geometry.info,
+            'version': screen_geometry.version
+        }, 200
     except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+        return {'status': 'error', 'message': str(e)}, 500
 
-@app.route('/mouse', methods=['POST'])
-def handle_mouse():
-    """Endpoint para manejar movimientos y clicks de mouse"""
+@app.route('/screen/refresh', methods=['POST'])
+def refresh_screen():
+    """Endpoint para invalidar la caché de geometría tras un cambio de pantalla"""
+    return respond(refresh_screen_response(request))
+
+def apply_mouse_action(data):
+    """Ejecuta una acción de mouse y retorna (respuesta, código HTTP)"""
     try:
-        data = request.get_json()
+        data = data or {}
         action = data.get('action', '')
-        x = data.get('x', 0)
-        y = data.get('y', 0)
+        x = data.get('x')
+        y = data.get('y')
         button = data.get('button', 'left')  # left, right, middle
 
-        # Validar coordenadas
-        screen_info = get_screen_info()
-        max_x = screen_info['width']
-        max_y = screen_info['height']
-
-        # Asegurar que las coordenadas estén dentro de los límites
-        x = max(0, min(x, max_x - 1))
-        y = max(0, min(y, max_y - 1))
+        # Validar coordenadas contra la geometría en caché (índice de monitores precalculado)
+        layout = screen_geometry.layout
+
+        if action == 'move_rel':
+            # El servidor aplica la curva de aceleración sobre su propia posición del cursor
+            x, y = pointer.move_by(data.get('dx', 0), data.get('dy', 0), layout,
+                                   samples=data.get('samples', 1),
+                                   curve=ACCELERATION_CURVES.get(data.get('accel')))
+        elif data.get('nx') is not None:
+            # Coordenadas normalizadas (0..1) del escritorio virtual o de un monitor
+            x, y = layout.from_normalized(data.get('nx'), data.get('ny'), data.get('monitor'))
+        elif x is None or y is None:
+            # Sin coordenadas se usa la posición actual del cursor (ej. tap en modo touchpad)
+            current_x, current_y = pointer.position(layout)
+            x = current_x if x is None else x
+            y = current_y if y is None else y
+
+        # Asegurar que las coordenadas caigan en algún monitor (huecos y bordes incluidos)
+        x, y = layout.clamp(x, y)
+        if action != 'move_rel':
+            pointer.sync(x, y)
+
+        # Botón desconocido: usar el izquierdo como antes
+        button = button if button in MOUSE_BUTTONS else 'left'
+        profile = resolve_profile(data)
 
         if action == 'move':
-            pyautogui.moveTo(x, y, duration=0.1)
+            backend.move(x, y, duration=profile.tween('move'))
             message = f'Mouse moved to ({x}, {y})' if DEBUG_MODE else 'OK'
 
+        elif action == 'move_rel':
+            backend.move(x, y, duration=profile.tween('move_rel'))
+            message = f'Mouse moved by ({data.get("dx", 0)}, {data.get("dy", 0)}) to ({x}, {y})'
+
         elif action == 'click':
-            # Mapear botones
-            button_map = {
-                'left': 'left',
-                'right': 'right',
-                'middle': 'middle'
-            }
-            pyautogui.click(x, y, button=button_map.get(button, 'left'))
+            backend.click(x, y, button=button)
             message = f'Mouse {button} click at ({x}, {y})'
             if DEBUG_MODE:
                 print(f"🖱️  {message}")
 
         elif action == 'drag_start':
-            # Iniciar drag realtime - presionar botón y mantener
-            button_map = {
-                'left': 'left',
-                'right': 'right',
-                'middle': 'middle'
-            }
-
-            # Mover a posición inicial y presionar botón
-            pyautogui.moveTo(x, y, duration=0.05)
-            pyautogui.mouseDown(button=button_map.get(button, 'left'))
+            # Iniciar drag realtime - mover a posición inicial, presionar botón y mantener
+            backend.move(x, y, duration=profile.tween('drag_start'))
+            backend.button_down(button)
 
             message = f'Drag start at ({x}, {y})'
             if DEBUG_MODE:
@@ -157,21 +308,15 @@ def handle_mouse():
 
         elif action == 'drag_move':
             # Mover durante drag realtime - solo mover el mouse (botón ya presionado)
-            pyautogui.moveTo(x, y, duration=0.02)  # Movimiento muy rápido para realtime
+            backend.move(x, y, duration=profile.tween('drag_move'))
 
             # No hacer log para evitar spam
             message = f'Drag move to ({x}, {y})'
 
         elif action == 'drag_end':
             # Finalizar drag realtime - mover a posición final y soltar botón
-            button_map = {
-                'left': 'left',
-                'right': 'right',
-                'middle': 'middle'
-            }
-
-            pyautogui.moveTo(x, y, duration=0.05)
-            pyautogui.mouseUp(button=button_map.get(button, 'left'))
+            backend.move(x, y, duration=profile.tween('drag_end'))
+            backend.button_up(button)
 
             message = f'Drag end at ({x}, {y})'
             if DEBUG_MODE:
@@ -181,303 +326,942 @@ def handle_mouse():
             # Para drag necesitamos coordenadas de destino
             to_x = data.get('to_x', x)
             to_y = data.get('to_y', y)
-            to_x = max(0, min(to_x, max_x - 1))
-            to_y = max(0, min(to_y, max_y - 1))
-
-            # Mapear botones para drag
-            button_map = {
-                'left': 'left',
-                'right': 'right',
-                'middle': 'middle'
-            }
-
-            # Implementar drag correctamente:
-            # 1. Mover a la posición inicial
-            # 2. Presionar el botón
-            # 3. Arrastrar a la posición final
-            # 4. Soltar el botón
+            to_x, to_y = layout.clamp(to_x, to_y)
+            pointer.sync(to_x, to_y)
 
+            # 1. Mover a la posición inicial  2. Presionar el botón
+            # 3. Arrastrar a la posición final  4. Soltar el botón
+            backend.move(x, y, duration=profile.tween('drag_approach'))
+            backend.button_down(button)
             try:
-                # Mover a posición inicial
-                pyautogui.moveTo(x, y, duration=0.1)
-
-                # Hacer el drag desde la posición actual hasta la final
-                pyautogui.dragTo(to_x, to_y, duration=0.3, button=button_map.get(button, 'left'))
-
-                message = f'Mouse drag from ({x}, {y}) to ({to_x}, {to_y})'
-                if DEBUG_MODE:
-                    print(f"🖱️  {message}")
-
-            except Exception as drag_error:
-                # Si dragTo falla, intentar método alternativo
-                if DEBUG_MODE:
-                    print(f"⚠️  dragTo falló, usando método alternativo: {drag_error}")
+                backend.move(to_x, to_y, duration=profile.tween('drag'))
+            finally:
+                backend.button_up(button)
 
-                # Método alternativo: mouseDown, moveTo, mouseUp
-                pyautogui.moveTo(x, y, duration=0.1)
-                pyautogui.mouseDown(button=button_map.get(button, 'left'))
-                pyautogui.moveTo(to_x, to_y, duration=0.3)
-                pyautogui.mouseUp(button=button_map.get(button, 'left'))
-
-                message = f'Mouse drag (alternative) from ({x}, {y}) to ({to_x}, {to_y})'
-                if DEBUG_MODE:
-                    print(f"🖱️  {message}")
+            message = f'Mouse drag from ({x}, {y}) to ({to_x}, {to_y})'
+            if DEBUG_MODE:
+                print(f"🖱️  {message}")
 
         elif action == 'scroll':
-            scroll_amount = data.get('amount', 1)
-
-            # Temporalmente reducir pausa para scroll más responsivo
-            original_pause = pyautogui.PAUSE
-            pyautogui.PAUSE = 0.01  # Pausa mínima para scroll
-
-            pyautogui.scroll(scroll_amount, x=x, y=y)
-
-            # Restaurar pausa original
-            pyautogui.PAUSE = original_pause
+            scroll_amount = max(-MAX_SCROLL_AMOUNT, min(MAX_SCROLL_AMOUNT, data.get('amount', 1)))
+            backend.scroll(scroll_amount, x=x, y=y)
 
             message = f'Mouse scroll {scroll_amount} at ({x}, {y})'
             if DEBUG_MODE:
                 print(f"🖱️  {message}")
 
         else:
-            return jsonify({'status': 'error', 'message': f'Acción no reconocida: {action}'}), 400
+            return {'status': 'error', 'message': f'Acción no reconocida: {action}'}, 400
+
+        # Pausa del perfil: solo duerme el hilo despachador, nunca cambia estado global
+        pause = profile.pause(action)
+        if pause:
+            time.sleep(pause)
 
         connection_status['last_activity'] = time.time()
 
         # Respuestas optimizadas para baja latencia
-        if action == 'move' and not DEBUG_MODE:
-            return jsonify({'status': 'success'})
+        if action in ('move', 'move_rel') and not DEBUG_MODE:
+            return {'status': 'success'}, 200
         elif action == 'scroll' and not DEBUG_MODE:
             # Respuesta mínima para scroll - máxima velocidad
-            return jsonify({'status': 'success'})
+            return {'status': 'success'}, 200
         elif action == 'drag_move':
             # Respuesta ultra-rápida para drag realtime - sin JSON para máxima velocidad
-            return '', 200
+            return None, 200
         else:
-            return jsonify({
+            return {
                 'status': 'success',
                 'message': message,
                 'coordinates': {'x': x, 'y': y}
-            })
+            }, 200
+
+    except FailSafeTriggered:
+        metrics.count('failsafe')
+        return {'status': 'error', 'message': 'FailSafe activado - mouse movido a esquina'}, 400
+    except Exception as e:
+        return {'status': 'error', 'message': f'Error de mouse: {str(e)}'}, 500
+
+def mouse_response(req):
+    """Encola una acción de mouse (JSON) o eventos de puntero en formato binario"""
+    if req.mimetype == BINARY_CONTENT_TYPE:
+        return enqueue_binary(req.get_data(), req.headers.get('X-Latency-Profile'), req.remote_addr)
+    return enqueue_action(request_action(req), req.remote_addr)
+
+@app.route('/mouse', methods=['POST'])
+def handle_mouse():
+    """Endpoint para manejar movimientos y clicks de mouse"""
+    return respond(mouse_response(request))
+
+def run_key_plan(plan):
+    """Ejecuta un plan precompilado de (presionar?, tecla).
+
+    Si algo falla a mitad de camino se sueltan las teclas que quedaron presionadas.
+    """
+    held = []
+    try:
+        for is_down, key in plan:
+            if is_down:
+                backend.key_down(key)
+                held.append(key)
+            else:
+                backend.key_up(key)
+                held.remove(key)
+    finally:
+        for key in reversed(held):
+            backend.key_up(key)
+
+def apply_special_key(data):
+    """Presiona una tecla especial y retorna (respuesta, código HTTP)"""
+    try:
+        data = data or {}
+        entry = SPECIAL_KEYS.get(data.get('key', ''))
+        if entry is None:
+            return {'status': 'error', 'message': 'Tecla especial no reconocida'}, 400
+
+        run_key_plan(entry.plan)
+        connection_status['last_activity'] = time.time()
+
+        # Solo mostrar mensaje de debug si está habilitado
+        if DEBUG_MODE:
+            print(f"🔑 Special key: {entry.label}")
+
+        return {
+            'status': 'success',
+            'message': f'Special key: {entry.label}' if DEBUG_MODE else 'OK'
+        }, 200
 
-    except pyautogui.FailSafeException:
-        return jsonify({'status': 'error', 'message': 'FailSafe activado - mouse movido a esquina'}), 400
     except Exception as e:
-        return jsonify({'status': 'error', 'message': f'Error de mouse: {str(e)}'}), 500
+        return {'status': 'error', 'message': str(e)}, 500
 
 @app.route('/special', methods=['POST'])
 def handle_special_key():
     """Endpoint para manejar teclas especiales como backspace, enter, etc."""
+    return respond(enqueue_action(request_action(request, 'special')))
+
+def apply_shortcut(data):
+    """Ejecuta un shortcut y retorna (respuesta, código HTTP)"""
     try:
-        data = request.get_json()
-        key = data.get('key', '')
-
-        if key == 'backspace':
-            keyboard.press(Key.backspace)
-            keyboard.release(Key.backspace)
-            action = 'Backspace'
-        elif key == 'enter':
-            keyboard.press(Key.enter)
-            keyboard.release(Key.enter)
-            action = 'Enter'
-        elif key == 'tab':
-            keyboard.press(Key.tab)
-            keyboard.release(Key.tab)
-            action = 'Tab'
-        elif key == 'escape':
-            keyboard.press(Key.esc)
-            keyboard.release(Key.esc)
-            action = 'Escape'
-        elif key == 'delete':
-            keyboard.press(Key.delete)
-            keyboard.release(Key.delete)
-            action = 'Delete'
-        elif key == 'space':
-            keyboard.press(Key.space)
-            keyboard.release(Key.space)
-            action = 'Space'
-        elif key == 'arrow_up':
-            keyboard.press(Key.up)
-            keyboard.release(Key.up)
-            action = 'Arrow Up'
-        elif key == 'arrow_down':
-            keyboard.press(Key.down)
-            keyboard.release(Key.down)
-            action = 'Arrow Down'
-        elif key == 'arrow_left':
-            keyboard.press(Key.left)
-            keyboard.release(Key.left)
-            action = 'Arrow Left'
-        elif key == 'arrow_right':
-            keyboard.press(Key.right)
-            keyboard.release(Key.right)
-            action = 'Arrow Right'
-        else:
-            return jsonify({'status': 'error', 'message': 'Tecla especial no reconocida'}), 400
+        data = data or {}
+        # El modificador Cmd/Ctrl ya viene resuelto en la tabla según el sistema operativo
+        entry = SHORTCUTS.get(data.get('shortcut', ''))
+        if entry is None:
+            return {'status': 'error', 'message': 'Shortcut no reconocido'}, 400
 
+        run_key_plan(entry.plan)
         connection_status['last_activity'] = time.time()
 
         # Solo mostrar mensaje de debug si está habilitado
         if DEBUG_MODE:
-            print(f"🔑 Special key: {action}")
+            print(f"⚡ Shortcut: {entry.label}")
 
-        return jsonify({
+        return {
             'status': 'success',
-            'message': f'Special key: {action}' if DEBUG_MODE else 'OK'
-        })
+            'message': f'Shortcut: {entry.label}' if DEBUG_MODE else 'OK'
+        }, 200
 
     except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+        return {'status': 'error', 'message': str(e)}, 500
 
 @app.route('/shortcut', methods=['POST'])
 def handle_shortcut():
     """Endpoint para manejar shortcuts/comandos rápidos como Ctrl+C, Cmd+V, etc."""
-    try:
-        data = request.get_json()
-        shortcut = data.get('shortcut', '')
-
-        # Detectar sistema operativo para usar Cmd en Mac o Ctrl en Windows/Linux
-        import platform
-        is_mac = platform.system() == 'Darwin'
-        ctrl_key = Key.cmd if is_mac else Key.ctrl
-
-        if shortcut == 'select_all':  # Ctrl/Cmd + A
-            with keyboard.pressed(ctrl_key):
-                keyboard.press('a')
-                keyboard.release('a')
-            action = f'{"Cmd" if is_mac else "Ctrl"} + A (Select All)'
-
-        elif shortcut == 'copy':  # Ctrl/Cmd + C
-            with keyboard.pressed(ctrl_key):
-                keyboard.press('c')
-                keyboard.release('c')
-            action = f'{"Cmd" if is_mac else "Ctrl"} + C (Copy)'
-
-        elif shortcut == 'paste':  # Ctrl/Cmd + V
-            with keyboard.pressed(ctrl_key):
-                keyboard.press('v')
-                keyboard.release('v')
-            action = f'{"Cmd" if is_mac else "Ctrl"} + V (Paste)'
-
-        elif shortcut == 'undo':  # Ctrl/Cmd + Z
-            with keyboard.pressed(ctrl_key):
-                keyboard.press('z')
-                keyboard.release('z')
-            action = f'{"Cmd" if is_mac else "Ctrl"} + Z (Undo)'
-
-        elif shortcut == 'redo':  # Ctrl/Cmd + Y
-            with keyboard.pressed(ctrl_key):
-                keyboard.press('y')
-                keyboard.release('y')
-            action = f'{"Cmd" if is_mac else "Ctrl"} + Y (Redo)'
-
-        elif shortcut == 'cut':  # Ctrl/Cmd + X
-            with keyboard.pressed(ctrl_key):
-                keyboard.press('x')
-                keyboard.release('x')
-            action = f'{"Cmd" if is_mac else "Ctrl"} + X (Cut)'
-
-        elif shortcut == 'save':  # Ctrl/Cmd + S
-            with keyboard.pressed(ctrl_key):
-                keyboard.press('s')
-                keyboard.release('s')
-            action = f'{"Cmd" if is_mac else "Ctrl"} + S (Save)'
-
-        elif shortcut == 'find':  # Ctrl/Cmd + F
-            with keyboard.pressed(ctrl_key):
-                keyboard.press('f')
-                keyboard.release('f')
-            action = f'{"Cmd" if is_mac else "Ctrl"} + F (Find)'
-
-        elif shortcut == 'new':  # Ctrl/Cmd + N
-            with keyboard.pressed(ctrl_key):
-                keyboard.press('n')
-                keyboard.release('n')
-            action = f'{"Cmd" if is_mac else "Ctrl"} + N (New)'
-
-        elif shortcut == 'open':  # Ctrl/Cmd + O
-            with keyboard.pressed(ctrl_key):
-                keyboard.press('o')
-                keyboard.release('o')
-            action = f'{"Cmd" if is_mac else "Ctrl"} + O (Open)'
-
-        elif shortcut == 'print':  # Ctrl/Cmd + P
-            with keyboard.pressed(ctrl_key):
-                keyboard.press('p')
-                keyboard.release('p')
-            action = f'{"Cmd" if is_mac else "Ctrl"} + P (Print)'
-
-        elif shortcut == 'refresh':  # Ctrl/Cmd + R
-            with keyboard.pressed(ctrl_key):
-                keyboard.press('r')
-                keyboard.release('r')
-            action = f'{"Cmd" if is_mac else "Ctrl"} + R (Refresh)'
-
-        else:
-            return jsonify({'status': 'error', 'message': 'Shortcut no reconocido'}), 400
+    return respond(enqueue_action(request_action(request, 'shortcut')))
 
+def apply_keys(data):
+    """Ejecuta una combinación o secuencia arbitraria de teclas y retorna (respuesta, código HTTP)"""
+    try:
+        data = data or {}
+        sequence = key_sequence(data)
+        run_key_plan(compile_sequence(sequence))
         connection_status['last_activity'] = time.time()
 
-        # Solo mostrar mensaje de debug si está habilitado
         if DEBUG_MODE:
-            print(f"⚡ Shortcut: {action}")
+            print(f"⌨️  Keys: {' '.join(sequence)}")
 
-        return jsonify({
+        return {
             'status': 'success',
-            'message': f'Shortcut: {action}' if DEBUG_MODE else 'OK'
-        })
+            'message': f"Keys: {' '.join(sequence)}" if DEBUG_MODE else 'OK'
+        }, 200
 
+    except KeySpecError as e:
+        return {'status': 'error', 'message': str(e)}, 400
     except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+        return {'status': 'error', 'message': str(e)}, 500
 
-@app.route('/type', methods=['POST'])
-def handle_typing():
-    """Endpoint para recibir texto y simularlo"""
+@app.route('/keys', methods=['POST'])
+def handle_keys():
+    """Endpoint para combinaciones arbitrarias (ej. "ctrl+shift+t") y secuencias de teclas"""
+    return respond(enqueue_action(request_action(request, 'keys')))
+
+def apply_typing(data):
+    """Simula la escritura de un texto y retorna (respuesta, código HTTP)"""
+    data = data or {}
+    job_id = data.get('job')
     try:
-        data = request.get_json()
         text = data.get('text', '')
-        
+
+        # Trozo de un trabajo de escritura masiva que se canceló mientras esperaba
+        if job_id is not None and typing_jobs.is_cancelled(job_id):
+            return None, 200
+
         if text:
             # Simula la escritura del texto
-            keyboard.type(text)
+            backend.text(text)
             connection_status['last_activity'] = time.time()
+            if job_id is not None:
+                typing_jobs.chunk_applied(job_id, len(text))
 
             # Solo mostrar mensaje de debug si está habilitado
             if DEBUG_MODE:
                 message = f'Typed: {text[:50]}...' if len(text) > 50 else f'Typed: {text}'
                 print(f"⌨️  {message}")
 
-            return jsonify({
+            return {
                 'status': 'success',
                 'message': f'Typed: {text[:50]}...' if len(text) > 50 else f'Typed: {text}' if DEBUG_MODE else 'OK'
-            })
+            }, 200
         else:
-            return jsonify({'status': 'error', 'message': 'No text provided'}), 400
-            
+            return {'status': 'error', 'message': 'No text provided'}, 400
+
     except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+        if job_id is not None:
+            typing_jobs.chunk_applied(job_id, 0, error=str(e))
+        return {'status': 'error', 'message': str(e)}, 500
 
-@app.route('/status', methods=['GET'])
-def get_status():
-    """Endpoint para verificar estado del servidor"""
-    return jsonify({
+@app.route('/type', methods=['POST'])
+def handle_typing():
+    """Endpoint para recibir texto y simularlo"""
+    return respond(enqueue_action(request_action(request, 'type')))
+
+def bulk_typing_response(req):
+    """Crea un trabajo de escritura masiva y responde de inmediato con su id"""
+    data = req.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {'status': 'error', 'message': 'se esperaba un objeto JSON'}, 400
+    text = data.get('text')
+    if not isinstance(text, str) or not text:
+        return {'status': 'error', 'message': 'No text provided'}, 400
+    rate = data.get('rate', ARGS.typing_rate)
+    if not is_number(rate) or rate < 0:
+        return {'status': 'error', 'message': 'rate debe ser un número >= 0 (teclas por segundo)'}, 400
+    mode = data.get('mode', 'auto')
+    if mode not in TYPING_MODES:
+        return {'status': 'error', 'message': f"Modo desconocido: {mode} (opciones: {', '.join(TYPING_MODES)})"}, 400
+    if mode == 'paste' and not backend.has_clipboard:
+        return {'status': 'error', 'message': 'Portapapeles no disponible en este servidor'}, 400
+    paste_keys = data.get('paste_keys')
+    if paste_keys is not None:
+        try:
+            compile_sequence((paste_keys,))
+        except (KeySpecError, TypeError) as e:
+            return {'status': 'error', 'message': str(e)}, 400
+
+    job = typing_jobs.create(text, rate=rate, mode=mode, paste_keys=paste_keys,
+                             profile=req.headers.get('X-Latency-Profile'))
+    connection_status['last_activity'] = time.time()
+    return {'status': 'success', 'job': job.to_dict()}, 202
+
+@app.route('/type/bulk', methods=['POST'])
+def handle_bulk_typing():
+    """Endpoint para escribir textos grandes en segundo plano"""
+    return respond(bulk_typing_response(request))
+
+def typing_jobs_response(req):
+    """Progreso de un trabajo (?id=job-1) o de todos los recientes"""
+    job_id = req.args.get('id')
+    if job_id:
+        job = typing_jobs.get(job_id)
+        if job is None:
+            return {'status': 'error', 'message': f'Trabajo no encontrado: {job_id}'}, 404
+        return {'status': 'success', 'job': job.to_dict()}, 200
+    return {'status': 'success', 'jobs': typing_jobs.jobs()}, 200
+
+@app.route('/type/jobs', methods=['GET'])
+def get_typing_jobs():
+    """Endpoint para consultar el progreso de la escritura masiva"""
+    return respond(typing_jobs_response(request))
+
+def cancel_typing_response(req):
+    """Cancela un trabajo ({"job": "job-1"}) o todos los pendientes"""
+    data = req.get_json(silent=True)
+    job_id = data.get('job') if isinstance(data, dict) else None
+    cancelled = typing_jobs.cancel(job_id)
+    if job_id and not cancelled:
+        return {'status': 'error', 'message': f'Trabajo no encontrado o ya terminado: {job_id}'}, 404
+    return {'status': 'success', 'cancelled': cancelled}, 200
+
+@app.route('/type/cancel', methods=['POST'])
+def cancel_typing():
+    """Endpoint para cancelar la escritura masiva"""
+    return respond(cancel_typing_response(request))
+
+# Tras pegar, el portapapeles anterior se restaura pasado este tiempo
+# (la aplicación destino lee el portapapeles de forma asíncrona)
+PASTE_RESTORE_DELAY = 1.0
+
+def restore_clipboard(pasted, previous):
+    """Restaura el portapapeles anterior si nadie lo cambió desde el pegado"""
+    try:
+        if backend.clipboard_get() == pasted:
+            backend.clipboard_set(previous)
+    except ClipboardUnavailable:
+        pass
+
+def apply_paste_text(data):
+    """Pega un texto por el portapapeles (copiar + shortcut de pegar) y retorna (respuesta, código HTTP)"""
+    job_id = data.get('job')
+    try:
+        if job_id is not None and typing_jobs.is_cancelled(job_id):
+            return None, 200
+
+        text = data['text']
+        try:
+            previous = backend.clipboard_get()
+        except ClipboardUnavailable:
+            previous = None
+        backend.clipboard_set(text)
+
+        # Algunas aplicaciones pegan con otra combinación (ej. ctrl+shift+v en terminales)
+        if data.get('keys'):
+            run_key_plan(compile_sequence(key_sequence(data)))
+        else:
+            run_key_plan(SHORTCUTS['paste'].plan)
+        connection_status['last_activity'] = time.time()
+
+        if previous is not None and previous != text:
+            threading.Timer(PASTE_RESTORE_DELAY, restore_clipboard, (text, previous)).start()
+        if job_id is not None:
+            typing_jobs.chunk_applied(job_id, len(text))
+
+        if DEBUG_MODE:
+            print(f"📋 Pegado: {len(text)} caracteres")
+        return {'status': 'success', 'message': 'OK'}, 200
+
+    except ClipboardUnavailable as e:
+        error = f'Portapapeles no disponible: {e}'
+        status_code = 400
+    except Exception as e:
+        error = str(e)
+        status_code = 500
+    if job_id is not None:
+        typing_jobs.chunk_applied(job_id, 0, error=error)
+    return {'status': 'error', 'message': error}, status_code
+
+# Acciones de teclado que comparten el canal con las acciones de mouse
+KEYBOARD_ACTIONS = {
+    'type': apply_typing,
+    'special': apply_special_key,
+    'shortcut': apply_shortcut,
+    'keys': apply_keys,
+    'paste_text': apply_paste_text
+}
+
+def apply_action(data):
+    """Ejecuta cualquier acción del vocabulario de entrada (mouse o teclado)"""
+    if not isinstance(data, (dict, PointerEvent)):
+        return {'status': 'error', 'message': 'Mensaje inválido: se esperaba un objeto JSON'}, 400
+    handler = KEYBOARD_ACTIONS.get(data.get('action', ''), apply_mouse_action)
+    return handler(data)
+
+def metric_action(data):
+    """Acción para etiquetar métricas (solo nombres conocidos, para acotar las series)"""
+    action = data.get('action') if isinstance(data, (dict, PointerEvent)) else None
+    if action in MOUSE_ACTIONS or action in KEYBOARD_ACTIONS:
+        return action
+    return 'unknown'
+
+# Máximo de acciones por lote (/events y listas por /ws)
+MAX_BATCH_SIZE = 500
+
+def validate_action(data):
+    """Valida una acción contra la geometría de pantalla actual (ver action_schema.py)"""
+    return validate_schema(data, screen_geometry.layout)
+
+def with_action(data, action):
+    """Copia el cuerpo de un endpoint REST de teclado agregando el nombre de la acción"""
+    data = dict(data) if isinstance(data, dict) else {}
+    data['action'] = action
+    return data
+
+def apply_profile(data, profile):
+    """Asigna un perfil de latencia a una acción (o lote) que no traiga uno propio"""
+    if not profile:
+        return data
+    for item in (data if isinstance(data, list) else [data]):
+        if isinstance(item, dict):
+            item.setdefault('profile', profile)
+    return data
+
+def request_action(req, action=None):
+    """Lee el cuerpo JSON de un request como acción del vocabulario.
+
+    El header ``X-Latency-Profile`` elige el perfil si el cuerpo no trae ``profile``.
+    """
+    started = time.perf_counter()
+    data = req.get_json(silent=True)
+    if action is not None:
+        data = with_action(data, action)
+    metrics.observe('parse', metric_action(data), time.perf_counter() - started)
+    return apply_profile(data, req.headers.get('X-Latency-Profile'))
+
+def report_injection_error(data, result):
+    """Registra errores de inyección (la respuesta HTTP ya se envió al encolar)"""
+    print(f"⚠️  Error ejecutando '{data.get('action')}': {(result or {}).get('message', '')}")
+
+def record_applied(data, queue_wait, duration, status_code):
+    """Registra los tiempos de cola e inyección de cada acción ejecutada"""
+    action = metric_action(data)
+    metrics.observe('queue_wait', action, queue_wait)
+    metrics.observe('inject', action, duration)
+    if status_code >= 400:
+        metrics.count('errors', action)
+
+# Grabación de sesión opcional (--record): todo lo que entra al despachador, en orden
+session_recorder = SessionRecorder(ARGS.record) if ARGS.record else None
+
+# Canal de retorno (/ws?feedback=1): posición del cursor y última secuencia aplicada por cliente
+cursor_feedback = CursorFeedback(backend.position)
+
+# Hilo único que ejecuta todas las inyecciones en orden
+dispatcher = InputDispatcher(apply_action, on_error=report_injection_error,
+                             on_applied=record_applied,
+                             on_submit=session_recorder.record if session_recorder else None,
+                             on_progress=cursor_feedback.applied)
+
+# Buffer de jitter (--jitter-target): reproduce move/drag_move con el ritmo del cliente.
+# En --replay no se usa: la sesión grabada ya tiene los tiempos de reproducción
+jitter_buffer = (JitterBuffer(dispatcher.submit_entries, target=ARGS.jitter_target / 1000)
+                 if ARGS.jitter_target > 0 and not ARGS.replay else None)
+
+def submit_pointer(actions, source=None, block=False):
+    """Encola acciones de puntero en orden, pasando por el buffer de jitter si está activo.
+
+    ``source`` identifica al cliente (cada uno tiene su propio reloj para ``t``).
+    """
+    if jitter_buffer is not None:
+        jitter_buffer.submit_many(actions, source, block)
+    else:
+        dispatcher.submit_many(actions, source, block)
+
+# Escritura masiva: textos grandes entran al despachador por trozos desde su propio hilo.
+# Los lotes diferidos detrás de un trabajo entran por submit_pointer para no adelantarse
+# a los movimientos retenidos en el buffer de jitter
+typing_jobs = TypingJobManager(dispatcher.submit, submit_pointer, can_paste=lambda: backend.has_clipboard)
+
+# Camino rápido UDP opcional (--udp-port): entrega al mismo despachador que /mouse
+udp_listener = None
+
+# Control de admisión (--rate-limit): token bucket por IP, consultado antes de leer el cuerpo
+rate_limiter = RateLimiter(ARGS.rate_limit, ARGS.rate_burst) if ARGS.rate_limit > 0 else None
+
+# Endpoints de entrada sujetos a la cuota por cliente
+RATE_LIMITED_PATHS = frozenset(('/mouse', '/events', '/type', '/type/bulk', '/special', '/shortcut', '/keys'))
+
+RATE_LIMITED = ({'status': 'error', 'message': 'Demasiadas solicitudes: reduce el ritmo de envío'}, 429)
+
+def admit_request(req):
+    """None si el cliente tiene cuota (o la ruta no la usa); si no, la respuesta 429.
+
+    Solo mira método, ruta y dirección: se llama antes de leer el cuerpo, tanto en
+    la app Flask (before_request) como en el servidor asyncio (``admit``).
+    """
+    if rate_limiter is None or req.method != 'POST' or req.path not in RATE_LIMITED_PATHS:
+        return None
+    if rate_limiter.allow(req.remote_addr):
+        return None
+    metrics.count('throttled', 'rate_limit')
+    return RATE_LIMITED
+
+@app.before_request
+def limit_input_rate():
+    """Aplica la cuota por cliente a los endpoints de entrada de la app Flask"""
+    rejected = admit_request(request)
+    if rejected is not None:
+        return respond(rejected)
+
+def overloaded_response(error):
+    """Respuesta 429 cuando la cola de esa clase de evento está llena.
+
+    Un lote que no cabe ni con la cola vacía recibe 413: reintentarlo igual no sirve.
+    """
+    if isinstance(error, BatchTooLarge):
+        metrics.count('rejected', error.kind)
+        return {'status': 'error', 'message': str(error), 'queue': error.kind, 'limit': error.limit}, 413
+    metrics.count('throttled', error.kind)
+    return {'status': 'error', 'message': f'Servidor saturado: {error}', 'queue': error.kind}, 429
+
+def validate_measured(data):
+    """validate_action registrando su duración y el resultado en las métricas"""
+    started = time.perf_counter()
+    error = validate_action(data)
+    action = metric_action(data)
+    metrics.observe('validate', action, time.perf_counter() - started)
+    metrics.count('rejected' if error else 'actions', action)
+    return error
+
+def enqueue_action(data, source=None):
+    """Valida una acción y la encola en el despachador; retorna (respuesta, código HTTP)"""
+    error = validate_measured(data)
+    if error:
+        return {'status': 'error', 'message': error}, 400
+
+    action = data['action']
+    if action in KEYBOARD_ACTIONS:
+        # Un texto grande se escribe como trabajo en segundo plano, sin retener el request
+        if is_bulk_text(data):
+            job = typing_jobs.create(data['text'], rate=ARGS.typing_rate, profile=data.get('profile'))
+            return {'status': 'success', 'message': 'OK', 'job': job.to_dict()}, 200
+        # Las teclas respetan el orden con los trabajos de escritura en curso
+        try:
+            typing_jobs.submit_after_jobs(data, source)
+        except QueueFull as e:
+            return overloaded_response(e)
+    else:
+        try:
+            submit_pointer((data,), source)
+        except QueueFull as e:
+            return overloaded_response(e)
+    connection_status['last_activity'] = time.time()
+
+    # Mismas respuestas mínimas que antes para los eventos de alta frecuencia
+    if action == 'drag_move':
+        return None, 200
+    if action in ('move', 'move_rel', 'scroll'):
+        return {'status': 'success'}, 200
+    return {'status': 'success', 'message': 'OK'}, 200
+
+def enqueue_binary(payload, profile=None, source=None):
+    """Decodifica eventos de puntero en formato binario y los encola en orden.
+
+    Los eventos binarios no pasan por JSON ni por validate_action: el layout fijo
+    ya garantiza los tipos y el decodificador rechaza opcodes y botones desconocidos.
+    """
+    if profile is not None and profile not in LATENCY_PROFILES:
+        return {'status': 'error', 'message': f'Perfil de latencia desconocido: {profile}'}, 400
+    started = time.perf_counter()
+    try:
+        events = decode_events(payload, profile)
+    except WireFormatError as e:
+        metrics.count('rejected', 'binary')
+        return {'status': 'error', 'message': str(e)}, 400
+    metrics.observe('parse', 'binary', time.perf_counter() - started)
+    metrics.count('actions', 'binary', len(events))
+
+    try:
+        submit_pointer(events, source)
+    except QueueFull as e:
+        return overloaded_response(e)
+    connection_status['last_activity'] = time.time()
+    return None, 200
+
+def apply_batch(events, source=None):
+    """Valida un lote completo de acciones y luego las encola en orden.
+
+    Si alguna acción es inválida no se encola ninguna. El lote entra al
+    despachador de forma atómica, sin intercalarse con otros clientes. Las
+    teclas siguen el mismo camino que en enqueue_action: los textos largos se
+    escriben como trabajo y las teclas esperan a los trabajos en curso.
+    """
+    if not isinstance(events, list):
+        return {'status': 'error', 'message': 'Se esperaba una lista de eventos'}, 400
+    if len(events) > MAX_BATCH_SIZE:
+        return {'status': 'error', 'message': f'Lote demasiado grande (máximo {MAX_BATCH_SIZE})'}, 413
+
+    for index, data in enumerate(events):
+        error = validate_measured(data)
+        if error:
+            return {'status': 'error', 'index': index, 'message': error}, 400
+
+    try:
+        dispatcher.check_batch(events)
+        jobs = typing_jobs.submit_batch_after_jobs(events, source, rate=ARGS.typing_rate)
+    except QueueFull as e:
+        return overloaded_response(e)
+    connection_status['last_activity'] = time.time()
+    response = {'status': 'success', 'accepted': len(events)}
+    if jobs:
+        response['jobs'] = [job.to_dict() for job in jobs]
+    return response, 200
+
+def events_response(req):
+    """Encola un lote de acciones (JSON) o de eventos de puntero en formato binario"""
+    if req.mimetype == BINARY_CONTENT_TYPE:
+        return enqueue_binary(req.get_data(), req.headers.get('X-Latency-Profile'), req.remote_addr)
+    started = time.perf_counter()
+    data = req.get_json(silent=True)
+    events = data.get('events') if isinstance(data, dict) else data
+    metrics.observe('parse', 'batch', time.perf_counter() - started)
+    return apply_batch(apply_profile(events, req.headers.get('X-Latency-Profile')), req.remote_addr)
+
+@app.route('/events', methods=['POST'])
+def handle_events():
+    """Endpoint para aplicar un lote ordenado de acciones en un solo request"""
+    return respond(events_response(request))
+
+def profiles_response(req):
+    """Perfiles de latencia disponibles y el perfil por defecto"""
+    return {
+        'status': 'success',
+        'default': default_latency_profile.name,
+        'profiles': {name: profile.to_dict() for name, profile in LATENCY_PROFILES.items()},
+        'acceleration': {
+            'default': pointer.curve.name,
+            'curves': {name: curve.to_dict() for name, curve in ACCELERATION_CURVES.items()}
+        }
+    }, 200
+
+@app.route('/profiles', methods=['GET'])
+def get_profiles():
+    """Endpoint para listar los perfiles de latencia disponibles"""
+    return respond(profiles_response(request))
+
+# Portapapeles compartido (/clipboard): el contenido va directo al portapapeles, sin el teclado.
+# Solo en modo flask: se transfiere por trozos y el servidor asyncio lee el cuerpo completo
+clipboard_sync = ClipboardSync(backend, max_bytes=int(ARGS.clipboard_max * 1024 * 1024),
+                               read_images=backend.name != 'null')
+
+def parse_etag(value):
+    """Valor de un header ETag/If-None-Match sin comillas ni prefijo débil"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith('W/'):
+        value = value[2:]
+    return value.strip('"')
+
+@app.route('/clipboard', methods=['GET'])
+def get_clipboard():
+    """Contenido del portapapeles remoto por trozos; 304 si el cliente ya tiene esa versión"""
+    known_etag = parse_etag(request.headers.get('If-None-Match'))
+    try:
+        content = clipboard_sync.read(known_etag)
+    except ClipboardUnavailable as e:
+        return respond(({'status': 'error', 'message': f'Portapapeles no disponible: {e}'}, 503))
+    except ClipboardTooLarge as e:
+        return respond(({'status': 'error', 'message': str(e)}, 413))
+
+    if content is None:
+        return app.response_class(status=304, headers={'ETag': f'"{known_etag}"'})
+    return app.response_class(content.chunks(), content_type=content.content_type, headers={
+        'ETag': f'"{content.etag}"',
+        'Content-Length': str(content.size),
+        'Cache-Control': 'no-cache'
+    })
+
+@app.route('/clipboard', methods=['PUT'])
+def put_clipboard():
+    """Escribe texto en el portapapeles remoto leyendo el cuerpo por trozos.
+
+    ``X-Content-SHA256`` (opcional) verifica el contenido; ``?paste=1`` además lo pega
+    con el shortcut de pegar, en orden con el resto de las teclas.
+    """
+    if request.content_length is not None and request.content_length > clipboard_sync.max_bytes:
+        return respond(({'status': 'error', 'message': f'Contenido demasiado grande (máximo {clipboard_sync.max_bytes} bytes)'}, 413))
+    try:
+        etag, changed = clipboard_sync.write(request.stream, request.headers.get('X-Content-SHA256'))
+    except ClipboardUnavailable as e:
+        return respond(({'status': 'error', 'message': f'Portapapeles no disponible: {e}'}, 503))
+    except ClipboardTooLarge as e:
+        return respond(({'status': 'error', 'message': str(e)}, 413))
+    except ValueError as e:
+        return respond(({'status': 'error', 'message': str(e)}, 400))
+
+    if DEBUG_MODE:
+        print(f"📋 Portapapeles {'actualizado' if changed else 'sin cambios'} ({etag[:12]})")
+    connection_status['last_activity'] = time.time()
+    result = {'status': 'success', 'etag': etag, 'changed': changed}
+    if request.args.get('paste') in ('1', 'true'):
+        pasted, status_code = enqueue_action(apply_profile({'action': 'shortcut', 'shortcut': 'paste'},
+                                                           request.headers.get('X-Latency-Profile')),
+                                             request.remote_addr)
+        if status_code >= 400:
+            return respond((pasted, status_code))
+        result['pasted'] = True
+    response = jsonify(result)
+    response.headers['ETag'] = f'"{etag}"'
+    return response
+
+# Transferencia de archivos (/files): por trozos directo a disco, reanudable con rangos.
+# Solo en modo flask, igual que /clipboard
+file_transfers = FileTransfers(ARGS.transfer_dir)
+
+@app.route('/files', methods=['GET'])
+def list_files():
+    """Archivos del directorio de transferencias (y subidas parciales)"""
+    return respond(({'status': 'success', 'directory': file_transfers.directory,
+                     'files': file_transfers.list_files()}, 200))
+
+@app.route('/files/<name>', methods=['PUT'])
+def upload_file(name):
+    """Sube un archivo por trozos; ``Content-Range`` continúa una subida cortada"""
+    try:
+        result = file_transfers.upload(name, request.stream, request.headers.get('Content-Range'),
+                                       request.headers.get('X-Content-SHA256'))
+    except TransferError as e:
+        return respond(e.to_response())
+    connection_status['last_activity'] = time.time()
+    if DEBUG_MODE and result[1] == 201:
+        print(f"📁 Archivo recibido: {name} ({result[0]['size']} bytes)")
+    return respond(result)
+
+@app.route('/files/<name>', methods=['GET'])
+def download_file(name):
+    """Descarga por trozos (con ``Range``). HEAD informa tamaño, sha256 y offset de la subida parcial"""
+    try:
+        if request.method == 'HEAD':
+            info = file_transfers.status(name)
+            headers = {'Accept-Ranges': 'bytes'}
+            if info['size'] is not None:
+                headers['Content-Length'] = str(info['size'])
+                headers['X-Content-SHA256'] = info['sha256']
+            if info['offset'] is not None:
+                headers['X-Upload-Offset'] = str(info['offset'])
+            return app.response_class(status=200 if info['size'] is not None else 404, headers=headers)
+        status_code, headers, chunks = file_transfers.download(name, request.headers.get('Range'))
+    except TransferError as e:
+        if e.status_code == 416:
+            return app.response_class(status=416, headers={'Content-Range': f"bytes */{e.extra['size']}"})
+        return respond(e.to_response())
+    return app.response_class(chunks, status=status_code, headers=headers,
+                              content_type='application/octet-stream')
+
+if sock is not None:
+    @sock.route('/ws')
+    def input_channel(ws):
+        """Canal WebSocket persistente: un mensaje JSON por acción.
+
+        ``/ws?profile=instant`` fija el perfil de latencia de toda la sesión.
+        ``/ws?feedback=1`` suscribe la conexión al canal de retorno (cursor_feedback.py).
+        """
+        session_profile = request.args.get('profile')
+        if session_profile not in LATENCY_PROFILES:
+            session_profile = None
+        source = f'ws-{id(ws)}'  # Cada conexión lleva su propio reloj de cliente
+        connection_status['connected_clients'] += 1
+        if DEBUG_MODE:
+            print("🔌 Cliente conectado al canal WebSocket")
+
+        # El hilo de feedback también escribe en este socket: los envíos se serializan
+        send_lock = threading.Lock()
+        def send(message):
+            with send_lock:
+                ws.send(message)
+        if request.args.get('feedback') in ('1', 'true'):
+            cursor_feedback.subscribe(source, send)
+        client_addr = request.remote_addr
+        last_notice = 0.0
+        try:
+            while True:
+                raw = ws.receive()
+
+                # Cuota por cliente: sobre el límite el mensaje se descarta sin decodificarlo,
+                # con a lo sumo un aviso por segundo
+                if rate_limiter is not None and not rate_limiter.allow(client_addr):
+                    metrics.count('throttled', 'rate_limit')
+                    now = time.monotonic()
+                    if now - last_notice >= 1.0:
+                        last_notice = now
+                        send(json.dumps(dict(RATE_LIMITED[0], code=RATE_LIMITED[1])))
+                    continue
+
+                # Frames binarios: eventos de puntero en formato compacto, sin respuesta salvo error
+                if isinstance(raw, (bytes, bytearray)):
+                    result, status_code = enqueue_binary(raw, session_profile, source)
+                    if status_code >= 400:
+                        send(json.dumps(dict(result, code=status_code)))
+                    continue
+
+                started = time.perf_counter()
+                try:
+                    data = json.loads(raw)
+                except (TypeError, ValueError):
+                    send(json.dumps({'status': 'error', 'message': 'JSON inválido'}))
+                    continue
+                metrics.observe('parse', metric_action(data) if isinstance(data, dict) else 'batch',
+                                time.perf_counter() - started)
+
+                apply_profile(data, session_profile)
+
+                # Una lista JSON se trata como un lote, igual que /events
+                if isinstance(data, list):
+                    result, status_code = apply_batch(data, source)
+                else:
+                    result, status_code = enqueue_action(data, source)
+
+                # Solo se responde cuando el cliente pide confirmación (id) o hay error,
+                # así los eventos de alta frecuencia siguen siendo fire-and-forget
+                request_id = data.get('id') if isinstance(data, dict) else None
+                if request_id is not None or status_code >= 400:
+                    reply = dict(result or {'status': 'success'})
+                    reply['code'] = status_code
+                    if request_id is not None:
+                        reply['id'] = request_id
+                    send(json.dumps(reply))
+        except (ConnectionClosed, ConnectionError):
+            pass  # El cliente se fue (también a mitad de una respuesta)
+        finally:
+            cursor_feedback.unsubscribe(source)
+            connection_status['connected_clients'] -= 1
+            if DEBUG_MODE:
+                print("🔌 Cliente desconectado del canal WebSocket")
+
+    @sock.route('/screen/stream')
+    def screen_stream_channel(ws):
+        """Vista en vivo: frames binarios con los tiles que cambiaron (ver screen_stream.py).
+
+        El cliente confirma cada frame con ``{"ack": seq}`` después de dibujarlo.
+        """
+        if screen_streamer is None:
+            ws.send(json.dumps({'status': 'error', 'message': 'Vista en vivo no disponible: instala Pillow'}))
+            return
+        try:
+            screen_streamer.serve(ws.send, lambda timeout: ws.receive(timeout=timeout))
+        except ConnectionClosed:
+            pass
+        except Exception as e:
+            # Sin pantalla o sin permiso de captura: se avisa al cliente en lugar de cortar en silencio
+            print(f"⚠️  Error en la vista en vivo: {e}")
+            ws.send(json.dumps({'status': 'error', 'message': f'Error capturando la pantalla: {e}'}))
+
+def status_response(req):
+    """Estado del servidor y contadores del despachador"""
+    return {
         'status': 'online',
         'server': 'Remote Typing Server',
+        'mode': ARGS.mode,
         'last_activity': connection_status['last_activity'],
+        'dispatcher': dict(dispatcher.stats, pending=dispatcher.pending()),
+        'udp': udp_listener.stats if udp_listener is not None else None,
+        'http': async_server.stats if async_server is not None else None,
+        'recording': session_recorder.stats if session_recorder is not None else None,
+        'jitter': jitter_buffer.stats if jitter_buffer is not None else None,
+        'admission': rate_limiter.stats if rate_limiter is not None else None,
+        'feedback': cursor_feedback.stats,
+        'clipboard': clipboard_sync.stats,
+        'files': file_transfers.stats,
+        'stream': screen_streamer.stats if screen_streamer is not None else None,
         'uptime': time.time()
-    })
+    }, 200
+
+@app.route('/status', methods=['GET'])
+def get_status():
+    """Endpoint para verificar estado del servidor"""
+    return respond(status_response(request))
+
+def ping_response(req):
+    """Respuesta mínima para verificar conectividad"""
+    return {'status': 'pong'}, 200
 
 @app.route('/ping', methods=['GET'])
 def ping():
     """Endpoint simple para verificar conectividad"""
-    return jsonify({'status': 'pong'})
+    return respond(ping_response(request))
+
+def replay_action(action):
+    """Entrega una acción grabada por el mismo camino que /mouse (eventos binarios o JSON validado)"""
+    if isinstance(action, PointerEvent):
+        dispatcher.submit(action)
+        return None, 200
+    return enqueue_action(action)
+
+def run_replay(path, speed):
+    """Reproduce una sesión grabada, espera a que se inyecte todo y muestra un resumen"""
+    print(f"⏯️  Reproduciendo {path} (velocidad: {'máxima' if speed <= 0 else f'{speed}x'})")
+    started = time.perf_counter()
+    rejected = 0
+
+    def submit(action):
+        nonlocal rejected
+        result, status_code = replay_action(action)
+        if status_code >= 400:
+            rejected += 1
+            print(f"⚠️  Acción rechazada: {result.get('message')}")
+
+    try:
+        count = replay_session(path, submit, speed)
+    except (OSError, SessionFormatError) as e:
+        print(f"❌ No se pudo reproducir la sesión: {e}")
+        return False
+    typing_jobs.wait_idle()
+    dispatcher.wait_idle()
+    elapsed = time.perf_counter() - started
+    stats = dispatcher.stats
+    print(f"✅ {count} acciones en {elapsed:.2f} s - aplicadas: {stats['applied']}, "
+          f"fusionadas: {stats['coalesced']}, descartadas: {stats['superseded']}, "
+          f"errores: {stats['errors']}, rechazadas: {rejected}")
+    return True
+
+def metrics_response(req):
+    """Métricas en formato de texto de Prometheus"""
+    dropped = {
+        'coalesced': dispatcher.stats['coalesced'],
+        'superseded': dispatcher.stats['superseded'],
+        'overflow': dispatcher.stats['dropped']
+    }
+    if udp_listener is not None:
+        dropped['udp_stale'] = udp_listener.stats['stale']
+        dropped['udp_rejected'] = udp_listener.stats['rejected']
+    return metrics.render([
+        ('dropped', 'Eventos descartados antes de inyectarse', 'reason', dropped)
+    ]), 200
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Endpoint de métricas para Prometheus"""
+    return respond(metrics_response(request))
+
+def keyboard_route(action):
+    """Handler de un endpoint REST de teclado (el cuerpo es la acción sin 'action')"""
+    return lambda req: enqueue_action(request_action(req, action))
+
+# Rutas del modo asyncio (--mode async): los mismos handlers que la app Flask
+ASYNC_ROUTES = {
+    ('GET', '/ping'): ping_response,
+    ('GET', '/status'): status_response,
+    ('GET', '/screen'): screen_response,
+    ('POST', '/screen/refresh'): refresh_screen_response,
+    ('GET', '/profiles'): profiles_response,
+    ('GET', '/metrics'): metrics_response,
+    ('POST', '/mouse'): mouse_response,
+    ('POST', '/events'): events_response,
+    ('POST', '/type'): keyboard_route('type'),
+    ('POST', '/type/bulk'): bulk_typing_response,
+    ('GET', '/type/jobs'): typing_jobs_response,
+    ('POST', '/type/cancel'): cancel_typing_response,
+    ('POST', '/special'): keyboard_route('special'),
+    ('POST', '/shortcut'): keyboard_route('shortcut'),
+    ('POST', '/keys'): keyboard_route('keys')
+}
+
+# Servidor asyncio (solo con --mode async)
+async_server = None
 
 if __name__ == '__main__':
+    if session_recorder is not None:
+        session_recorder.start()
+
+    # Modo reproducción: sin servidor HTTP, solo la sesión grabada contra el despachador
+    if ARGS.replay:
+        dispatcher.start()
+        typing_jobs.start()
+        try:
+            replayed = run_replay(ARGS.replay, ARGS.replay_speed)
+        except KeyboardInterrupt:
+            replayed = False
+            print("\n👋 Reproducción interrumpida")
+        finally:
+            dispatcher.stop()
+            if session_recorder is not None:
+                session_recorder.stop()
+            backend.close()
+        raise SystemExit(0 if replayed else 1)
+
     local_ip = get_local_ip()
     print("=" * 80)
     print("🖥️  Remote Typing Server - ESCLAVO (COMPLETO)")
     print("=" * 80)
-    print(f"🌐 Servidor iniciado en: http://{local_ip}:5000")
+    print(f"🌐 Servidor iniciado en: http://{local_ip}:{ARGS.port}")
     print(f"📡 IP Local: {local_ip}")
     print("🔗 Usa esta IP en el cliente para conectar")
     print("⌨️  Listo para recibir comandos de escritura...")
@@ -487,6 +1271,35 @@ if __name__ == '__main__':
     print("   • Tab, Escape, Delete, Space, Backspace, Enter")
     print("   • Flechas: ↑ ↓ ← → (navegación de texto)")
     print("   • Detección automática Mac/Windows/Linux")
+    print("   • /keys: cualquier combinación (ej. ctrl+shift+t, alt+f4, f5)")
+    print(f"⏱️  Perfil de latencia: {default_latency_profile.name} - {default_latency_profile.description}")
+    print(f"👆 Movimiento relativo (move_rel): curva {pointer.curve.name} - {pointer.curve.description}")
+    if ARGS.mode == 'async':
+        print("🚀 Modo asyncio: conexiones keep-alive, TCP_NODELAY (sin canal WebSocket)")
+    elif sock is not None:
+        print(f"🔌 Canal WebSocket persistente: ws://{local_ip}:{ARGS.port}/ws")
+        print(f"📍 Posición del cursor y confirmaciones: ws://{local_ip}:{ARGS.port}/ws?feedback=1")
+    else:
+        print("⚠️  flask-sock no instalado - canal WebSocket deshabilitado (solo REST)")
+    if ARGS.mode == 'flask' and sock is not None:
+        if screen_streamer is not None:
+            print(f"🎥 Vista en vivo: ws://{local_ip}:{ARGS.port}/screen/stream (hasta {ARGS.stream_fps:g} fps)")
+        else:
+            print("⚠️  Pillow no instalado - vista en vivo deshabilitada")
+    if ARGS.mode == 'flask':
+        print(f"📋 Portapapeles compartido: http://{local_ip}:{ARGS.port}/clipboard "
+              f"(GET/PUT, hasta {ARGS.clipboard_max:g} MB)")
+        print(f"📁 Archivos: http://{local_ip}:{ARGS.port}/files -> {file_transfers.directory}")
+    if ARGS.udp_port:
+        print(f"📶 Camino rápido UDP (move/drag_move/scroll): udp://{local_ip}:{ARGS.udp_port}")
+    if jitter_buffer is not None:
+        print(f"📈 Buffer de jitter: move/drag_move con marca de tiempo, objetivo {ARGS.jitter_target:g} ms")
+    if rate_limiter is not None:
+        print(f"🚦 Control de admisión: {ARGS.rate_limit:g} eventos/s por cliente (ráfagas de {ARGS.rate_burst:g})")
+    if session_recorder is not None:
+        print(f"⏺️  Grabando la sesión en: {ARGS.record}")
+    if backend.name == 'null':
+        print("🧪 Backend nulo: no se inyecta nada, solo se registran las llamadas")
     if DEBUG_MODE:
         print("🐛 Modo DEBUG activado - Se mostrarán todos los mensajes")
     else:
@@ -495,7 +1308,30 @@ if __name__ == '__main__':
     print("Presiona Ctrl+C para detener el servidor")
     print()
 
+    dispatcher.start()
+    typing_jobs.start()
+    cursor_feedback.start()
+    if jitter_buffer is not None:
+        jitter_buffer.start()
+    screen_geometry.start_watcher(on_change=on_screen_change)
+    if ARGS.udp_port:
+        udp_listener = UDPPointerListener(submit_pointer, port=ARGS.udp_port,
+                                          profile=default_latency_profile.name)
+        udp_listener.start()
+
+    signal.signal(signal.SIGTERM, stop_on_sigterm)
     try:
-        app.run(host='0.0.0.0', port=5000, debug=False)
+        if ARGS.mode == 'async':
+            async_server = AsyncHTTPServer(ASYNC_ROUTES, port=ARGS.port, admit=admit_request)
+            async_server.run()
+        else:
+            app.run(host='0.0.0.0', port=ARGS.port, debug=False)
     except KeyboardInterrupt:
-        print("\n👋 Servidor detenido correctamente")
\ No newline at end of file
+        print("\n👋 Servidor detenido correctamente")
+    finally:
+        cursor_feedback.stop()
+        if jitter_buffer is not None:
+            jitter_buffer.stop()
+        if session_recorder is not None:
+            session_recorder.stop()
+        backend.close()
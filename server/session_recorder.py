@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Grabación y reproducción de sesiones de entrada
+Cada acción aceptada se guarda con su instante (reloj monotónico) en un
+archivo binario de solo agregado. La escritura la hace un hilo en segundo
+plano por tandas, nunca el request; la lectura también es por streaming,
+así una sesión de horas no se carga entera en memoria.
+
+Formato (little-endian):
+
+    cabecera   4 bytes 'MCSR', uint8 versión, float64 hora de inicio (time.time)
+    registro   uint32 µs desde el registro anterior, uint8 tipo, uint32 largo, datos
+
+    tipo 1     evento de puntero en el formato binario de wire_format.py (16 bytes)
+               seguido del nombre del perfil de latencia (puede ir vacío)
+    tipo 2     acción JSON (teclado y cualquier acción con otros campos)
+"""
+
+import json
+import struct
+import threading
+import time
+
+from wire_format import BUTTON_CODES, EVENT_SIZE, OPCODES, PointerEvent, decode_events, encode_event
+
+MAGIC = b'MCSR'
+VERSION = 1
+HEADER_STRUCT = struct.Struct('<4sBd')
+RECORD_STRUCT = struct.Struct('<IBI')
+
+RECORD_POINTER = 1
+RECORD_JSON = 2
+
+# Mayor salto entre dos registros (uint32 en µs, ~71 minutos)
+MAX_DELTA_US = 0xFFFFFFFF
+
+# El hilo escritor vacía la cola cada FLUSH_INTERVAL o al juntar FLUSH_THRESHOLD acciones
+FLUSH_INTERVAL = 0.5
+FLUSH_THRESHOLD = 4096
+
+# Acciones pendientes de escribir antes de empezar a descartar (disco lento o bloqueado)
+MAX_PENDING = 200000
+
+# Campos que caben en el formato binario de puntero
+POINTER_FIELDS = frozenset(('action', 'x', 'y', 'button', 'amount', 'profile', 'seq'))
+
+
+class SessionFormatError(ValueError):
+    """Archivo de sesión inválido o truncado"""
+
+
+def _fits(value, low, high):
+    return isinstance(value, int) and not isinstance(value, bool) and low <= value <= high
+
+
+def fits_pointer_record(action):
+    """True si una acción JSON cabe sin pérdida en el formato binario de puntero"""
+    return (action.get('action') in OPCODES and POINTER_FIELDS.issuperset(action)
+            and action.get('button', 'left') in BUTTON_CODES
+            and _fits(action.get('x', 0), -2**31, 2**31 - 1)
+            and _fits(action.get('y', 0), -2**31, 2**31 - 1)
+            and _fits(action.get('amount', 0), -2**15, 2**15 - 1)
+            and _fits(action.get('seq', 0), 0, 2**32 - 1))
+
+
+def encode_record(delta_us, action):
+    """Codifica una acción como registro (cabecera + datos)"""
+    if isinstance(action, PointerEvent):
+        kind = RECORD_POINTER
+        payload = encode_event(action.action, action.seq, action.x, action.y, action.button, action.amount)
+        payload += (action.profile or '').encode('ascii')
+    elif fits_pointer_record(action):
+        kind = RECORD_POINTER
+        payload = encode_event(action['action'], action.get('seq', 0), action.get('x', 0), action.get('y', 0),
+                               action.get('button', 'left'), action.get('amount', 0))
+        payload += (action.get('profile') or '').encode('ascii')
+    else:
+        kind = RECORD_JSON
+        payload = json.dumps(action, separators=(',', ':')).encode()
+    return RECORD_STRUCT.pack(min(delta_us, MAX_DELTA_US), kind, len(payload)) + payload
+
+
+class SessionRecorder:
+    """Graba acciones aceptadas en un archivo, con un hilo escritor en segundo plano.
+
+    ``record(actions)`` solo toma el instante y agrega a una lista: el
+    codificado y la escritura a disco ocurren por tandas en el hilo escritor.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(HEADER_STRUCT.pack(MAGIC, VERSION, time.time()))
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self._last_timestamp = None
+        self.stats = {
+            'recorded': 0,
+            'written': 0,
+            'dropped': 0,
+            'bytes': self._file.tell()
+        }
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='session-recorder', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Escribe lo pendiente y cierra el archivo"""
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._flush()
+        self._file.close()
+
+    def record(self, actions):
+        """Registra una o más acciones aceptadas (mismo instante para todas)"""
+        timestamp = time.perf_counter()
+        with self._lock:
+            if len(self._pending) >= MAX_PENDING:
+                self.stats['dropped'] += len(actions)
+                return
+            for action in actions:
+                self._pending.append((timestamp, action))
+            self.stats['recorded'] += len(actions)
+            if len(self._pending) >= FLUSH_THRESHOLD:
+                self._wake.set()
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        chunk = bytearray()
+        last_timestamp = self._last_timestamp
+        for timestamp, action in pending:
+            delta = 0 if last_timestamp is None else timestamp - last_timestamp
+            chunk += encode_record(int(delta * 1_000_000), action)
+            last_timestamp = timestamp
+        self._last_timestamp = last_timestamp
+
+        self._file.write(chunk)
+        self._file.flush()
+        self.stats['written'] += len(pending)
+        self.stats['bytes'] += len(chunk)
+
+
+def read_session(path):
+    """Lee una sesión por streaming. Genera (segundos desde el inicio, acción).
+
+    Las acciones de puntero se entregan como PointerEvent y las demás como dict.
+    Un archivo con varias grabaciones agregadas se lee como una sola sesión.
+    """
+    with open(path, 'rb') as session_file:
+        header = session_file.read(HEADER_STRUCT.size)
+        if len(header) < HEADER_STRUCT.size:
+            raise SessionFormatError('Archivo de sesión vacío o truncado')
+        magic, version, _ = HEADER_STRUCT.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise SessionFormatError(f'No es un archivo de sesión (versión {VERSION})')
+
+        elapsed_us = 0
+        while True:
+            record_header = session_file.read(RECORD_STRUCT.size)
+            if not record_header:
+                return
+            if len(record_header) < RECORD_STRUCT.size:
+                raise SessionFormatError('Registro truncado al final del archivo')
+            delta_us, kind, length = RECORD_STRUCT.unpack(record_header)
+            payload = session_file.read(length)
+            if len(payload) < length:
+                raise SessionFormatError('Registro truncado al final del archivo')
+            elapsed_us += delta_us
+
+            if kind == RECORD_POINTER:
+                profile = payload[EVENT_SIZE:].decode('ascii') or None
+                action = decode_events(payload[:EVENT_SIZE], profile)[0]
+            elif kind == RECORD_JSON:
+                action = json.loads(payload)
+            else:
+                raise SessionFormatError(f'Tipo de registro desconocido: {kind}')
+            yield elapsed_us / 1_000_000, action
+
+
+def replay_session(path, submit, speed=1.0):
+    """Reproduce una sesión entregando cada acción a ``submit``.
+
+    ``speed`` 1 respeta los tiempos originales, 2 va al doble de rápido y
+    0 entrega todo lo más rápido posible. Retorna la cantidad de acciones.
+    """
+    count = 0
+    start = time.perf_counter()
+    for elapsed, action in read_session(path):
+        if speed > 0:
+            delay = start + elapsed / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        submit(action)
+        count += 1
+    return count
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Escritura masiva de texto
+Un texto grande no se escribe dentro del request: se convierte en un trabajo
+que un hilo propio entrega al despachador en trozos, a un ritmo de teclas
+configurable. El request responde de inmediato con el id del trabajo, y el
+progreso se consulta o se cancela después.
+
+Para bloques muy grandes se puede usar el portapapeles: se copia el texto y
+se envía el shortcut de pegar (más un trozo de tiempo que escribir tecla a tecla).
+
+Las teclas que llegan mientras hay un trabajo en curso esperan a que termine,
+así un Enter enviado después de pegar nunca cae en medio del texto.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+from input_dispatcher import QueueFull
+
+# Textos de /type más largos que esto se escriben como trabajo
+BULK_THRESHOLD = 256
+
+# Desde este largo el modo 'auto' pega por portapapeles (si el backend lo permite)
+PASTE_THRESHOLD = 2000
+
+# Ritmo por defecto en teclas por segundo (0 = lo más rápido que permita el backend)
+DEFAULT_RATE = 0
+
+# Cada trozo cubre este tiempo de escritura al ritmo pedido
+CHUNK_INTERVAL = 0.05
+
+# Largo del trozo cuando no hay ritmo (escritura lo más rápida posible)
+MAX_CHUNK_SIZE = 64
+
+# Tiempo máximo de espera por un trozo antes de marcar el trabajo con error
+CHUNK_TIMEOUT = 30.0
+
+# Trabajos terminados que se conservan para consultar su estado
+MAX_FINISHED_JOBS = 20
+
+# Teclas que pueden esperar detrás de los trabajos; las siguientes se rechazan
+MAX_DEFERRED = 512
+
+TYPING_MODES = ('auto', 'type', 'paste')
+
+# Acciones que esperan detrás de los trabajos de escritura
+DEFERRED_ACTIONS = frozenset(('type', 'special', 'shortcut', 'keys', 'paste_text'))
+
+
+def is_bulk_text(data):
+    """True si es un ``type`` que se escribe como trabajo (texto largo, no un trozo de otro trabajo)"""
+    return data.get('action') == 'type' and 'job' not in data and len(data['text']) > BULK_THRESHOLD
+
+
+class TypingJob:
+    """Trabajo de escritura con su progreso"""
+
+    def __init__(self, job_id, text, mode, rate, paste_keys=None, profile=None):
+        self.id = job_id
+        self.text = text
+        self.mode = mode
+        self.rate = rate
+        self.paste_keys = paste_keys
+        self.profile = profile
+        self.state = 'queued'
+        self.typed = 0
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.chunk_done = threading.Event()
+
+    @property
+    def finished(self):
+        return self.state in ('done', 'cancelled', 'error')
+
+    def chunk_size(self):
+        if self.rate:
+            return max(1, int(self.rate * CHUNK_INTERVAL))
+        return MAX_CHUNK_SIZE
+
+    def to_dict(self):
+        end = self.finished_at or time.time()
+        return {
+            'id': self.id,
+            'state': self.state,
+            'mode': self.mode,
+            'total': len(self.text),
+            'typed': self.typed,
+            'progress': round(self.typed / len(self.text), 3) if self.text else 1.0,
+            'rate': self.rate,
+            'elapsed': round(end - self.started_at, 3) if self.started_at else 0.0,
+            'error': self.error
+        }
+
+
+class TypingJobManager:
+    """Cola FIFO de trabajos de escritura atendida por un hilo propio.
+
+    ``submit(action, source=None, block=False)`` entrega una acción al despachador
+    (el hilo de trabajos espera lugar con ``block=True``) y ``submit_many(actions,
+    source=None, block=False)`` un lote completo o nada. Los trozos son
+    acciones ``type`` con el campo ``job``; quien las ejecuta debe llamar a
+    ``chunk_applied`` para que el trabajo avance. Los pegados son acciones
+    ``paste_text``. ``can_paste()`` indica si el backend tiene portapapeles.
+    """
+
+    def __init__(self, submit, submit_many, can_paste=lambda: False):
+        self._submit = submit
+        self._submit_many = submit_many
+        self._can_paste = can_paste
+        self._queue = deque()  # TypingJob o (acciones diferidas, cliente), en orden
+        self._jobs = OrderedDict()
+        self._condition = threading.Condition()
+        self._ids = itertools.count(1)
+        self._active = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='typing-jobs', daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self):
+        """True si hay un trabajo en curso o en espera"""
+        return self._active is not None or bool(self._queue)
+
+    def create(self, text, rate=DEFAULT_RATE, mode='auto', paste_keys=None, profile=None):
+        """Encola un trabajo de escritura y lo retorna"""
+        job = self._new_job(text, rate, mode, paste_keys, profile)
+        with self._condition:
+            self._add_job(job)
+            self._queue.append(job)
+            self._condition.notify()
+        return job
+
+    def _new_job(self, text, rate=DEFAULT_RATE, mode='auto', paste_keys=None, profile=None):
+        if mode == 'auto':
+            mode = 'paste' if len(text) >= PASTE_THRESHOLD and self._can_paste() else 'type'
+        return TypingJob(f'job-{next(self._ids)}', text, mode, rate, paste_keys, profile)
+
+    def _add_job(self, job):
+        # Debe llamarse con el lock tomado
+        self._jobs[job.id] = job
+        self._forget_finished()
+
+    def submit_after_jobs(self, action, source=None):
+        """Entrega una acción de teclado respetando el orden con los trabajos.
+
+        Si no hay trabajos pendientes va directo al despachador; si los hay,
+        espera su turno detrás de ellos. Retorna True si quedó diferida.
+        Lanza QueueFull si la cola de teclas (o la de diferidas) está llena.
+        """
+        with self._condition:
+            if self._active is None and not self._queue:
+                self._submit(action, source)
+                return False
+            if len(self._queue) >= MAX_DEFERRED:
+                raise QueueFull('keys', MAX_DEFERRED)
+            self._queue.append(((action,), source))
+            self._condition.notify()
+            return True
+
+    def submit_batch_after_jobs(self, actions, source=None, rate=DEFAULT_RATE):
+        """Entrega un lote validado (mouse y teclado) respetando el orden con los trabajos.
+
+        Los textos largos (``is_bulk_text``) se escriben como trabajos en su lugar del
+        lote. Lo anterior a la primera acción que debe esperar (un texto largo, o una
+        tecla si hay trabajos en curso) va directo a ``submit_many``; desde ahí el
+        resto del lote espera su turno en orden. Todo o nada: si lanza QueueFull no
+        se encoló ni se creó nada. Retorna los trabajos creados.
+        """
+        with self._condition:
+            busy = self._active is not None or bool(self._queue)
+            split = next((index for index, data in enumerate(actions)
+                          if is_bulk_text(data) or (busy and data.get('action') in DEFERRED_ACTIONS)),
+                         len(actions))
+
+            deferred, jobs = [], []
+            for data in actions[split:]:
+                if is_bulk_text(data):
+                    job = self._new_job(data['text'], rate, profile=data.get('profile'))
+                    deferred.append(job)
+                    jobs.append(job)
+                elif deferred and not isinstance(deferred[-1], TypingJob):
+                    deferred[-1][0].append(data)
+                else:
+                    deferred.append(([data], source))
+            if len(self._queue) + len(deferred) > MAX_DEFERRED:
+                raise QueueFull('keys', MAX_DEFERRED)
+
+            if split:
+                self._submit_many(actions[:split], source)
+            for item in deferred:
+                if isinstance(item, TypingJob):
+                    self._add_job(item)
+                self._queue.append(item)
+            if deferred:
+                self._condition.notify()
+            return jobs
+
+    def wait_idle(self, timeout=None):
+        """Espera a que terminen todos los trabajos. Retorna False si vence el plazo"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._active is None and not self._queue, timeout)
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        return [job.to_dict() for job in list(self._jobs.values())]
+
+    def cancel(self, job_id=None):
+        """Cancela un trabajo (o todos los pendientes si no se indica). Retorna los ids cancelados"""
+        cancelled = []
+        with self._condition:
+            for job in list(self._jobs.values()):
+                if (job_id is None or job.id == job_id) and not job.finished:
+                    job.state = 'cancelled'
+                    job.finished_at = time.time()
+                    job.chunk_done.set()
+                    cancelled.append(job.id)
+            self._condition.notify()
+        return cancelled
+
+    def is_cancelled(self, job_id):
+        job = self._jobs.get(job_id)
+        return job is not None and job.state == 'cancelled'
+
+    def chunk_applied(self, job_id, chars, error=None):
+        """Lo llama el despachador al ejecutar un trozo (o un pegado) del trabajo"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.typed += chars
+        if error is not None:
+            job.error = error
+        job.chunk_done.set()
+
+    def _forget_finished(self):
+        # Debe llamarse con el lock tomado
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                item = self._queue.popleft()
+                self._active = item
+
+            try:
+                if isinstance(item, TypingJob):
+                    self._run_job(item)
+                else:
+                    self._submit_many(*item, block=True)
+            except Exception as e:
+                # Un fallo al entregar (ej. el despachador rechaza la acción) no detiene
+                # el hilo: el trabajo queda con error y las teclas retenidas detrás de
+                # él se entregan igual
+                if isinstance(item, TypingJob):
+                    self._fail(item, str(e))
+                else:
+                    print(f"❌ Acciones diferidas descartadas ({len(item[0])}): {e}")
+            finally:
+                with self._condition:
+                    self._active = None
+                    self._condition.notify_all()  # Despierta a wait_idle
+
+    def _run_job(self, job):
+        if job.finished:
+            return  # Cancelado antes de empezar
+        job.state = 'typing'
+        job.started_at = time.time()
+
+        if job.mode == 'paste':
+            job.chunk_done.clear()
+            action = {'action': 'paste_text', 'text': job.text, 'job': job.id}
+            if job.paste_keys:
+                action['keys'] = job.paste_keys
+            self._submit(action, block=True)
+            self._wait_chunk(job)
+        else:
+            chunk_size = job.chunk_size()
+            position = 0
+            while position < len(job.text) and not job.finished:
+                chunk = job.text[position:position + chunk_size]
+                started = time.perf_counter()
+                job.chunk_done.clear()
+                action = {'action': 'type', 'text': chunk, 'job': job.id}
+                if job.profile:
+                    action['profile'] = job.profile
+                self._submit(action, block=True)
+                if not self._wait_chunk(job):
+                    break
+                position += len(chunk)
+                # Respetar el ritmo de teclas pedido
+                if job.rate:
+                    delay = len(chunk) / job.rate - (time.perf_counter() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+
+        if not job.finished:
+            job.state = 'error' if job.error else 'done'
+            job.finished_at = time.time()
+
+    def _fail(self, job, error):
+        with self._condition:
+            if not job.finished:
+                job.state = 'error'
+                job.error = error
+                job.finished_at = time.time()
+            job.chunk_done.set()
+
+    def _wait_chunk(self, job):
+        # Un solo trozo en la cola a la vez: cancelar es inmediato y otras
+        # acciones (clicks, movimientos) se intercalan entre trozos
+        if not job.chunk_done.wait(CHUNK_TIMEOUT):
+            job.error = 'Tiempo de espera agotado'
+        return job.error is None and not job.finished
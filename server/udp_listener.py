@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Camino rápido UDP para movimiento de puntero
+El movimiento tolera pérdidas: solo importa la posición más nueva. Sobre UDP un
+paquete perdido no bloquea a los siguientes (sin head-of-line blocking de TCP).
+Los datagramas usan el formato binario de wire_format.py; clicks, inicio/fin de
+drag y teclas siguen por el canal confiable (HTTP/WebSocket).
+"""
+
+import socket
+import threading
+import time
+
+from input_dispatcher import QueueFull
+from wire_format import WireFormatError, decode_events, encode_event
+
+# Solo acciones tolerantes a pérdida
+UDP_ACTIONS = frozenset(('move', 'drag_move', 'scroll'))
+
+# Un emisor sin datagramas por este tiempo reinicia su secuencia
+SENDER_IDLE_RESET = 5.0
+
+# Emisores recordados a la vez (UDP no tiene conexión: cualquier origen crea una entrada)
+MAX_SENDERS = 1024
+
+MAX_DATAGRAM = 2048
+
+
+def is_newer(seq, last_seq):
+    """Compara números de secuencia uint32 tolerando el desborde"""
+    return 0 < ((seq - last_seq) & 0xFFFFFFFF) < 0x80000000
+
+
+class UDPPointerListener:
+    """Recibe datagramas de puntero y los entrega a ``submit_many(events, source)``.
+
+    Descarta por emisor todo evento con secuencia igual o anterior a la última
+    aplicada. ``source`` es la dirección del emisor: cada uno tiene su propio
+    reloj en el buffer de jitter, como los clientes HTTP y WebSocket.
+    """
+
+    def __init__(self, submit_many, host='0.0.0.0', port=5001, profile=None):
+        self._submit_many = submit_many
+        self._address = (host, port)
+        self._profile = profile
+        self._senders = {}  # (ip, puerto) -> (última secuencia, instante), del más viejo al más nuevo
+        self._socket = None
+        self._thread = None
+        self.stats = {
+            'datagrams': 0,
+            'accepted': 0,
+            'stale': 0,
+            'rejected': 0,
+            'overloaded': 0
+        }
+
+    @property
+    def port(self):
+        return self._socket.getsockname()[1] if self._socket else self._address[1]
+
+    def start(self):
+        """Abre el socket e inicia el hilo receptor"""
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(self._address)
+        self._thread = threading.Thread(target=self._run, name='udp-pointer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def _run(self):
+        while self._socket is not None:
+            try:
+                payload, sender = self._socket.recvfrom(MAX_DATAGRAM)
+            except OSError:
+                return
+            self.handle_datagram(payload, sender)
+
+    def handle_datagram(self, payload, sender):
+        """Decodifica un datagrama, descarta lo viejo y encola el resto"""
+        self.stats['datagrams'] += 1
+        try:
+            events = decode_events(payload, self._profile)
+        except WireFormatError:
+            self.stats['rejected'] += 1
+            return
+
+        now = time.monotonic()
+        last_seq, last_seen = self._senders.get(sender, (None, 0.0))
+        if now - last_seen > SENDER_IDLE_RESET:
+            last_seq = None
+
+        accepted = []
+        for event in events:
+            if event.action not in UDP_ACTIONS:
+                self.stats['rejected'] += 1
+            elif last_seq is not None and not is_newer(event.seq, last_seq):
+                self.stats['stale'] += 1
+            else:
+                last_seq = event.seq
+                accepted.append(event)
+
+        # Reinsertar deja el diccionario ordenado por actividad: los inactivos quedan al frente
+        self._senders.pop(sender, None)
+        self._senders[sender] = (last_seq, now)
+        self._forget_idle(now)
+        if accepted:
+            try:
+                self._submit_many(accepted, sender)
+            except QueueFull:
+                # Despachador saturado: como cualquier datagrama perdido, el siguiente trae la posición
+                self.stats['overloaded'] += len(accepted)
+                return
+            self.stats['accepted'] += len(accepted)
+
+    def _forget_idle(self, now):
+        # Los inactivos ya reiniciarían su secuencia: no hace falta recordarlos
+        senders = self._senders
+        while senders:
+            oldest = next(iter(senders))
+            if len(senders) <= MAX_SENDERS and now - senders[oldest][1] <= SENDER_IDLE_RESET:
+                break
+            del senders[oldest]
+
+
+class UDPPointerSender:
+    """Emisor para clientes nativos (el navegador no puede enviar UDP)"""
+
+    def __init__(self, host, port=5001):
+        self._address = (host, port)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._seq = 0
+
+    def send(self, action, x, y, button='left', amount=0):
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        self._socket.sendto(encode_event(action, self._seq, x, y, button, amount), self._address)
+        return self._seq
+
+    def close(self):
+        self._socket.close()
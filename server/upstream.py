@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Conexiones salientes hacia servidores destino (fan-out y hub)
+Cada destino tiene su propia cola y su propia tarea de envío sobre asyncio,
+con conexiones HTTP/1.1 persistentes (keep-alive, TCP_NODELAY) que se
+reutilizan entre requests. Un destino lento solo atrasa su propia cola: los
+demás siguen enviando a su ritmo.
+
+La tarea de envío junta todo lo pendiente de su cola en un solo ``/events``
+(JSON o binario), así un destino atrasado se pone al día con pocos requests
+en lugar de uno por evento. Las acciones se entregan en el orden en que se
+encolaron.
+
+Una tanda que no llega (destino caído, 429 o 503) vuelve al frente de la cola y
+se reintenta con espera creciente. Si el request alcanzó a salir y la respuesta
+se perdió, el destino pudo haberlo aplicado: no se repite, salvo las acciones
+que sueltan botones (``drag_end``), que se reenvían siempre para no dejar un
+botón presionado en el destino. Una tanda que el destino no puede admitir
+nunca (413) se reenvía partida, y si es una sola entrada se descarta.
+"""
+
+import asyncio
+import json
+import socket
+import time
+from collections import deque
+
+from input_dispatcher import QUEUE_LIMITS, event_class
+from wire_format import ACTIONS_BY_OPCODE, EVENT_SIZE, OPCODES
+
+# Tamaño del pool de conexiones por destino (una para la cola de acciones y el resto para consultas)
+POOL_SIZE = 2
+
+# Eventos pendientes por destino antes de descartar movimientos viejos (y luego rechazar)
+MAX_QUEUE = 2000
+
+# Máximo de acciones por /events (mismo límite que el servidor). Además ninguna
+# tanda lleva más acciones de una clase que las que caben en su cola del destino
+MAX_BATCH = 500
+
+# Tiempo máximo de espera de una respuesta del destino
+REQUEST_TIMEOUT = 5.0
+
+# Espera entre reintentos de una tanda fallida: se duplica en cada fallo seguido hasta el máximo
+RETRY_DELAY = 0.1
+MAX_RETRY_DELAY = 5.0
+
+# Respuestas del destino que indican saturación pasajera: la tanda se reintenta igual
+RETRYABLE_STATUS = frozenset((429, 503))
+
+# Tanda que el destino no admite nunca (más acciones de una clase que su cola): se parte
+TOO_LARGE_STATUS = 413
+
+# Movimientos a posición absoluta: si la cola crece, solo importa el más reciente
+MOTION_ACTIONS = frozenset(('move', 'drag_move'))
+
+# Acciones que sueltan un botón: nunca se descartan (perder una deja el botón presionado)
+RELEASE_ACTIONS = frozenset(('drag_end',))
+
+BINARY_CONTENT_TYPE = 'application/octet-stream'
+
+RELEASE_OPCODES = frozenset(OPCODES[action] for action in RELEASE_ACTIONS)
+
+# Endpoints de teclado que se reenvían como acciones del vocabulario de /events
+KEYBOARD_ENDPOINTS = {
+    '/type': 'type',
+    '/special': 'special',
+    '/shortcut': 'shortcut',
+    '/keys': 'keys'
+}
+
+# Endpoints que se reenvían tal cual (un request por destino, en orden con las acciones)
+FORWARDED_ENDPOINTS = ('/type/bulk', '/type/cancel')
+
+
+class UpstreamError(Exception):
+    """Fallo de conexión o respuesta inválida de un destino.
+
+    ``sent`` indica que el request ya se había escrito completo: el destino pudo
+    haberlo aplicado aunque la respuesta no llegó.
+    """
+
+    def __init__(self, message, sent=False):
+        super().__init__(message)
+        self.sent = sent
+
+
+def parse_target(spec, default_port=5000):
+    """'192.168.1.20' o '192.168.1.20:5001' -> (host, puerto)"""
+    host, separator, port = spec.strip().rpartition(':')
+    if not separator:
+        return spec.strip(), default_port
+    try:
+        return host, int(port)
+    except ValueError:
+        raise ValueError(f'Destino inválido: {spec!r} (formato HOST[:PUERTO])') from None
+
+
+class UpstreamConnection:
+    """Conexión HTTP/1.1 persistente hacia un destino"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    @property
+    def open(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), REQUEST_TIMEOUT)
+        sock = self._writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def request(self, method, path, body=b'', content_type='application/json', headers=None):
+        """Envía un request y retorna (código, cuerpo). Reabre la conexión si el destino la cerró.
+
+        Solo se reintenta (una vez, con una conexión nueva) si la conexión reutilizada
+        falla antes de terminar de escribir el request. Después de eso el destino pudo
+        haberlo aplicado: repetir un POST /events duplicaría clicks y teclas, así que
+        se reporta UpstreamError con ``sent=True``.
+        """
+        if self.open and self._reader.at_eof():
+            self.close()  # El destino ya cerró la conexión inactiva
+        reused = self.open
+        sent = False
+        try:
+            if not reused:
+                await self.connect()
+            try:
+                await asyncio.wait_for(self._send(method, path, body, content_type, headers), REQUEST_TIMEOUT)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                # Conexión vieja detectada al escribir: el request no salió, va por una nueva
+                self.close()
+                await self.connect()
+                await asyncio.wait_for(self._send(method, path, body, content_type, headers), REQUEST_TIMEOUT)
+            sent = True
+            return await asyncio.wait_for(self._receive(), REQUEST_TIMEOUT)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            self.close()
+            raise UpstreamError(str(e) or type(e).__name__, sent) from e
+        except asyncio.TimeoutError as e:
+            self.close()
+            raise UpstreamError('Tiempo de espera agotado', sent) from e
+
+    async def _send(self, method, path, body, content_type, headers):
+        head = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                f'Content-Length: {len(body)}', 'Connection: keep-alive']
+        if body:
+            head.append(f'Content-Type: {content_type}')
+        for name, value in (headers or {}).items():
+            head.append(f'{name}: {value}')
+        self._writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await self._writer.drain()
+
+    async def _receive(self):
+        response_head = await self._reader.readuntil(b'\r\n\r\n')
+        lines = response_head.decode('latin-1').split('\r\n')
+        try:
+            status_code = int(lines[0].split(' ', 2)[1])
+        except (IndexError, ValueError):
+            raise ConnectionError(f'Respuesta inválida: {lines[0]!r}') from None
+        response_headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            if name:
+                response_headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in response_headers:
+            response_body = await self._reader.readexactly(int(response_headers['content-length']))
+        else:
+            response_body = await self._reader.read()  # HTTP/1.0 sin largo: hasta el cierre
+            response_headers['connection'] = 'close'
+        if 'close' in response_headers.get('connection', '').lower() or lines[0].startswith('HTTP/1.0'):
+            # Servidor sin keep-alive (ej. Werkzeug): la próxima vez se reconecta
+            self.close()
+        return status_code, response_body
+
+
+class ConnectionPool:
+    """Conexiones persistentes reutilizables hacia un destino"""
+
+    def __init__(self, host, port, size=POOL_SIZE):
+        self.host = host
+        self.port = port
+        self._idle = deque()
+        self._slots = asyncio.Semaphore(size)
+
+    async def request(self, method, path, body=b'', content_type='application/json', headers=None):
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else UpstreamConnection(self.host, self.port)
+            try:
+                return await connection.request(method, path, body, content_type, headers)
+            finally:
+                self._idle.append(connection)
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+
+class _Pending:
+    """Entrada de la cola de un destino"""
+    __slots__ = ('kind', 'data', 'profile', 'seq', 'accepted_at')
+
+    def __init__(self, kind, data, profile, seq, accepted_at):
+        self.kind = kind          # 'action' (dict), 'binary' (bytes) o 'request' (tupla)
+        self.data = data
+        self.profile = profile
+        self.seq = seq
+        self.accepted_at = accepted_at
+
+
+class UpstreamTarget:
+    """Destino con su cola de acciones y su tarea de envío.
+
+    ``on_delivered(target, seq, delivered_at)`` se llama por cada entrada
+    confirmada por el destino (ej. para medir el desfase entre destinos).
+    Debe crearse y usarse dentro del event loop.
+    """
+
+    def __init__(self, target_id, host, port, on_delivered=None):
+        self.id = target_id
+        self.host = host
+        self.port = port
+        self.pool = ConnectionPool(host, port)
+        self._on_delivered = on_delivered
+        self._queue = deque()
+        self._batch_limit = MAX_BATCH  # Se reduce mientras el destino responda 413
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.connected = False
+        self.last_error = None
+        self.screen = None
+        self.last_seen = None
+        self.stats = {
+            'queued': 0,
+            'sent': 0,
+            'batches': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'rejected': 0,
+            'retried': 0,
+            'failed': 0,
+            'errors': 0,
+            'latency_ms': None,
+            'last_latency_ms': None
+        }
+
+    @property
+    def address(self):
+        return f'{self.host}:{self.port}'
+
+    @property
+    def depth(self):
+        return len(self._queue)
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.pool.close()
+
+    def enqueue(self, kind, data, profile=None, seq=0, accepted_at=None):
+        """Agrega una entrada a la cola. Retorna False si la cola está llena"""
+        queue = self._queue
+        if kind == 'action' and data.get('action') in MOTION_ACTIONS and queue:
+            tail = queue[-1]
+            if tail.kind == 'action' and tail.data.get('action') == data.get('action') and tail.profile == profile:
+                # El más reciente gana, igual que en el despachador del destino
+                queue[-1] = _Pending(kind, data, profile, seq, tail.accepted_at)
+                self.stats['coalesced'] += 1
+                self._wakeup.set()
+                return True
+
+        if len(queue) >= MAX_QUEUE and not self._drop_oldest_motion():
+            self.stats['rejected'] += 1
+            return False
+        queue.append(_Pending(kind, data, profile, seq, accepted_at or time.perf_counter()))
+        self.stats['queued'] += 1
+        self._wakeup.set()
+        return True
+
+    @staticmethod
+    def _classes(pending):
+        """Clases de cola del despachador de las acciones de una entrada"""
+        if pending.kind == 'action':
+            return (event_class(pending.data.get('action')),)
+        if pending.kind == 'binary':
+            return tuple(event_class(ACTIONS_BY_OPCODE.get(pending.data[offset]))
+                         for offset in range(0, len(pending.data), EVENT_SIZE))
+        return ()
+
+    def _drop_oldest_motion(self):
+        for index, pending in enumerate(self._queue):
+            if pending.kind == 'action' and pending.data.get('action') in MOTION_ACTIONS:
+                del self._queue[index]
+                self.stats['dropped'] += 1
+                return True
+        return False
+
+    def has_room(self, count):
+        """True si ``enqueue`` aceptaría ``count`` entradas más (descartando movimientos viejos)"""
+        free = MAX_QUEUE - len(self._queue)
+        if free >= count:
+            return True
+        motions = sum(1 for pending in self._queue
+                      if pending.kind == 'action' and pending.data.get('action') in MOTION_ACTIONS)
+        return free + motions >= count
+
+    async def refresh_screen(self):
+        """Consulta /screen del destino (también sirve de chequeo de salud). Retorna la geometría o None"""
+        try:
+            status_code, body = await self.pool.request('GET', '/screen')
+            if status_code != 200:
+                raise UpstreamError(f'HTTP {status_code} en /screen')
+            self.screen = json.loads(body).get('screen')
+        except (UpstreamError, OSError, ValueError) as e:
+            self.connected = False
+            self.last_error = str(e) or type(e).__name__
+            return None
+        self.connected = True
+        self.last_seen = time.time()
+        return self.screen
+
+    def _next_batch(self):
+        # Entradas contiguas del mismo tipo y perfil que caben en un solo request
+        # (y en las colas por clase del despachador del destino)
+        first = self._queue.popleft()
+        batch = [first]
+        if first.kind == 'request':
+            return batch
+        counts = {}
+        for kind in self._classes(first):
+            counts[kind] = counts.get(kind, 0) + 1
+        while (self._queue and len(batch) < self._batch_limit and self._queue[0].kind == first.kind
+               and self._queue[0].profile == first.profile):
+            classes = self._classes(self._queue[0])
+            added = dict(counts)
+            for kind in classes:
+                added[kind] = added.get(kind, 0) + 1
+            if any(count > QUEUE_LIMITS[kind] for kind, count in added.items() if kind != 'motion'):
+                break
+            counts = added
+            batch.append(self._queue.popleft())
+        return batch
+
+    def _request_for(self, batch):
+        first = batch[0]
+        headers = {'X-Latency-Profile': first.profile} if first.profile else None
+        if first.kind == 'request':
+            method, path, body, content_type = first.data
+            return method, path, body, content_type, headers
+        if first.kind == 'binary':
+            return 'POST', '/events', b''.join(p.data for p in batch), BINARY_CONTENT_TYPE, headers
+        body = json.dumps([p.data for p in batch], separators=(',', ':')).encode()
+        return 'POST', '/events', body, 'application/json', headers
+
+    @staticmethod
+    def _release_part(pending):
+        """La parte de una entrada que suelta botones (una entrada nueva), o None si no tiene"""
+        if pending.kind == 'action':
+            return pending if pending.data.get('action') in RELEASE_ACTIONS else None
+        if pending.kind == 'binary':
+            frames = [pending.data[offset:offset + EVENT_SIZE]
+                      for offset in range(0, len(pending.data), EVENT_SIZE)]
+            releases = [frame for frame in frames if frame[0] in RELEASE_OPCODES]
+            if not releases:
+                return None
+            if len(releases) == len(frames):
+                return pending
+            return _Pending('binary', b''.join(releases), pending.profile, pending.seq, pending.accepted_at)
+        return None
+
+    def _retry(self, batch, reason):
+        """Devuelve ``batch`` al frente de la cola (en orden) para reenviarlo"""
+        self._queue.extendleft(reversed(batch))
+        self.stats['retried'] += len(batch)
+        self.last_error = reason
+
+    def _give_up(self, batch, reason):
+        """Descarta ``batch`` salvo las liberaciones de botón, que se reintentan solas.
+
+        Una tanda que solo trae liberaciones y fue rechazada en firme se descarta
+        completa (reenviarla daría el mismo rechazo para siempre).
+        """
+        releases = [part for part in map(self._release_part, batch) if part is not None]
+        if releases == batch and not reason.sent:
+            releases = []
+        self.stats['failed'] += len(batch) - len(releases)
+        if releases:
+            self._retry(releases, str(reason))
+        else:
+            self.last_error = str(reason)
+
+    async def _run(self):
+        failures = 0
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            batch = self._next_batch()
+            method, path, body, content_type, headers = self._request_for(batch)
+            try:
+                status_code, response = await self.pool.request(method, path, body, content_type, headers)
+            except (UpstreamError, OSError) as e:
+                self.connected = False
+                self.stats['errors'] += 1
+                error = e if isinstance(e, UpstreamError) else UpstreamError(str(e) or type(e).__name__)
+                if error.sent:
+                    # El destino pudo haber aplicado la tanda: solo se reenvían las liberaciones
+                    self._give_up(batch, error)
+                else:
+                    # El request no salió (destino caído): la tanda espera a que vuelva
+                    self._retry(batch, str(error))
+                failures += 1
+                await asyncio.sleep(min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** (failures - 1)))
+                continue
+
+            self.connected = True
+            self.last_error = None
+            self.last_seen = time.time()
+            now = time.perf_counter()
+            if status_code >= 400:
+                self.stats['errors'] += 1
+                reason = f'HTTP {status_code}: {response[:200].decode(errors="replace")}'
+                if status_code == TOO_LARGE_STATUS and len(batch) > 1:
+                    # El destino tiene colas más chicas: se reenvía en tandas de la mitad
+                    self._batch_limit = max(1, len(batch) // 2)
+                    self._retry(batch, reason)
+                    continue
+                if status_code in RETRYABLE_STATUS:
+                    # Destino saturado: /events es todo o nada, así que la tanda se reintenta completa
+                    self._retry(batch, reason)
+                    failures += 1
+                    await asyncio.sleep(min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** (failures - 1)))
+                    continue
+                self._give_up(batch, UpstreamError(reason))
+                continue
+
+            failures = 0
+            self._batch_limit = MAX_BATCH
+            self.stats['sent'] += len(batch)
+            self.stats['batches'] += 1
+
+            latency = (now - batch[-1].accepted_at) * 1000
+            average = self.stats['latency_ms']
+            self.stats['last_latency_ms'] = round(latency, 2)
+            self.stats['latency_ms'] = round(latency if average is None else average + (latency - average) / 8, 2)
+            if self._on_delivered is not None:
+                for pending in batch:
+                    self._on_delivered(self, pending.seq, now)
+
+    def to_dict(self):
+        return dict(self.stats, id=self.id, address=self.address, connected=self.connected,
+                    depth=self.depth, last_error=self.last_error, last_seen=self.last_seen)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Formato binario compacto para eventos de puntero de alta frecuencia
+Cada evento ocupa 16 bytes (little-endian), frente a ~50 bytes de JSON más
+los headers HTTP. Un mensaje puede traer varios eventos concatenados.
+
+    offset  tipo    campo
+    0       uint8   opcode (acción)
+    1       uint8   botón (0 left, 1 right, 2 middle)
+    2       int16   delta de scroll
+    4       uint32  número de secuencia
+    8       int32   x
+    12      int32   y
+
+En ``move_rel`` los campos x/y llevan el desplazamiento (dx, dy) en píxeles.
+
+En ``move`` y ``drag_move`` el botón y el scroll no se usan: con el bit
+TIMESTAMP_FLAG en el byte de botón, el int16 lleva los 16 bits bajos del
+instante del cliente en ms (``t``, para el buffer de jitter). Da la vuelta
+cada 65,5 s; el buffer lo reconstruye con las muestras anteriores.
+
+El codificador del cliente (client/js/modules/WireFormat.js) es el espejo de este módulo.
+"""
+
+import struct
+
+EVENT_STRUCT = struct.Struct('<BBhIii')
+EVENT_SIZE = EVENT_STRUCT.size
+
+OPCODES = {
+    'move': 1,
+    'click': 2,
+    'drag_start': 3,
+    'drag_move': 4,
+    'drag_end': 5,
+    'scroll': 6,
+    'move_rel': 7
+}
+ACTIONS_BY_OPCODE = {opcode: action for action, opcode in OPCODES.items()}
+
+BUTTONS = ('left', 'right', 'middle')
+BUTTON_CODES = {button: code for code, button in enumerate(BUTTONS)}
+
+BINARY_CONTENT_TYPE = 'application/octet-stream'
+
+# Bit del byte de botón que indica que el int16 lleva la marca de tiempo
+TIMESTAMP_FLAG = 0x80
+TIMESTAMP_MODULO = 1 << 16
+TIMESTAMPED_ACTIONS = frozenset(('move', 'drag_move'))
+
+
+class WireFormatError(ValueError):
+    """Mensaje binario mal formado"""
+
+
+class PointerEvent:
+    """Evento de puntero decodificado del formato binario.
+
+    Usa ``__slots__`` en lugar de un diccionario y expone ``get()`` para que
+    el despachador y los handlers lo traten igual que una acción JSON.
+    """
+
+    __slots__ = ('action', 'seq', 'x', 'y', 'button', 'amount', 'profile', 't')
+
+    def __init__(self, action, seq, x, y, button='left', amount=0, profile=None, t=None):
+        self.action = action
+        self.seq = seq
+        self.x = x
+        self.y = y
+        self.button = button
+        self.amount = amount
+        self.profile = profile
+        self.t = t  # ms del cliente módulo TIMESTAMP_MODULO, o None
+
+    @property
+    def t_modulo(self):
+        # La marca binaria es truncada: el buffer de jitter la reconstruye
+        return TIMESTAMP_MODULO if self.t is not None else None
+
+    @property
+    def dx(self):
+        # En move_rel, x/y son el desplazamiento
+        return self.x if self.action == 'move_rel' else None
+
+    @property
+    def dy(self):
+        return self.y if self.action == 'move_rel' else None
+
+    def get(self, key, default=None):
+        value = getattr(self, key, default)
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return getattr(self, key, None) is not None
+
+    def __repr__(self):
+        return (f'PointerEvent({self.action!r}, seq={self.seq}, x={self.x}, y={self.y}, '
+                f'button={self.button!r}, amount={self.amount})')
+
+
+def encode_event(action, seq, x, y, button='left', amount=0, t=None):
+    """Codifica un evento de puntero en 16 bytes (``t`` solo en move/drag_move)"""
+    try:
+        opcode = OPCODES[action]
+    except KeyError:
+        raise WireFormatError(f'Acción sin formato binario: {action}') from None
+    button_code = BUTTON_CODES.get(button, 0)
+    if t is not None:
+        if action not in TIMESTAMPED_ACTIONS:
+            raise WireFormatError(f'{action} no lleva marca de tiempo')
+        button_code |= TIMESTAMP_FLAG
+        amount = int(t) % TIMESTAMP_MODULO
+        if amount >= TIMESTAMP_MODULO // 2:
+            amount -= TIMESTAMP_MODULO  # Mismos 16 bits, como int16
+    return EVENT_STRUCT.pack(opcode, button_code, int(amount),
+                             seq & 0xFFFFFFFF, int(x), int(y))
+
+
+def decode_events(payload, profile=None):
+    """Decodifica uno o más eventos concatenados. Retorna una lista de PointerEvent"""
+    if not payload or len(payload) % EVENT_SIZE:
+        raise WireFormatError(f'Tamaño inválido: {len(payload)} bytes (múltiplo de {EVENT_SIZE})')
+
+    events = []
+    for opcode, button, amount, seq, x, y in EVENT_STRUCT.iter_unpack(payload):
+        action = ACTIONS_BY_OPCODE.get(opcode)
+        if action is None:
+            raise WireFormatError(f'Opcode desconocido: {opcode}')
+        t = None
+        if button & TIMESTAMP_FLAG:
+            if action not in TIMESTAMPED_ACTIONS:
+                raise WireFormatError(f'{action} no lleva marca de tiempo')
+            button &= ~TIMESTAMP_FLAG
+            t, amount = amount % TIMESTAMP_MODULO, 0
+        if button >= len(BUTTONS):
+            raise WireFormatError(f'Botón desconocido: {button}')
+        events.append(PointerEvent(action, seq, x, y, BUTTONS[button], amount, profile, t))
+    return events